@@ -0,0 +1,457 @@
+"""
+Registro de backends de mouse.
+
+Cada backend declara o que sabe fazer (``capabilities``) e se está
+disponível nesta máquina (``available()``, que também abre os recursos).
+Na partida, ``calibrate()`` mede latência por chamada e vazão de cada
+backend utilizável e ``select_backend()`` fica com o mais rápido que
+funcionou. Empates (até ``TIE_TOLERANCE``) ficam com o de maior prioridade:
+RAW_WIN → XTest → uinput → PyDirectInput → PyAutoGUI.
+
+``NullBackend`` e ``RecordingBackend`` nunca são escolhidos sozinhos; servem
+para benchmark e replay.
+"""
+import os
+import platform
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Type
+
+CAP_RELATIVE = "relative"
+CAP_ABSOLUTE = "absolute"
+CAP_BATCH = "batch"
+CAP_CLICKS = "clicks"
+
+TIE_TOLERANCE = 0.20  # até 20% mais lento que o melhor ainda conta como empate
+
+IS_WINDOWS = platform.system().lower().startswith("win")
+IS_LINUX = platform.system().lower() == "linux"
+
+
+class MouseBackend:
+    """Interface comum. Subclasses sobrescrevem o que declaram em ``capabilities``."""
+
+    name = "base"
+    capabilities: frozenset = frozenset()
+    priority = 100       # menor = preferido em empate
+    auto_select = True   # False: só quando pedido explicitamente
+
+    def available(self) -> bool:
+        return False
+
+    def move_rel(self, dx, dy):
+        raise NotImplementedError
+
+    def move_batch(self, deltas: List[Tuple[int, int]]):
+        for dx, dy in deltas:
+            self.move_rel(dx, dy)
+
+    def move_abs(self, x, y):
+        raise NotImplementedError
+
+    def click(self, button: str = "left"):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def supports(self, cap: str) -> bool:
+        return cap in self.capabilities
+
+
+BACKENDS: List[Type[MouseBackend]] = []
+
+
+def register_backend(cls: Type[MouseBackend]) -> Type[MouseBackend]:
+    BACKENDS.append(cls)
+    return cls
+
+
+# --- RAW relativo no Windows (melhor para jogos/360) ---
+@register_backend
+class RawWinBackend(MouseBackend):
+    name = "RAW_WIN"
+    capabilities = frozenset({CAP_RELATIVE, CAP_BATCH, CAP_CLICKS})
+    priority = 0
+
+    _FLAGS = {"left": (0x0002, 0x0004), "right": (0x0008, 0x0010), "middle": (0x0020, 0x0040)}
+
+    def available(self) -> bool:
+        if not IS_WINDOWS:
+            return False
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class MOUSEINPUT(ctypes.Structure):
+                _fields_ = [("dx", wintypes.LONG),
+                            ("dy", wintypes.LONG),
+                            ("mouseData", wintypes.DWORD),
+                            ("dwFlags", wintypes.DWORD),
+                            ("time", wintypes.DWORD),
+                            ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong))]
+
+            class INPUT(ctypes.Structure):
+                _fields_ = [("type", wintypes.DWORD),
+                            ("mi", MOUSEINPUT)]
+
+            self._ct = ctypes
+            self._MOUSEINPUT, self._INPUT = MOUSEINPUT, INPUT
+            self._send = ctypes.windll.user32.SendInput
+            self._inp = INPUT()  # reaproveitado a cada movimento
+            self._inp.type = 0   # INPUT_MOUSE
+            return True
+        except Exception:
+            return False
+
+    def _send_one(self, dx, dy, flags):
+        self._inp.mi = self._MOUSEINPUT(int(dx), int(dy), 0, flags, 0, None)
+        self._send(1, self._ct.byref(self._inp), self._ct.sizeof(self._inp))
+
+    def move_rel(self, dx, dy):
+        self._send_one(dx, dy, 0x0001)  # MOUSEEVENTF_MOVE
+
+    def move_batch(self, deltas):
+        n = len(deltas)
+        if n == 0:
+            return
+        arr = (self._INPUT * n)()
+        for k, (dx, dy) in enumerate(deltas):
+            arr[k].type = 0
+            arr[k].mi = self._MOUSEINPUT(int(dx), int(dy), 0, 0x0001, 0, None)
+        self._send(n, arr, self._ct.sizeof(self._INPUT))
+
+    def click(self, button="left"):
+        down, up = self._FLAGS[button]
+        self._send_one(0, 0, down)
+        self._send_one(0, 0, up)
+
+
+# --- Linux: XTest (X11) — relativo direto, sem o PAUSE/tween do PyAutoGUI ---
+@register_backend
+class XTestBackend(MouseBackend):
+    name = "XTest"
+    capabilities = frozenset({CAP_RELATIVE, CAP_ABSOLUTE, CAP_BATCH, CAP_CLICKS})
+    priority = 10
+
+    _BUTTONS = {"left": 1, "middle": 2, "right": 3}
+
+    def __init__(self):
+        # o Display não é thread-safe (sem XInitThreads): a thread de saída
+        # move e as hotkeys das setas clicam, então toda chamada passa pelo lock
+        self._lock = threading.Lock()
+        self._dpy = None
+
+    def available(self) -> bool:
+        if not IS_LINUX or os.environ.get("FACEPILOT_UINPUT") == "1":
+            return False
+        try:
+            import ctypes
+            import ctypes.util
+
+            x11 = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+            xtst = ctypes.CDLL(ctypes.util.find_library("Xtst") or "libXtst.so.6")
+            x11.XOpenDisplay.restype = ctypes.c_void_p
+            x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+            x11.XFlush.argtypes = [ctypes.c_void_p]
+            x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+            xtst.XTestFakeRelativeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+            xtst.XTestFakeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+            xtst.XTestFakeButtonEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+
+            dpy = x11.XOpenDisplay(None)  # conexão própria, serializada por self._lock
+            if not dpy:
+                return False
+            self._x11, self._xtst, self._dpy = x11, xtst, dpy
+            return True
+        except Exception:
+            return False
+
+    def move_rel(self, dx, dy):
+        with self._lock:
+            if self._dpy:
+                self._xtst.XTestFakeRelativeMotionEvent(self._dpy, int(dx), int(dy), 0)
+                self._x11.XFlush(self._dpy)
+
+    def move_batch(self, deltas):
+        with self._lock:
+            if self._dpy:
+                for dx, dy in deltas:
+                    self._xtst.XTestFakeRelativeMotionEvent(self._dpy, int(dx), int(dy), 0)
+                self._x11.XFlush(self._dpy)
+
+    def move_abs(self, x, y):
+        with self._lock:
+            if self._dpy:
+                self._xtst.XTestFakeMotionEvent(self._dpy, -1, int(x), int(y), 0)
+                self._x11.XFlush(self._dpy)
+
+    def click(self, button="left"):
+        b = self._BUTTONS[button]
+        with self._lock:
+            if self._dpy:
+                self._xtst.XTestFakeButtonEvent(self._dpy, b, 1, 0)
+                self._xtst.XTestFakeButtonEvent(self._dpy, b, 0, 0)
+                self._x11.XFlush(self._dpy)
+
+    def close(self):
+        with self._lock:
+            if getattr(self, "_dpy", None):
+                self._x11.XCloseDisplay(self._dpy)
+                self._dpy = None
+
+
+# --- Linux: uinput — mouse virtual no kernel (funciona também no Wayland) ---
+@register_backend
+class UinputBackend(MouseBackend):
+    """Precisa de escrita em /dev/uinput. ``FACEPILOT_UINPUT=1`` força este backend."""
+
+    name = "uinput"
+    capabilities = frozenset({CAP_RELATIVE, CAP_BATCH, CAP_CLICKS})
+    priority = 20
+
+    _UI_SET_EVBIT, _UI_SET_KEYBIT, _UI_SET_RELBIT = 0x40045564, 0x40045565, 0x40045566
+    _UI_DEV_CREATE, _UI_DEV_DESTROY = 0x5501, 0x5502
+    _EV_SYN, _EV_KEY, _EV_REL = 0x00, 0x01, 0x02
+    _REL_X, _REL_Y = 0x00, 0x01
+    _BUTTONS = {"left": 0x110, "right": 0x111, "middle": 0x112}
+
+    def available(self) -> bool:
+        if not IS_LINUX:
+            return False
+        try:
+            import fcntl
+            import struct
+
+            fd = os.open("/dev/uinput", os.O_WRONLY | os.O_NONBLOCK)
+            try:
+                fcntl.ioctl(fd, self._UI_SET_EVBIT, self._EV_KEY)
+                for code in self._BUTTONS.values():  # sem botões o compositor não trata como mouse
+                    fcntl.ioctl(fd, self._UI_SET_KEYBIT, code)
+                fcntl.ioctl(fd, self._UI_SET_EVBIT, self._EV_REL)
+                fcntl.ioctl(fd, self._UI_SET_RELBIT, self._REL_X)
+                fcntl.ioctl(fd, self._UI_SET_RELBIT, self._REL_Y)
+                # struct uinput_user_dev: nome[80], input_id, ff_effects_max, abs*[64] x4
+                os.write(fd, struct.pack("80sHHHHi256i", b"FacePilot virtual mouse",
+                                         0x03, 0x1209, 0xFACE, 1, 0, *([0] * 256)))
+                fcntl.ioctl(fd, self._UI_DEV_CREATE)
+            except Exception:
+                os.close(fd)
+                raise
+            self._fd, self._fcntl = fd, fcntl
+            self._event = struct.Struct("llHHi")  # struct input_event (timeval + tipo/código/valor)
+            return True
+        except Exception:
+            return False
+
+    def _rel(self, dx, dy) -> bytes:
+        ev = self._event
+        return ev.pack(0, 0, self._EV_REL, self._REL_X, int(dx)) + ev.pack(0, 0, self._EV_REL, self._REL_Y, int(dy))
+
+    def _syn(self) -> bytes:
+        return self._event.pack(0, 0, self._EV_SYN, 0, 0)
+
+    def move_rel(self, dx, dy):
+        os.write(self._fd, self._rel(dx, dy) + self._syn())
+
+    def move_batch(self, deltas):
+        os.write(self._fd, b"".join(self._rel(dx, dy) + self._syn() for dx, dy in deltas))
+
+    def click(self, button="left"):
+        code, ev = self._BUTTONS[button], self._event
+        os.write(self._fd, ev.pack(0, 0, self._EV_KEY, code, 1) + self._syn()
+                 + ev.pack(0, 0, self._EV_KEY, code, 0) + self._syn())
+
+    def close(self):
+        if getattr(self, "_fd", None) is not None:
+            try:
+                self._fcntl.ioctl(self._fd, self._UI_DEV_DESTROY)
+            except Exception:
+                pass
+            os.close(self._fd)
+            self._fd = None
+
+
+@register_backend
+class PyDirectInputBackend(MouseBackend):
+    name = "PyDirectInput"
+    capabilities = frozenset({CAP_RELATIVE, CAP_ABSOLUTE, CAP_CLICKS})
+    priority = 30
+
+    def available(self) -> bool:
+        try:
+            import pydirectinput as pdi
+            pdi.PAUSE = 0
+            pdi.FAILSAFE = True
+            self._pdi = pdi
+            return True
+        except Exception:
+            return False
+
+    def move_rel(self, dx, dy):
+        self._pdi.moveRel(int(dx), int(dy), duration=0)
+
+    def move_abs(self, x, y):
+        self._pdi.moveTo(int(x), int(y))
+
+    def click(self, button="left"):
+        self._pdi.click(button=button)
+
+
+@register_backend
+class PyAutoGUIBackend(MouseBackend):
+    name = "PyAutoGUI"
+    capabilities = frozenset({CAP_RELATIVE, CAP_ABSOLUTE, CAP_CLICKS})
+    priority = 90
+
+    def available(self) -> bool:
+        try:
+            import pyautogui
+            self._pag = pyautogui
+            return True
+        except Exception:
+            return False
+
+    # _pause=False: sem o sleep de pyautogui.PAUSE (100 ms) a cada chamada
+    def move_rel(self, dx, dy):
+        self._pag.moveRel(int(dx), int(dy), duration=0, _pause=False)
+
+    def move_abs(self, x, y):
+        self._pag.moveTo(int(x), int(y), duration=0, _pause=False)
+
+    def click(self, button="left"):
+        self._pag.click(button=button, _pause=False)
+
+
+@register_backend
+class NullBackend(MouseBackend):
+    """Descarta tudo (benchmarks). Conta as chamadas."""
+
+    name = "null"
+    capabilities = frozenset({CAP_RELATIVE, CAP_ABSOLUTE, CAP_BATCH, CAP_CLICKS})
+    priority = 1000
+    auto_select = False
+
+    def __init__(self):
+        self.calls = 0
+
+    def available(self) -> bool:
+        return True
+
+    def move_rel(self, dx, dy):
+        self.calls += 1
+
+    def move_abs(self, x, y):
+        self.calls += 1
+
+    def click(self, button="left"):
+        self.calls += 1
+
+
+@register_backend
+class RecordingBackend(NullBackend):
+    """Guarda os deltas (replay/testes): ``deltas`` = [(dx, dy), ...]; ``total`` acumulado."""
+
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.deltas: List[Tuple[float, float]] = []
+        self.clicks: List[str] = []
+        self.total_dx = self.total_dy = 0.0
+
+    def move_rel(self, dx, dy):
+        self.calls += 1
+        self.deltas.append((dx, dy))
+        self.total_dx += dx
+        self.total_dy += dy
+
+    def click(self, button="left"):
+        self.calls += 1
+        self.clicks.append(button)
+
+
+# ---------- seleção ----------
+def backend_by_name(name: str) -> Optional[MouseBackend]:
+    for cls in BACKENDS:
+        if cls.name.lower() == name.lower():
+            b = cls()
+            return b if b.available() else None
+    return None
+
+
+def probe_backends() -> List[MouseBackend]:
+    """Instâncias disponíveis nesta máquina (auto-selecionáveis), por prioridade."""
+    found = []
+    for cls in sorted(BACKENDS, key=lambda c: c.priority):
+        if not cls.auto_select or CAP_RELATIVE not in cls.capabilities:
+            continue
+        b = cls()
+        if b.available():
+            found.append(b)
+    return found
+
+
+def calibrate(backend: MouseBackend, n: int = 60) -> Dict[str, float]:
+    """
+    Latência por chamada e vazão, com movimentos ±1 px (o ponteiro volta ao
+    lugar). ``ok`` = nenhuma exceção.
+    """
+    perf = time.perf_counter
+    try:
+        backend.move_rel(1, 0); backend.move_rel(-1, 0)  # aquece
+        t0 = perf()
+        for i in range(n):
+            backend.move_rel(1 if i % 2 == 0 else -1, 0)
+        dt = perf() - t0
+        if n % 2:
+            backend.move_rel(-1, 0)
+    except Exception as e:
+        return {"ok": False, "us_per_call": float("inf"), "calls_per_s": 0.0, "error": str(e)}
+    us = dt / n * 1e6
+    return {"ok": True, "us_per_call": us, "calls_per_s": 1e6 / us if us > 0 else float("inf")}
+
+
+def select_backend(do_calibrate: bool = True, prefer: Optional[str] = None,
+                   verbose: bool = True) -> MouseBackend:
+    """
+    Escolhe o backend ativo. ``prefer`` força um nome (se disponível).
+    Sem calibração, fica com o primeiro disponível por prioridade.
+    """
+    if prefer:
+        b = backend_by_name(prefer)
+        if b is not None:
+            return b
+        if verbose:
+            print(f"[AVISO] Backend '{prefer}' indisponível; escolhendo automaticamente.")
+
+    found = probe_backends()
+    if not found:
+        return NullBackend()
+    if not do_calibrate or len(found) == 1:
+        for b in found[1:]:
+            b.close()
+        return found[0]
+
+    results = [(b, calibrate(b)) for b in found]
+    if verbose:
+        print("[Backend] calibração (movimento relativo):")
+        for b, r in results:
+            if r["ok"]:
+                print(f"   {b.name:<14}{r['us_per_call']:>10.1f} us/chamada {r['calls_per_s']:>12.0f} chamadas/s")
+            else:
+                print(f"   {b.name:<14}   falhou: {r.get('error', '')}")
+
+    working = [(b, r) for b, r in results if r["ok"]]
+    if not working:
+        chosen = found[-1]
+    else:
+        best = min(r["us_per_call"] for _, r in working)
+        # mais rápido, com empate decidido pela prioridade (lista já ordenada)
+        chosen = next(b for b, r in working if r["us_per_call"] <= best * (1 + TIE_TOLERANCE))
+    for b in found:
+        if b is not chosen:
+            b.close()
+    if verbose:
+        print(f"[Backend] selecionado: {chosen.name}")
+    return chosen
@@ -0,0 +1,307 @@
+"""
+Benchmark de latência por estágio do loop de rastreamento.
+
+Roda os estágios reais de ``main.py`` contra um vídeo local ou frames
+sintéticos, em algumas resoluções, e reporta p50/p95/p99 (ms) por estágio
+e o FPS ponta a ponta do loop serial. O mouse usa um backend nulo (nenhum
+movimento real) e a UI Tk só entra se houver display.
+
+Uso:
+    python bench.py                              # frames sintéticos
+    python bench.py --video clipe.mp4 --frames 300
+    python bench.py --save bench_baseline.json
+    python bench.py --compare bench_baseline.json   # sai com código 1 se regredir
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from backends import NullBackend
+from facemesh import FaceMeshLoader
+from mouse_output import VirtualCursor
+from pose import landmarks_to_points
+from tracking import FlowPoseTracker
+
+DEFAULT_RESOLUTIONS = ("640x480", "1280x720", "1920x1080")
+REGRESSION_TOL = 0.20      # +20% no p50 de um estágio = regressão
+REGRESSION_MIN_MS = 0.05   # ignora variações abaixo disso (ruído)
+
+
+# ---------- fontes de frames ----------
+class _Point:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+
+def synthetic_landmarks(i: int):
+    """Malha fake de 478 pontos com os 5 landmarks de pose plausíveis."""
+    lm = [_Point(0.5, 0.5) for _ in range(478)]
+    sway = 0.02 * np.sin(i / 15.0)
+    for idx, (x, y) in {33: (0.44, 0.42), 263: (0.56, 0.42), 1: (0.5 + sway, 0.52),
+                        2: (0.5 + sway, 0.55), 10: (0.5, 0.3)}.items():
+        lm[idx] = _Point(x, y)
+    return lm
+
+
+class SyntheticSource:
+    """Frames gerados (gradiente + ruído + "rosto"); ``read`` copia num buffer."""
+
+    def __init__(self, w: int, h: int, n_distinct: int = 8):
+        rng = np.random.default_rng(0)
+        self._frames = []
+        for k in range(n_distinct):
+            img = np.empty((h, w, 3), np.uint8)
+            img[:] = np.linspace(30, 200, w, dtype=np.uint8)[None, :, None]
+            img += rng.integers(0, 20, (h, w, 3), dtype=np.uint8)
+            cv2.ellipse(img, (w // 2 + 8 * k, h // 2), (w // 8, h // 5), 0, 0, 360, (150, 170, 210), -1)
+            self._frames.append(img)
+        self._i = 0
+
+    def read(self, buf=None):
+        src = self._frames[self._i % len(self._frames)]
+        self._i += 1
+        if buf is None or buf.shape != src.shape:
+            return True, src.copy()
+        np.copyto(buf, src)
+        return True, buf
+
+    def release(self):
+        pass
+
+
+class VideoSource:
+    """Vídeo local redimensionado para a resolução do teste (resize fora da medição)."""
+
+    def __init__(self, path: str, w: int, h: int):
+        self._cap = cv2.VideoCapture(path)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"não foi possível abrir {path}")
+        self._w, self._h = w, h
+
+    def read(self, buf=None):
+        ok, frame = self._cap.read()
+        if not ok:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._cap.read()
+            if not ok:
+                return False, None
+        if frame.shape[1] != self._w or frame.shape[0] != self._h:
+            frame = cv2.resize(frame, (self._w, self._h))
+        return True, frame
+
+    def release(self):
+        self._cap.release()
+
+
+# ---------- estatística ----------
+def summarize(samples: List[float]) -> Dict[str, float]:
+    a = np.asarray(samples, np.float64) * 1000.0
+    if a.size == 0:
+        return {}
+    p50, p95, p99 = np.percentile(a, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "mean": float(a.mean()), "n": int(a.size)}
+
+
+class _Timings:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def add(self, name: str, dt: float):
+        self.samples.setdefault(name, []).append(dt)
+
+
+# ---------- execução ----------
+def _make_ui(core):
+    try:
+        from interface import UIThread
+        return UIThread(
+            presets=core.PRESETS,
+            current_preset_provider=lambda: core.current_preset,
+            apply_preset=lambda idx: core.apply_preset(idx, silent=True),
+            get_state=core.get_ui_state,
+            set_state=core.set_ui_state,
+        ).start()
+    except Exception as e:
+        print(f"[Bench] UI Tk indisponível ({e}); estágios de UI ignorados.")
+        return None
+
+
+def run_resolution(core, face_mesh, ui, w: int, h: int, frames: int, warmup: int,
+                   video: Optional[str]) -> dict:
+    src = VideoSource(video, w, h) if video else SyntheticSource(w, h)
+    t = _Timings()
+    perf = time.perf_counter
+    flow = FlowPoseTracker()
+    buf = None
+    faces = 0
+
+    loop_start = None
+    for i in range(warmup + frames):
+        if i == warmup:
+            t = _Timings()
+            loop_start = perf()
+
+        t0 = perf()
+        ok, frame = src.read(buf)
+        t1 = perf(); t.add("capture", t1 - t0)
+        if not ok:
+            break
+        buf = frame
+
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t2 = perf(); t.add("cvtColor", t2 - t1)
+
+        lm = None
+        if face_mesh is not None:
+            res = face_mesh.process(rgb)
+            t3 = perf(); t.add("FaceMesh.process", t3 - t2)
+            if res.multi_face_landmarks:
+                lm = res.multi_face_landmarks[0].landmark
+                faces += 1
+        if lm is None:
+            lm = synthetic_landmarks(i)
+
+        t3 = perf()
+        yaw, pitch, _ = core.get_yaw_pitch_roll(lm, w, h)
+        t4 = perf(); t.add("get_yaw_pitch_roll", t4 - t3)
+
+        # fluxo óptico dos 5 pontos (o que substitui o FaceMesh entre keyframes)
+        if flow.need_keyframe():
+            flow.keyframe(frame, landmarks_to_points(lm, w, h))
+            t5 = perf(); t.add("flow.keyframe", t5 - t4)
+        else:
+            flow.track(frame)
+            t5 = perf(); t.add("flow.track", t5 - t4)
+
+        core.move_mouse_from_angles(yaw * 0.5, pitch * 0.1)
+        t6 = perf(); t.add("move_mouse_from_angles", t6 - t5)
+
+        view = cv2.flip(frame, 1)
+        t7 = perf(); t.add("flip", t7 - t6)
+        core.draw_hud(view, True, yaw, pitch, 0.0)
+        t8 = perf(); t.add("draw_hud", t8 - t7)
+
+        if ui is not None:
+            ui.poll()
+            t.add("ui.poll", perf() - t8)
+
+    elapsed = perf() - loop_start if loop_start is not None else 0.0
+    src.release()
+    n = len(t.samples.get("capture", []))
+    return {
+        "stages": {name: summarize(s) for name, s in t.samples.items()},
+        "fps": n / elapsed if elapsed > 0 else 0.0,
+        "frames": n,
+        "faces": faces,
+    }
+
+
+def run(resolutions, frames: int, warmup: int, video: Optional[str], with_mesh: bool, with_ui: bool) -> dict:
+    import main as core
+
+    # backend nulo: nada de mouse real (nem consulta de posição)
+    core.mouse_backend.close()
+    core.mouse_backend = NullBackend()
+    core.cursor = VirtualCursor(core.cursor.bounds)
+    core.apply_preset(core.current_preset, silent=True)
+
+    ui = _make_ui(core) if with_ui else None
+    mesh_ctx = None
+    if with_mesh:
+        loader = FaceMeshLoader()
+        mesh_ctx = loader.get()
+        print(loader.report())
+
+    results = {}
+    try:
+        for res in resolutions:
+            w, h = (int(v) for v in res.lower().split("x"))
+            results[res] = run_resolution(core, mesh_ctx, ui, w, h, frames, warmup, video)
+    finally:
+        if mesh_ctx is not None:
+            mesh_ctx.close()
+        if ui is not None:
+            ui.close()
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opencv": cv2.__version__,
+            "source": video or "synthetic",
+            "frames": frames,
+            "facemesh": with_mesh,
+            "ui": ui is not None,
+        },
+        "results": results,
+    }
+
+
+def print_report(report: dict):
+    for res, r in report["results"].items():
+        print(f"\n== {res} | {r['frames']} frames | {r['fps']:.1f} FPS ponta a ponta (serial)"
+              + (f" | rosto em {r['faces']} frames" if report["meta"]["facemesh"] else ""))
+        print(f"   {'estágio':<26}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+        for name, s in r["stages"].items():
+            print(f"   {name:<26}{s['p50']:>9.3f}{s['p95']:>9.3f}{s['p99']:>9.3f}")
+
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    """Lista de regressões (p50 de estágio acima da tolerância)."""
+    regressions = []
+    for res, r in report["results"].items():
+        base = baseline.get("results", {}).get(res)
+        if not base:
+            continue
+        for name, s in r["stages"].items():
+            b = base["stages"].get(name)
+            if not b:
+                continue
+            if s["p50"] > b["p50"] * (1 + REGRESSION_TOL) and s["p50"] - b["p50"] > REGRESSION_MIN_MS:
+                regressions.append(f"{res} {name}: p50 {b['p50']:.3f} → {s['p50']:.3f} ms")
+    return regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark por estágio do FacePilot")
+    ap.add_argument("--video", help="vídeo local como fonte (padrão: frames sintéticos)")
+    ap.add_argument("--res", nargs="+", default=list(DEFAULT_RESOLUTIONS), help="resoluções LxA")
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--warmup", type=int, default=20)
+    ap.add_argument("--no-mesh", action="store_true", help="pula FaceMesh.process")
+    ap.add_argument("--no-ui", action="store_true", help="pula os estágios de UI Tk")
+    ap.add_argument("--save", metavar="JSON", help="salva o resultado como baseline")
+    ap.add_argument("--compare", metavar="JSON", help="compara com um baseline salvo")
+    args = ap.parse_args(argv)
+
+    report = run(args.res, args.frames, args.warmup, args.video, not args.no_mesh, not args.no_ui)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[Bench] baseline salvo em {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline)
+        if regressions:
+            print("\n[Bench] REGRESSÕES:")
+            for line in regressions:
+                print("   " + line)
+            return 1
+        print("\n[Bench] sem regressões em relação ao baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
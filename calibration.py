@@ -0,0 +1,256 @@
+"""
+Calibração do neutro como máquina de estados incremental.
+
+O estágio de pose chama ``NeutralCalibrator.add`` a cada frame; nada bloqueia
+(rastreamento, HUD e UI seguem rodando). Estados:
+
+- ``IDLE``: sem calibração em andamento;
+- ``COLLECTING``: amostras (yaw, pitch, roll) entram numa janela circular
+  pré-alocada; o neutro é a média aparada em torno da mediana da janela
+  (amostras a mais de ``reject_k`` desvios robustos — MAD — são descartadas);
+- ``DONE``: convergiu (erro padrão da média < ``tol_deg`` em yaw e pitch —
+  roll não move o cursor —, com ``min_samples`` e ``min_time``) ou chegou a
+  ``max_time``.
+
+A janela só guarda os últimos ``window`` frames: se a cabeça ainda está
+chegando ao centro no início, essas amostras saem da janela e a estimativa
+converge assim que a pose fica estável. ``min_samples`` outliers seguidos
+indicam que a pose mudou: a janela recomeça a partir deles.
+
+``DriftCorrector`` faz a correção contínua entre calibrações: com a cabeça
+parada por ``hold`` segundos perto do neutro (dentro de ``bound``, em geral
+a zona morta — o cursor está parado, então é a pose de descanso), o neutro
+anda devagar (no máx. ``max_rate`` graus/s) até a média dessa pose.
+Poses seguradas fora da zona morta (girar a câmera) nunca são corrigidas.
+
+O neutro fica salvo por câmera/resolução (``save_neutral``/``load_neutral``)
+para a próxima partida começar calibrada.
+"""
+import math
+import time
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+import userdata
+
+IDLE, COLLECTING, DONE = "idle", "collecting", "done"
+
+MAD_TO_SIGMA = 1.4826  # MAD → desvio padrão (distribuição normal)
+
+CALIBRATION_FILE = "calibration.json"
+
+
+def camera_key(index: Union[int, str], w: int, h: int, api: str = "") -> str:
+    """Chave do neutro salvo: fonte (índice/dispositivo) e API da câmera + resolução."""
+    return f"cam{index}:{api or '?'}:{w}x{h}"
+
+
+def load_neutral(key: str) -> Optional[Tuple[float, float, float]]:
+    """Neutro salvo para ``key``; None se ausente ou inválido (exige 3 valores finitos)."""
+    entry = userdata.load(CALIBRATION_FILE).get(key)
+    try:
+        neutral = tuple(float(v) for v in entry["neutral"])
+    except (TypeError, KeyError, ValueError):
+        return None
+    if len(neutral) != 3 or not all(math.isfinite(v) for v in neutral):
+        return None
+    return neutral
+
+
+def save_neutral(key: str, neutral) -> bool:
+    data = userdata.load(CALIBRATION_FILE)
+    data[key] = {"neutral": [round(float(v), 3) for v in neutral], "saved": int(time.time())}
+    return userdata.save(CALIBRATION_FILE, data)
+
+
+class NeutralCalibrator:
+    """
+    - ``min_time``/``max_time``: duração mínima e máxima (s).
+    - ``min_samples``: amostras aceitas antes de testar a convergência.
+    - ``tol_deg``: erro padrão (graus) abaixo do qual a estimativa convergiu.
+    - ``window``: amostras consideradas (as mais recentes).
+    - ``reject_k``: desvios robustos além dos quais uma amostra é outlier.
+    - ``sigma_floor``: piso (graus) do desvio robusto (pose quase sem ruído).
+    """
+
+    def __init__(self, min_time: float = 0.3, max_time: float = 1.5, min_samples: int = 8,
+                 tol_deg: float = 0.2, window: int = 45, reject_k: float = 3.0,
+                 sigma_floor: float = 0.2):
+        self.min_time = min_time
+        self.max_time = max_time
+        self.min_samples = min_samples
+        self.tol_deg = tol_deg
+        self.reject_k = reject_k
+        self.sigma_floor = sigma_floor
+
+        self._buf = np.zeros((window, 3), np.float64)
+        self._dev = np.empty((window, 3), np.float64)
+        self._n = 0   # amostras válidas na janela
+        self._i = 0   # próxima posição de escrita
+        self._streak = 0  # outliers seguidos
+        self.state = IDLE
+        self.started = 0.0
+        self.finished = 0.0
+        self.accepted = 0
+        self.rejected = 0
+        self.estimate: Optional[Tuple[float, float, float]] = None
+        self.sem = (math.inf, math.inf, math.inf)
+        self.converged = False  # terminou por convergência (não por max_time)
+
+    @property
+    def active(self) -> bool:
+        return self.state == COLLECTING
+
+    def start(self, now: float):
+        self._n = self._i = self._streak = 0
+        self.state = COLLECTING
+        self.started = now
+        self.finished = 0.0
+        self.accepted = self.rejected = 0
+        self.estimate = None
+        self.sem = (math.inf, math.inf, math.inf)
+        self.converged = False
+
+    def cancel(self):
+        self.state = IDLE
+
+    def progress(self, now: float) -> float:
+        """0–1 para o HUD (tempo até ``max_time``)."""
+        if self.state != COLLECTING:
+            return 1.0 if self.state == DONE else 0.0
+        return min(1.0, (now - self.started) / self.max_time)
+
+    def _robust(self):
+        """Mediana e desvio robusto por eixo da janela atual."""
+        win = self._buf[:self._n]
+        med = np.median(win, axis=0)
+        np.subtract(win, med, out=self._dev[:self._n])
+        np.abs(self._dev[:self._n], out=self._dev[:self._n])
+        sigma = np.maximum(MAD_TO_SIGMA * np.median(self._dev[:self._n], axis=0), self.sigma_floor)
+        return med, sigma
+
+    def add(self, angles, now: float) -> bool:
+        """
+        Amostra do frame (``angles`` = (yaw, pitch, roll) ou None sem rosto).
+        Devolve True no frame em que a calibração termina (``estimate`` pronto).
+        """
+        if self.state != COLLECTING:
+            return False
+
+        if angles is not None:
+            x = np.asarray(angles, np.float64)
+            if self._n >= self.min_samples:
+                med, sigma = self._robust()
+                if np.any(np.abs(x - med) > self.reject_k * sigma):
+                    self.rejected += 1
+                    self._streak += 1
+                    if self._streak < self.min_samples:
+                        x = None
+                    else:  # pose nova e estável: descarta a janela antiga
+                        self._n = self._i = self._streak = 0
+                else:
+                    self._streak = 0
+            if x is not None:
+                self._buf[self._i] = x
+                self._i = (self._i + 1) % len(self._buf)
+                self._n = min(self._n + 1, len(self._buf))
+                self.accepted += 1
+
+        if self._n >= self.min_samples:
+            med, sigma = self._robust()
+            win = self._buf[:self._n]
+            keep = np.all(np.abs(win - med) <= self.reject_k * sigma, axis=1)  # média aparada
+            est = win[keep].mean(axis=0) if keep.any() else med
+            self.estimate = tuple(float(v) for v in est)
+            self.sem = tuple(float(v) for v in sigma / math.sqrt(max(1, int(keep.sum()))))
+            converged = now - self.started >= self.min_time and max(self.sem[:2]) < self.tol_deg
+        else:
+            converged = False
+
+        if converged or now - self.started >= self.max_time:
+            if self.estimate is None and self._n:
+                self.estimate = tuple(float(v) for v in np.median(self._buf[:self._n], axis=0))
+            self.state = DONE
+            self.converged = converged
+            self.finished = now
+            return True
+        return False
+
+    def report(self) -> str:
+        took = self.finished - self.started
+        return f"{self.accepted} amostras, {self.rejected} descartadas, {took:.2f}s"
+
+
+class DriftCorrector:
+    """
+    Estimador de deriva do neutro em O(1) por frame, por eixo yaw/pitch.
+
+    "Parado" = todas as amostras a menos de ``still_deg`` da primeira do
+    trecho (âncora); a média do trecho estima a pose de descanso.
+
+    - ``tau``: constante de tempo (s) da média e da aproximação do neutro.
+    - ``still_deg``: afastamento (graus) da âncora que encerra o trecho parado.
+    - ``hold``: segundos parado antes de corrigir.
+    - ``max_rate``: velocidade máxima da correção (graus/s).
+    - ``max_total``: correção acumulada máxima desde a última calibração.
+    """
+
+    def __init__(self, tau: float = 1.0, still_deg: float = 1.0, hold: float = 1.5,
+                 max_rate: float = 0.3, max_total: float = 10.0):
+        self.tau = tau
+        self.still_deg = still_deg
+        self.hold = hold
+        self.max_rate = max_rate
+        self.max_total = max_total
+        self.reset()
+
+    def reset(self):
+        self._anchor = None         # [yaw, pitch] no início do trecho parado
+        self._mean = [0.0, 0.0]
+        self._n = 0
+        self._still = 0.0           # segundos parado
+        self.total = [0.0, 0.0]     # correção acumulada (yaw, pitch)
+        self.applied = 0            # frames com correção
+
+    def update(self, yaw: float, pitch: float, dt: float, bound: float) -> Tuple[float, float]:
+        """
+        ``yaw``/``pitch``: ângulos já sem o neutro (graus), sem filtro.
+        ``bound``: afastamento máximo (graus) corrigível, em geral a zona morta.
+        Devolve o incremento a somar em ``neutral_yaw``/``neutral_pitch``.
+        """
+        x = (yaw, pitch)
+        anchor = self._anchor
+        if anchor is None or abs(yaw - anchor[0]) > self.still_deg or abs(pitch - anchor[1]) > self.still_deg:
+            self._anchor = [yaw, pitch]
+            self._mean = [yaw, pitch]
+            self._n = 1
+            self._still = 0.0
+            return 0.0, 0.0
+
+        self._still += dt
+        self._n += 1
+        a = 1.0 - math.exp(-dt / self.tau)
+        w = max(a, 1.0 / self._n)   # média simples no começo, EMA depois
+        for i in (0, 1):
+            self._mean[i] += w * (x[i] - self._mean[i])
+        if self._still < self.hold:
+            return 0.0, 0.0
+        if abs(self._mean[0]) > bound or abs(self._mean[1]) > bound:
+            return 0.0, 0.0  # segurando a cabeça virada de propósito
+
+        step = self.max_rate * dt
+        out = [0.0, 0.0]
+        for i in (0, 1):
+            c = max(-step, min(step, self._mean[i] * a))
+            c = max(-self.max_total - self.total[i], min(self.max_total - self.total[i], c))
+            self._mean[i] -= c     # as próximas amostras já chegam com o neutro novo
+            self._anchor[i] -= c
+            self.total[i] += c
+            out[i] = c
+        if out[0] or out[1]:
+            self.applied += 1
+        return out[0], out[1]
+
+    def report(self) -> str:
+        return f"correção de deriva yaw/pitch {self.total[0]:+.2f}/{self.total[1]:+.2f}° ({self.applied} frames)"
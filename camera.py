@@ -0,0 +1,310 @@
+"""
+Negociação do modo de captura da webcam (FOURCC, resolução, FPS, buffer).
+
+``cv2.VideoCapture(0)`` com os padrões costuma cair em YUYV sem compressão a
+poucos fps, com vários frames velhos no buffer do driver. ``open_camera``:
+
+1. lista os modos suportados — no Linux/V4L2 pelos ioctls
+   ``VIDIOC_ENUM_FMT``/``ENUM_FRAMESIZES``/``ENUM_FRAMEINTERVALS``; nos
+   demais backends, tentando uma lista curta de modos e lendo de volta o que
+   o driver aceitou;
+2. escolhe o de menor latência que atende ``target`` (a resolução mínima
+   para a inferência): maior FPS, depois a menor área, depois sem compressão
+   (YUYV não precisa de decodificação JPEG);
+3. aplica o modo com ``CAP_PROP_BUFFERSIZE`` = 1 e confere o FPS entregue;
+4. lembra o modo por dispositivo (``~/.facepilot/camera.json``): na próxima
+   partida ele é aplicado direto, sem sondar (se falhar, sonda de novo).
+
+Fonte pode ser o índice da câmera, um dispositivo (``/dev/video2``, inclusive
+v4l2loopback) ou um arquivo de vídeo — arquivos não negociam nada e entram
+no modo nativo, o que permite testar o pipeline sem webcam.
+
+A negociação em si (``negotiate``) recebe o objeto de captura já aberto e a
+função que lista os modos, e ``enum_v4l2_modes`` recebe a função de ioctl:
+os dois rodam nos testes com objetos falsos, sem câmera nem driver.
+"""
+import os
+import platform
+import struct
+import time
+from itertools import count
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+import cv2
+
+import userdata
+
+CAMERA_FILE = "camera.json"
+DEFAULT_TARGET = (640, 480)
+
+Source = Union[int, str]
+
+
+class CaptureMode(NamedTuple):
+    fourcc: str
+    width: int
+    height: int
+    fps: float
+
+    def __str__(self):
+        return f"{self.fourcc or '?'} {self.width}x{self.height}@{self.fps:g}"
+
+
+# tentativas quando o backend não lista modos (MSMF/DSHOW/AVFoundation)
+TRIAL_MODES = [CaptureMode(f, w, h, fps)
+               for f in ("MJPG", "YUY2")
+               for (w, h) in ((640, 480), (1280, 720))
+               for fps in (60, 30)]
+
+_UNCOMPRESSED = ("YUYV", "YUY2", "NV12", "GREY")
+
+
+def parse_mode(text: str) -> CaptureMode:
+    """``LxA[@FPS][:FOURCC]`` → CaptureMode (ex.: ``640x480@60:MJPG``)."""
+    text, _, fourcc = text.partition(":")
+    size, _, fps = text.partition("@")
+    w, h = (int(v) for v in size.lower().split("x"))
+    return CaptureMode(fourcc.upper(), w, h, float(fps or 30))
+
+
+def fourcc_str(value: float) -> str:
+    v = int(value)
+    s = "".join(chr((v >> (8 * i)) & 0xFF) for i in range(4))
+    return s.strip("\x00 ") if s.isprintable() else ""
+
+
+def is_file_source(source: Source) -> bool:
+    return isinstance(source, str) and os.path.isfile(source)
+
+
+def _device_path(source: Source) -> Optional[str]:
+    if isinstance(source, int):
+        return f"/dev/video{source}"
+    return source if source.startswith("/dev/") else None
+
+
+def device_key(source: Source, api: str = "") -> str:
+    """Identifica o dispositivo entre execuções (V4L2: inclui o nome do driver)."""
+    path = _device_path(source)
+    name = ""
+    if path is not None and platform.system() == "Linux":
+        try:
+            with open(f"/sys/class/video4linux/{os.path.basename(path)}/name") as f:
+                name = f.read().strip()
+        except OSError:
+            pass
+    return f"{api or '?'}:{source}:{name}" if name else f"{api or '?'}:{source}"
+
+
+# ---------- V4L2 ----------
+_BUF_TYPE_VIDEO_CAPTURE = 1
+_VIDIOC_ENUM_FMT = 0xC0405602             # _IOWR('V', 2, struct v4l2_fmtdesc)      (64 bytes)
+_VIDIOC_ENUM_FRAMESIZES = 0xC02C564A      # _IOWR('V', 74, struct v4l2_frmsizeenum) (44 bytes)
+_VIDIOC_ENUM_FRAMEINTERVALS = 0xC034564B  # _IOWR('V', 75, struct v4l2_frmivalenum) (52 bytes)
+_DISCRETE = 1
+_COMMON_SIZES = ((320, 240), (640, 480), (800, 600), (960, 540), (1280, 720), (1920, 1080))
+
+
+def v4l2_modes(source: Source) -> List[CaptureMode]:
+    """Modos anunciados pelo driver V4L2 ([] se não for V4L2 ou sem acesso)."""
+    path = _device_path(source)
+    if path is None or platform.system() != "Linux":
+        return []
+    try:
+        import fcntl
+        fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+    except (ImportError, OSError):
+        return []
+
+    def ioctl(req, buf):
+        try:
+            fcntl.ioctl(fd, req, buf)
+            return True
+        except OSError:
+            return False
+
+    try:
+        return enum_v4l2_modes(ioctl)
+    finally:
+        os.close(fd)
+
+
+def enum_v4l2_modes(ioctl: Callable[[int, bytearray], bool]) -> List[CaptureMode]:
+    """
+    Percorre ENUM_FMT → ENUM_FRAMESIZES → ENUM_FRAMEINTERVALS.
+    ``ioctl(req, buf)`` preenche ``buf`` no lugar; False = fim da lista (EINVAL).
+    """
+    modes = []
+    for fi in count():
+        fmt = bytearray(struct.pack("<III32sII12x", fi, _BUF_TYPE_VIDEO_CAPTURE, 0, b"", 0, 0))
+        if not ioctl(_VIDIOC_ENUM_FMT, fmt):
+            break
+        pixfmt = struct.unpack_from("<I", fmt, 44)[0]
+        fourcc = fourcc_str(pixfmt)
+        for si in count():
+            fs = bytearray(struct.pack("<III32x", si, pixfmt, 0))
+            if not ioctl(_VIDIOC_ENUM_FRAMESIZES, fs):
+                break
+            if struct.unpack_from("<I", fs, 8)[0] == _DISCRETE:
+                sizes = [struct.unpack_from("<II", fs, 12)]
+            else:  # stepwise/contínuo: tamanhos comuns dentro da faixa
+                min_w, max_w, _, min_h, max_h, _ = struct.unpack_from("<6I", fs, 12)
+                sizes = [(w, h) for w, h in _COMMON_SIZES if min_w <= w <= max_w and min_h <= h <= max_h]
+            for w, h in sizes:
+                for ii in count():
+                    fi_ = bytearray(struct.pack("<IIIII32x", ii, pixfmt, w, h, 0))
+                    if not ioctl(_VIDIOC_ENUM_FRAMEINTERVALS, fi_):
+                        break
+                    num, den = struct.unpack_from("<II", fi_, 20)  # discreto ou intervalo mínimo
+                    if num:
+                        modes.append(CaptureMode(fourcc, w, h, round(den / num, 2)))
+                    if struct.unpack_from("<I", fi_, 16)[0] != _DISCRETE:
+                        break
+            if struct.unpack_from("<I", fs, 8)[0] != _DISCRETE:
+                break
+    return modes
+
+
+# ---------- qualquer backend ----------
+def current_mode(cap) -> CaptureMode:
+    return CaptureMode(fourcc_str(cap.get(cv2.CAP_PROP_FOURCC)),
+                       int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                       round(float(cap.get(cv2.CAP_PROP_FPS) or 0.0), 2))
+
+
+def apply_mode(cap, mode: CaptureMode, buffersize: int = 1) -> CaptureMode:
+    """Pede o modo ao driver (FOURCC antes do tamanho) e devolve o que ele aceitou."""
+    if mode.fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode.fourcc.ljust(4)[:4]))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode.width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode.height)
+    if mode.fps:
+        cap.set(cv2.CAP_PROP_FPS, mode.fps)
+    if buffersize:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffersize)
+    return current_mode(cap)
+
+
+def trial_modes(cap, candidates=TRIAL_MODES) -> List[CaptureMode]:
+    """Sonda por tentativa: cada candidato aceito (tamanho igual) entra com o que o driver leu de volta."""
+    found = []
+    for mode in candidates:
+        actual = apply_mode(cap, mode, buffersize=0)
+        if (actual.width, actual.height) == (mode.width, mode.height) and actual not in found:
+            found.append(actual)
+    return found
+
+
+def rank_modes(modes: List[CaptureMode], target: Tuple[int, int] = DEFAULT_TARGET) -> List[CaptureMode]:
+    """Ordena do melhor para o pior: atende ``target``; maior FPS; menor área; sem compressão."""
+    tw, th = target
+
+    def key(m: CaptureMode):
+        fits = m.width >= tw and m.height >= th
+        return (not fits, -round(m.fps), m.width * m.height if fits else -m.width * m.height,
+                0 if m.fourcc in _UNCOMPRESSED else 1)
+
+    return sorted(set(modes), key=key)
+
+
+def measure_fps(cap, frames: int = 12, warmup: int = 2) -> float:
+    """FPS entregue de fato (o driver pode aceitar 60 e entregar 30 com pouca luz)."""
+    for _ in range(warmup):
+        cap.read()
+    t0 = time.perf_counter()
+    n = 0
+    for _ in range(frames):
+        ok, _ = cap.read()
+        if ok:
+            n += 1
+    dt = time.perf_counter() - t0
+    return n / dt if dt > 0 and n else 0.0
+
+
+def load_saved_mode(key: str) -> Optional[CaptureMode]:
+    entry = userdata.load(CAMERA_FILE).get(key)
+    try:
+        return CaptureMode(str(entry["fourcc"]), int(entry["width"]), int(entry["height"]), float(entry["fps"]))
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+def save_mode(key: str, mode: CaptureMode, measured_fps: float):
+    data = userdata.load(CAMERA_FILE)
+    data[key] = {**mode._asdict(), "measured_fps": round(measured_fps, 1), "saved": int(time.time())}
+    userdata.save(CAMERA_FILE, data)
+
+
+def negotiate(cap, key: str, target: Tuple[int, int] = DEFAULT_TARGET,
+              force: Optional[CaptureMode] = None, reprobe: bool = False,
+              buffersize: int = 1, tries: int = 3, remember: bool = True,
+              list_modes: Optional[Callable[[], List[CaptureMode]]] = None) -> dict:
+    """
+    Aplica em ``cap`` (já aberto) o modo forçado, o salvo para ``key`` ou o
+    melhor sondado. ``list_modes()`` lista os modos do driver (V4L2); vazio
+    ou None → ``trial_modes(cap)``. Um modo salvo recusado pelo driver
+    (câmera/driver mudou) leva a uma nova sondagem.
+
+    Devolve dict com ``key``, ``mode`` (o que o driver aceitou),
+    ``measured_fps``, ``origin`` ("forçado", "salvo", "sondado" ou "padrão")
+    e ``buffersize``.
+    """
+    info = {"key": key, "mode": current_mode(cap), "measured_fps": 0.0, "origin": "padrão", "buffersize": 0}
+    saved = None if (reprobe or force is not None) else load_saved_mode(key)
+    if force is not None:
+        candidates, origin = [force], "forçado"
+    elif saved is not None:
+        candidates, origin = [saved], "salvo"
+    else:
+        modes = list_modes() if list_modes is not None else []
+        if not modes:
+            modes = trial_modes(cap)
+        candidates, origin = rank_modes(modes, target)[:tries], "sondado"
+
+    for mode in candidates:
+        actual = apply_mode(cap, mode, buffersize)
+        if (actual.width, actual.height) != (mode.width, mode.height):
+            continue
+        if mode.fourcc and actual.fourcc and actual.fourcc != mode.fourcc[:4]:
+            continue
+        info.update(mode=actual, origin=origin, measured_fps=measure_fps(cap),
+                    buffersize=int(cap.get(cv2.CAP_PROP_BUFFERSIZE) or 0))
+        if remember and origin == "sondado":
+            save_mode(key, actual, info["measured_fps"])
+        return info
+
+    if origin == "salvo":  # câmera/driver mudou: sonda de novo
+        return negotiate(cap, key, target, None, True, buffersize, tries, remember, list_modes)
+    info["mode"] = current_mode(cap)
+    print(f"[AVISO] Nenhum modo de captura aceito ({', '.join(map(str, candidates)) or 'nenhum listado'}); "
+          f"usando o do driver: {info['mode']}.")
+    return info
+
+
+def open_camera(source: Source = 0, target: Tuple[int, int] = DEFAULT_TARGET,
+                force: Optional[CaptureMode] = None, reprobe: bool = False,
+                buffersize: int = 1, tries: int = 3, remember: bool = True):
+    """
+    Abre ``source`` no modo de menor latência que atende ``target`` (ver ``negotiate``).
+
+    - ``force``: modo pedido explicitamente (não sonda nem salva).
+    - ``reprobe``: ignora o modo salvo para este dispositivo.
+
+    Devolve (cap, info); ``info`` = None se não abriu. Arquivos de vídeo
+    entram no modo nativo com ``origin`` = "arquivo".
+    """
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        return cap, None
+    api = cap.getBackendName()
+    key = device_key(source, api)
+    if is_file_source(source):
+        return cap, {"key": key, "mode": current_mode(cap), "measured_fps": 0.0, "origin": "arquivo", "buffersize": 0}
+    list_modes = (lambda: v4l2_modes(source)) if api == "V4L2" else None
+    return cap, negotiate(cap, key, target, force, reprobe, buffersize, tries, remember, list_modes)
+
+
+def describe(info) -> str:
+    fps = f" | entrega {info['measured_fps']:.1f} fps" if info["measured_fps"] else ""
+    buf = f" | buffer {info['buffersize']}" if info["buffersize"] else ""
+    return f"[Camera] {info['key']}: {info['mode']} ({info['origin']}){fps}{buf}"
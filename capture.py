@@ -0,0 +1,191 @@
+"""
+Captura da webcam em thread dedicada.
+
+O ``FrameGrabber`` lê o driver continuamente e publica sempre o frame mais
+recente num slot único ("último frame"), com timestamp monotônico de captura
+e número de sequência. Quem consome nunca espera pelo I/O da câmera além do
+necessário para o próximo frame, e frames antigos são descartados (e contados)
+em vez de se acumularem no buffer do driver. O slot é um ``DropSlot`` e serve
+de entrada para o primeiro estágio do pipeline.
+
+Os buffers de imagem são reaproveitados: cada ``CapturedFrame`` devolve seu
+buffer ao pool com ``release()`` e o próximo ``cap.read()`` escreve nele.
+``FrameBuffers`` faz o mesmo para as saídas de cvtColor/flip/resize (``dst=``),
+de modo que o loop em regime aloca praticamente nada por frame.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from pipeline import DropSlot
+
+
+class CapturedFrame:
+    """Frame capturado + metadados. Chame ``release()`` ao terminar de usar."""
+
+    __slots__ = ("frame", "ts", "seq", "_owner")
+
+    def __init__(self, frame, ts: float, seq: int, owner: "FrameGrabber"):
+        self.frame = frame
+        self.ts = ts        # time.monotonic() logo após o read()
+        self.seq = seq      # 1, 2, 3... (lacunas = frames descartados)
+        self._owner = owner
+
+    def release(self):
+        """Devolve o buffer ao pool do grabber (idempotente)."""
+        owner, self._owner = self._owner, None
+        if owner is not None and self.frame is not None:
+            owner._recycle(self.frame)
+
+
+class FrameGrabber:
+    """
+    Thread leitora de ``cv2.VideoCapture`` com slot "último frame".
+
+    - ``read()`` devolve o frame mais novo ainda não consumido (ou None no timeout).
+    - Se um frame novo chega antes do anterior ser consumido, o anterior é
+      descartado (buffer devolvido ao pool) e ``dropped`` é incrementado.
+    """
+
+    def __init__(self, cap: Any, name: str = "capture", max_free: int = 4, metrics=None):
+        self._cap = cap
+        self._metrics = metrics
+        self._name = name
+        self._max_free = max_free
+
+        self._lock = threading.Lock()
+        self._free: List[Any] = []
+        self.slot = DropSlot(name)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        # estatísticas (lidas sem lock; só a thread leitora escreve)
+        self.seq = 0
+        self.captured = 0
+        self.failures = 0
+        self.allocated_bytes = 0  # frames que o driver entregou fora do pool
+
+    # ---------- ciclo de vida ----------
+    def start(self) -> "FrameGrabber":
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 1.0):
+        """Para a thread (antes de ``cap.release()``, nunca depois)."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.slot.close()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def dropped(self) -> int:
+        return self.slot.dropped
+
+    # ---------- consumo ----------
+    def read(self, timeout: Optional[float] = 1.0) -> Optional[CapturedFrame]:
+        """Retira o frame mais recente do slot; espera até ``timeout`` se vazio."""
+        return self.slot.get(timeout)
+
+    # ---------- pool de buffers ----------
+    def _acquire(self):
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def _recycle(self, buf):
+        with self._lock:
+            if len(self._free) < self._max_free:
+                self._free.append(buf)
+
+    # ---------- thread leitora ----------
+    def _run(self):
+        while self._running:
+            buf = self._acquire()
+            t0 = time.monotonic()
+            try:
+                ok, frame = self._cap.read(buf) if buf is not None else self._cap.read()
+            except Exception:
+                ok, frame = False, None
+            ts = time.monotonic()
+            m = self._metrics
+            if m is not None and m.enabled: m.add(self._name, ts - t0)
+
+            if not ok or frame is None:
+                self.failures += 1
+                if buf is not None:
+                    self._recycle(buf)
+                time.sleep(0.005)
+                continue
+
+            if frame is not buf:
+                self.allocated_bytes += frame.nbytes
+            self.seq += 1
+            self.captured += 1
+            self.slot.put(CapturedFrame(frame, ts, self.seq, self))
+
+
+class FrameBuffers:
+    """
+    Buffers de saída reaproveitados (um conjunto por thread/estágio).
+
+    Cada chave guarda um array; ele só é realocado quando a resolução (ou o
+    dtype) muda. ``bytes_per_frame()`` mede o que foi alocado após o
+    aquecimento, para confirmar que o regime permanente não aloca.
+    """
+
+    def __init__(self, name: str = "buffers", warmup_frames: int = 30):
+        self.name = name
+        self.warmup_frames = warmup_frames
+        self._bufs: Dict[str, Any] = {}
+        self.frames = 0
+        self.allocated_bytes = 0
+        self.steady_bytes = 0
+
+    def get(self, key: str, shape: Tuple[int, ...], dtype=np.uint8):
+        buf = self._bufs.get(key)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype)
+            self._bufs[key] = buf
+            self.allocated_bytes += buf.nbytes
+            if self.frames >= self.warmup_frames:
+                self.steady_bytes += buf.nbytes
+        return buf
+
+    def bgr_to_rgb(self, src, key: str = "rgb"):
+        dst = self.get(key, src.shape, src.dtype)
+        cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=dst)
+        return dst
+
+    def flip(self, src, key: str = "flip"):
+        dst = self.get(key, src.shape, src.dtype)
+        cv2.flip(src, 1, dst=dst)
+        return dst
+
+    def resize(self, src, size: Tuple[int, int], key: str = "resize",
+               interpolation=cv2.INTER_LINEAR):
+        w, h = size
+        dst = self.get(key, (h, w) + src.shape[2:], src.dtype)
+        cv2.resize(src, size, dst=dst, interpolation=interpolation)
+        return dst
+
+    def tick(self):
+        """Marca o fim de um frame (para a média por frame)."""
+        self.frames += 1
+
+    def bytes_per_frame(self) -> float:
+        steady = self.frames - self.warmup_frames
+        return self.steady_bytes / steady if steady > 0 else 0.0
+
+    def report(self) -> str:
+        return (f"[Buffers] {self.name}: {self.allocated_bytes / 1e6:.1f} MB alocados em "
+                f"{self.frames} frames | regime: {self.bytes_per_frame():.0f} B/frame")
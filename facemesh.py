@@ -0,0 +1,77 @@
+"""
+Carregamento do FaceMesh em segundo plano.
+
+``import mediapipe`` e a montagem do grafo do FaceMesh custam ~1–2 s a frio.
+``FaceMeshLoader`` faz os dois numa thread, mais uma inferência de
+aquecimento num frame vazio, enquanto a thread principal escolhe o backend,
+cria a janela Tk e abre a câmera. ``get()`` só espera o que faltar.
+"""
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+FACEMESH_KWARGS = dict(
+    static_image_mode=False,
+    max_num_faces=1,
+    refine_landmarks=True,
+    min_detection_confidence=0.6,
+    min_tracking_confidence=0.6,
+)
+
+
+class FaceMeshLoader:
+    """``start()`` dispara a carga; ``get()`` devolve o FaceMesh pronto (ou relança o erro)."""
+
+    def __init__(self, warmup_size=(256, 256), **kwargs):
+        self._kwargs = {**FACEMESH_KWARGS, **kwargs}
+        self._warmup_size = warmup_size
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._mesh = None
+        self._error: Optional[BaseException] = None
+        self.import_s = self.build_s = self.warmup_s = 0.0
+        self.waited_s = 0.0  # quanto a thread principal ainda esperou em get()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._load, name="facemesh-loader", daemon=True)
+        self._thread.start()
+        return self
+
+    def _load(self):
+        try:
+            t0 = time.perf_counter()
+            import mediapipe as mp
+            t1 = time.perf_counter()
+            mesh = mp.solutions.face_mesh.FaceMesh(**self._kwargs)
+            t2 = time.perf_counter()
+            w, h = self._warmup_size
+            mesh.process(np.zeros((h, w, 3), np.uint8))  # inicializa o grafo/delegates
+            t3 = time.perf_counter()
+            self.import_s, self.build_s, self.warmup_s = t1 - t0, t2 - t1, t3 - t2
+            self._mesh = mesh
+        except BaseException as e:  # relançado em get(), na thread principal
+            self._error = e
+        finally:
+            self._done.set()
+
+    def get(self, timeout: Optional[float] = None):
+        if self._thread is None:
+            self.start()
+        t0 = time.perf_counter()
+        if not self._done.wait(timeout):
+            raise TimeoutError("FaceMesh não carregou a tempo")
+        self.waited_s = time.perf_counter() - t0
+        if self._error is not None:
+            raise self._error
+        return self._mesh
+
+    def close(self):
+        if self._mesh is not None:
+            self._mesh.close()
+            self._mesh = None
+
+    def report(self) -> str:
+        return (f"[FaceMesh] import {self.import_s * 1000:.0f} ms | grafo {self.build_s * 1000:.0f} ms | "
+                f"aquecimento {self.warmup_s * 1000:.0f} ms | espera na partida {self.waited_s * 1000:.0f} ms")
@@ -0,0 +1,123 @@
+"""
+Filtros dirigidos pelo relógio de captura (independentes da taxa de frames).
+
+Os presets guardam ``ema_alpha``/``vel_ema_alpha`` como alpha "por frame" a
+``REF_FPS`` (a taxa em que foram ajustados). ``ema_alpha_for`` converte esse
+alpha para o intervalo real do frame mantendo a mesma constante de tempo:
+a 15, 30 ou 60 fps (ou com frames pulados) a resposta em segundos é igual.
+
+``OneEuroFilter`` (Casiez et al., 2012) é a alternativa adaptativa: corte
+baixo parado (menos tremor) e mais alto em movimento rápido (menos atraso).
+
+``AlphaBetaTracker`` estima a velocidade angular (modelo de velocidade
+constante) para a predição: o ângulo filtrado é adiantado pela latência do
+pipeline mais o atraso do próprio filtro (``ema_lag``).
+"""
+import math
+
+REF_FPS = 30.0  # taxa de referência dos alphas e dos ganhos px/frame dos presets
+
+
+def ema_alpha_for(alpha_ref: float, dt: float, ref_fps: float = REF_FPS) -> float:
+    """Alpha equivalente, para um passo de ``dt`` segundos, ao ``alpha_ref`` por frame a ``ref_fps``."""
+    if alpha_ref >= 1.0:
+        return 1.0
+    if alpha_ref <= 0.0:
+        return 0.0
+    return 1.0 - (1.0 - alpha_ref) ** (dt * ref_fps)
+
+
+def time_constant(alpha_ref: float, ref_fps: float = REF_FPS) -> float:
+    """Constante de tempo (s) do EMA com ``alpha_ref`` por frame a ``ref_fps``."""
+    if alpha_ref >= 1.0:
+        return 0.0
+    if alpha_ref <= 0.0:
+        return math.inf
+    return -1.0 / (ref_fps * math.log(1.0 - alpha_ref))
+
+
+def ema_lag(alpha_ref: float, ref_fps: float = REF_FPS) -> float:
+    """Atraso (s) do EMA seguindo uma rampa: (1 - alpha) / alpha frames."""
+    if alpha_ref >= 1.0:
+        return 0.0
+    if alpha_ref <= 0.0:
+        return math.inf
+    return (1.0 - alpha_ref) / (alpha_ref * ref_fps)
+
+
+def ema_step(prev: float, new: float, alpha_ref: float, dt: float) -> float:
+    a = ema_alpha_for(alpha_ref, dt)
+    return a * new + (1.0 - a) * prev
+
+
+def _smoothing(cutoff: float, dt: float) -> float:
+    r = 2.0 * math.pi * cutoff * dt
+    return r / (r + 1.0)
+
+
+class OneEuroFilter:
+    """
+    - ``min_cutoff``: corte (Hz) com o sinal parado; menor = menos tremor.
+    - ``beta``: quanto o corte sobe com a velocidade; maior = menos atraso.
+    - ``d_cutoff``: corte (Hz) do filtro da derivada.
+    """
+
+    __slots__ = ("min_cutoff", "beta", "d_cutoff", "_x", "_dx", "_cutoff")
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.05, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = None
+        self._dx = 0.0
+        self._cutoff = min_cutoff
+
+    def reset(self, value=None):
+        self._x = value
+        self._dx = 0.0
+        self._cutoff = self.min_cutoff
+
+    def lag(self) -> float:
+        """Atraso aproximado (s) do último passo: 1 / (2π·corte)."""
+        return 1.0 / (2.0 * math.pi * self._cutoff)
+
+    def __call__(self, x: float, dt: float) -> float:
+        if self._x is None or dt <= 0.0:
+            self._x = x
+            return x
+        dx = (x - self._x) / dt
+        self._dx += _smoothing(self.d_cutoff, dt) * (dx - self._dx)
+        self._cutoff = cutoff = self.min_cutoff + self.beta * abs(self._dx)
+        self._x += _smoothing(cutoff, dt) * (x - self._x)
+        return self._x
+
+
+class AlphaBetaTracker:
+    """
+    Filtro alpha-beta (Kalman de ganho fixo, velocidade constante).
+
+    ``alpha``/``beta`` são ganhos por frame a ``REF_FPS`` (convertidos para o
+    dt real como os alphas do EMA). Só a velocidade (unidades/s) é usada.
+    """
+
+    __slots__ = ("alpha", "beta", "x", "v", "_init")
+
+    def __init__(self, alpha: float = 0.5, beta: float = 0.05):
+        self.alpha = alpha
+        self.beta = beta
+        self.reset()
+
+    def reset(self, value: float = 0.0):
+        self.x = value
+        self.v = 0.0
+        self._init = False
+
+    def __call__(self, z: float, dt: float) -> float:
+        if not self._init or dt <= 0.0:
+            self.x, self.v, self._init = z, 0.0, True
+            return self.v
+        x_pred = self.x + self.v * dt
+        r = z - x_pred
+        self.x = x_pred + ema_alpha_for(self.alpha, dt) * r
+        self.v += ema_alpha_for(self.beta, dt) * r / dt
+        return self.v
@@ -0,0 +1,106 @@
+"""
+HUD em cache para o preview.
+
+O painel (fundo + linhas de texto) fica pré-renderizado numa imagem própria.
+A cada frame:
+
+- cada linha só é redesenhada no painel se os valores dela mudaram
+  (comparação de tupla, sem formatar string);
+- linhas dinâmicas (yaw/pitch, boost, métricas) são atualizadas no máximo
+  ``dynamic_hz`` vezes por segundo;
+- o painel entra no frame com uma única cópia (``np.copyto``).
+
+O fundo é opaco, então a cópia equivale ao ``cv2.rectangle`` preenchido +
+``putText`` do desenho direto. Redesenhar uma linha apaga a faixa dela; as
+vizinhas que a faixa atinge são redesenhadas na hora (mesmo dinâmicas fora
+do período), para o painel nunca ficar com um buraco.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+Color = Tuple[int, int, int]
+
+
+class HudCompositor:
+    """
+    - ``rect``: (x0, y0, x1, y1) do painel no frame (inclusivo, como em ``cv2.rectangle``).
+    - ``dynamic_hz``: taxa máxima de atualização das linhas marcadas ``dynamic``.
+    """
+
+    def __init__(self, rect=(10, 10, 760, 230), bg: Color = (20, 20, 20), dynamic_hz: float = 10.0):
+        x0, y0, x1, y1 = rect
+        self.origin = (x0, y0)
+        self.bg = bg
+        self.panel = np.empty((y1 - y0 + 1, x1 - x0 + 1, 3), np.uint8)
+        self.panel[:] = bg
+        self.dynamic_period = 1.0 / dynamic_hz if dynamic_hz > 0 else 0.0
+        self._cache: Dict[str, tuple] = {}          # chave → (valores, cor)
+        self._bands: Dict[str, Tuple[int, int]] = {}  # chave → linhas ocupadas no painel
+        self._due: Dict[str, float] = {}            # chave → próxima atualização (dinâmicas)
+        self._drawn: Dict[str, tuple] = {}          # chave → argumentos do último putText
+        self.renders = 0
+
+    def line(self, key: str, y: int, fmt: str, values: tuple = (), color: Color = (255, 255, 255),
+             scale: float = 0.5, thickness: int = 1, dynamic: bool = False,
+             now: Optional[float] = None, x: int = 20):
+        """
+        Linha de texto com origem em (``x``, ``y``) (coordenadas do frame, baseline).
+        ``fmt`` é formatado com ``values`` só quando eles (ou a cor) mudam.
+        """
+        state = (values, color)
+        if self._cache.get(key) == state:
+            return
+        if dynamic and self.dynamic_period > 0:
+            if now is None: now = time.perf_counter()
+            if now < self._due.get(key, 0.0):
+                return
+            self._due[key] = now + self.dynamic_period
+
+        text = fmt.format(*values) if values else fmt
+        x0, y0 = self.origin
+        by = y - y0
+        self.clear(key)
+        self._cache[key] = state
+        (_, th), base = cv2.getTextSize(text, FONT, scale, thickness)
+        top = max(0, by - th - thickness)
+        bottom = min(self.panel.shape[0], by + base + thickness + 1)
+        self._bands[key] = (top, bottom)
+        self._drawn[key] = args = (text, (x - x0, by), FONT, scale, color, thickness)
+        cv2.putText(self.panel, *args)
+        self.renders += 1
+
+    def clear(self, key: str):
+        """Apaga a linha do painel (ex.: métricas desligadas)."""
+        band = self._bands.pop(key, None)
+        self._cache.pop(key, None)
+        self._drawn.pop(key, None)
+        if band is None:
+            return
+        # faixa apagada + vizinhas que ela atinge (e as que essas atingem)
+        top, bottom = band
+        hit = []
+        grew = True
+        while grew:
+            grew = False
+            for other, (t, b) in self._bands.items():
+                if other not in hit and t < bottom and top < b:
+                    hit.append(other)
+                    top, bottom = min(top, t), max(bottom, b)
+                    grew = True
+        self.panel[top:bottom] = self.bg
+        for other in self._bands:  # ordem de desenho
+            if other in hit:
+                cv2.putText(self.panel, *self._drawn[other])
+                self.renders += 1
+
+    def composite(self, img):
+        """Copia o painel para ``img`` (recortado às bordas do frame)."""
+        x0, y0 = self.origin
+        h = min(self.panel.shape[0], img.shape[0] - y0)
+        w = min(self.panel.shape[1], img.shape[1] - x0)
+        if h > 0 and w > 0:
+            np.copyto(img[y0:y0 + h, x0:x0 + w], self.panel[:h, :w])
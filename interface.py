@@ -1,4 +1,8 @@
+import gc
+import platform
+import threading
 import tkinter as tk
+from collections import deque
 from tkinter import ttk
 from typing import Callable, Dict, List, Any, Optional
 
@@ -30,6 +34,7 @@ class TkHeadMouseUI:
         toggle_control: Optional[Callable[[], None]] = None,
         toggle_edgeaccel: Optional[Callable[[], None]] = None,
         request_recalibrate: Optional[Callable[[], None]] = None,
+        get_diagnostics: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
         title: str = "Ajustes - Head Mouse",
     ):
         self._presets = presets
@@ -40,6 +45,7 @@ class TkHeadMouseUI:
         self._toggle_control = toggle_control
         self._toggle_edge = toggle_edgeaccel
         self._request_recalibrate = request_recalibrate
+        self._get_diagnostics = get_diagnostics
 
         # --- Tk root ---
         self.root = tk.Tk()
@@ -137,6 +143,7 @@ class TkHeadMouseUI:
 
         self.var_ema_alpha = tk.DoubleVar(value=float(st["ema_alpha"]))
         self.var_vel_ema_alpha = tk.DoubleVar(value=float(st["vel_ema_alpha"]))
+        self.var_predict = tk.DoubleVar(value=float(st["predict_strength"]))
 
         self.var_edge_margin = tk.IntVar(value=int(st["edge_margin"]))
         self.var_edge_max = tk.DoubleVar(value=float(st["edge_accel_max"]))
@@ -148,10 +155,38 @@ class TkHeadMouseUI:
 
         self.var_invert_y = tk.BooleanVar(value=bool(st["INVERT_Y"]))
         self.var_edge_enabled = tk.BooleanVar(value=bool(st["EDGE_ACCEL_ENABLED"]))
+        self.var_drift = tk.BooleanVar(value=bool(st["drift_correction"]))
 
         # Status text no rodapé
         self.var_status = tk.StringVar(value="Pronto.")
 
+        # parâmetro do core → (variável, conversão). Cada escrita numa variável
+        # marca o parâmetro como "sujo"; read_into_globals() só envia esses.
+        self._params = {
+            "deadzone_deg":       (self.var_deadzone, float),
+            "gain_yaw":           (self.var_gain_yaw, float),
+            "gain_pitch":         (self.var_gain_pitch, float),
+            "gain_power":         (self.var_gain_power, float),
+            "max_speed_px":       (self.var_max_speed, int),
+            "ema_alpha":          (self.var_ema_alpha, float),
+            "vel_ema_alpha":      (self.var_vel_ema_alpha, float),
+            "predict_strength":   (self.var_predict, float),
+            "edge_margin":        (self.var_edge_margin, int),
+            "edge_accel_max":     (self.var_edge_max, float),
+            "edge_accel_rate":    (self.var_edge_rate, float),
+            "edge_decay_rate":    (self.var_edge_decay, float),
+            "yaw_strong_deg":     (self.var_yaw_strong_deg, float),
+            "yaw_strong_rate":    (self.var_yaw_strong_rate, float),
+            "INVERT_Y":           (self.var_invert_y, bool),
+            "EDGE_ACCEL_ENABLED": (self.var_edge_enabled, bool),
+            "drift_correction":   (self.var_drift, bool),
+        }
+        self._pushed = {k: conv(st[k]) for k, (_, conv) in self._params.items()}  # último valor no core
+        self._dirty = set()
+        self._syncing = False
+        for key, (var, _) in self._params.items():
+            var.trace_add("write", lambda *_, k=key: self._mark_dirty(k))
+
     # ---------- layout ----------
     def _build_layout(self):
         root = self.root
@@ -207,6 +242,7 @@ class TkHeadMouseUI:
         self._grid_of_scales(tab_smooth, [
             ("Angle EMA", self.var_ema_alpha, 0.0, 1.0, 0.01, False, "alpha do filtro exponencial nos ângulos"),
             ("Vel EMA", self.var_vel_ema_alpha, 0.0, 1.0, 0.01, False, "alpha do filtro exponencial na velocidade"),
+            ("Predição", self.var_predict, 0.0, 1.0, 0.05, False, "adianta o ângulo pela latência medida (0 = desliga)"),
         ])
 
         # --- Aba: EdgeAccel / Stick ---
@@ -230,6 +266,7 @@ class TkHeadMouseUI:
         ttk.Checkbutton(box_opts, text="Invert Y", variable=self.var_invert_y).grid(row=0, column=0, sticky="w", padx=6, pady=4)
         self.chk_edge_enabled = ttk.Checkbutton(box_opts, text="EdgeAccelX habilitado", variable=self.var_edge_enabled, command=self._reflect_edge_toggle)
         self.chk_edge_enabled.grid(row=1, column=0, sticky="w", padx=6, pady=4)
+        ttk.Checkbutton(box_opts, text="Corrigir deriva do centro (cabeça parada)", variable=self.var_drift).grid(row=2, column=0, sticky="w", padx=6, pady=4)
 
         box_act = ttk.Labelframe(tab_opts, text="Ações rápidas")
         box_act.grid(row=1, column=0, sticky="ew", padx=6, pady=6)
@@ -238,6 +275,12 @@ class TkHeadMouseUI:
         ttk.Button(box_act, text="F2 • Ligar/Desligar EdgeAccel", command=self._do_toggle_edge).grid(row=1, column=0, sticky="ew", padx=6, pady=4)
         ttk.Button(box_act, text="F4 • Recalibrar", command=self._do_recalib).grid(row=2, column=0, sticky="ew", padx=6, pady=4)
 
+        # --- Aba: Diagnóstico (só com métricas ligadas) ---
+        if self._get_diagnostics is not None:
+            tab_diag = ttk.Frame(nb)
+            nb.add(tab_diag, text="Diagnóstico")
+            self._build_diagnostics(tab_diag)
+
         # Rodapé de ações
         footer = ttk.Frame(root, padding=(10, 8))
         footer.grid(row=2, column=0, sticky="ew")
@@ -290,6 +333,43 @@ class TkHeadMouseUI:
             self._ToolTip(scale, tooltip)
             self._ToolTip(spn, tooltip)
 
+    def _build_diagnostics(self, parent: ttk.Frame):
+        """Tabela p50/p99 por estágio + FPS, atualizada a cada 500 ms."""
+        parent.columnconfigure(0, weight=1)
+        self.var_diag_fps = tk.StringVar(value="FPS: -")
+        ttk.Label(parent, textvariable=self.var_diag_fps, style="Header.TLabel").grid(row=0, column=0, sticky="w", padx=8, pady=(8, 4))
+        self.diag_tree = ttk.Treeview(parent, columns=("p50", "p99", "n"), height=10)
+        self.diag_tree.heading("#0", text="Estágio")
+        self.diag_tree.heading("p50", text="p50 (ms)")
+        self.diag_tree.heading("p99", text="p99 (ms)")
+        self.diag_tree.heading("n", text="amostras")
+        for col in ("p50", "p99", "n"):
+            self.diag_tree.column(col, width=90, anchor="e")
+        self.diag_tree.grid(row=1, column=0, sticky="nsew", padx=8, pady=4)
+        self.var_diag_counters = tk.StringVar(value="")
+        ttk.Label(parent, textvariable=self.var_diag_counters, style="Subtle.TLabel").grid(row=2, column=0, sticky="w", padx=8, pady=(4, 8))
+        self.root.after(500, self._refresh_diagnostics)
+
+    def _refresh_diagnostics(self):
+        if not self.alive:
+            return
+        try:
+            d = self._get_diagnostics()
+        except Exception:
+            d = None
+        if d:
+            self.var_diag_fps.set(f"FPS: {d.get('fps', 0.0):.1f}")
+            stages = d.get("stages", {})
+            for name, st in stages.items():
+                values = (f"{st['p50']:.2f}", f"{st['p99']:.2f}", st["n"])
+                if self.diag_tree.exists(name):
+                    self.diag_tree.item(name, values=values)
+                else:
+                    self.diag_tree.insert("", "end", iid=name, text=name, values=values)
+            counters = d.get("counters", {})
+            self.var_diag_counters.set("  ".join(f"{k}: {v}" for k, v in counters.items()))
+        self.root.after(500, self._refresh_diagnostics)
+
     # ---------- eventos / ações ----------
     def _bind_shortcuts(self):
         self.root.bind("<F1>", lambda e: self._do_toggle_control())
@@ -301,9 +381,10 @@ class TkHeadMouseUI:
             idx = int(self.combo.current())
         except Exception:
             return
+        # comando enfileirado: a UI é sincronizada depois que o core aplicar
+        # (UIThread._SYNC_AFTER); reler agora traria o preset antigo de volta
         self._apply_preset(idx)
-        self.sync_from_preset()
-        self._set_status("Preset aplicado e UI sincronizada.")
+        self._set_status("Preset solicitado.")
 
     def _do_toggle_control(self):
         if self._toggle_control:
@@ -321,11 +402,7 @@ class TkHeadMouseUI:
     def _do_toggle_edge(self):
         if self._toggle_edge:
             try:
-                self._toggle_edge()
-                # refletir estado atual pós-toggle vindo do core
-                st = self._get_state()
-                self.var_edge_enabled.set(bool(st["EDGE_ACCEL_ENABLED"]))
-                self._reflect_edge_toggle()
+                self._toggle_edge()  # o estado novo chega pelo sync do UIThread
                 self._set_status("EdgeAccel alternado.")
             except Exception:
                 self._set_status("Falha ao alternar EdgeAccel.")
@@ -339,7 +416,7 @@ class TkHeadMouseUI:
                 self._set_status("Falha ao recalibrar.")
 
     def _apply_all(self):
-        self.read_into_globals()
+        self.read_into_globals(full=True)
         self._set_status("Alterações aplicadas ao sistema.")
 
     def _set_status(self, text: str):
@@ -348,60 +425,192 @@ class TkHeadMouseUI:
         self.root.after(3000, lambda: self.var_status.set("Pronto."))
 
     # ---------- sincronização ----------
+    def _mark_dirty(self, key: str):
+        if not self._syncing:
+            self._dirty.add(key)
+
+    def _load_state(self, st: Dict[str, Any]):
+        """Escreve valores vindos do core nas variáveis sem marcá-las como sujas."""
+        self._syncing = True
+        try:
+            for key, value in st.items():
+                if key not in self._params:
+                    continue
+                var, conv = self._params[key]
+                var.set(conv(value))
+                self._pushed[key] = conv(value)
+                self._dirty.discard(key)
+        finally:
+            self._syncing = False
+
     def sync_from_preset(self):
         """Puxa o estado atual do core e empurra para os widgets."""
         try:
             self.combo.current(self._get_current_preset())
         except Exception:
             pass
-        st = self._get_state()
-
         self.var_preset.set(str(self._get_current_preset()))
-        self.var_deadzone.set(float(st["deadzone_deg"]))
-        self.var_gain_yaw.set(float(st["gain_yaw"]))
-        self.var_gain_pitch.set(float(st["gain_pitch"]))
-        self.var_gain_power.set(float(st["gain_power"]))
-        self.var_max_speed.set(int(st["max_speed_px"]))
-
-        self.var_ema_alpha.set(float(st["ema_alpha"]))
-        self.var_vel_ema_alpha.set(float(st["vel_ema_alpha"]))
-
-        self.var_edge_margin.set(int(st["edge_margin"]))
-        self.var_edge_max.set(float(st["edge_accel_max"]))
-        self.var_edge_rate.set(float(st["edge_accel_rate"]))
-        self.var_edge_decay.set(float(st["edge_decay_rate"]))
-
-        self.var_yaw_strong_deg.set(float(st["yaw_strong_deg"]))
-        self.var_yaw_strong_rate.set(float(st["yaw_strong_rate"]))
-
-        self.var_invert_y.set(bool(st["INVERT_Y"]))
-        self.var_edge_enabled.set(bool(st["EDGE_ACCEL_ENABLED"]))
+        self._load_state(self._get_state())
         self._reflect_edge_toggle()
 
-    def read_into_globals(self):
+    def read_into_globals(self, full: bool = False) -> Dict[str, Any]:
         """
-        Lê os widgets e escreve no estado do core via set_state().
-        Pode ser chamado a cada frame (ou no botão Aplicar).
+        Envia ao core, via set_state(), só os parâmetros alterados desde o
+        último envio (diff parcial). Sem alteração pendente não toca no Tcl,
+        então pode ser chamado a cada frame. ``full=True`` (botão Aplicar)
+        reenvia todos. Retorna o diff enviado.
         """
-        st = self._get_state()
-        st.update({
-            "deadzone_deg":   float(self.var_deadzone.get()),
-            "gain_yaw":       float(self.var_gain_yaw.get()),
-            "gain_pitch":     float(self.var_gain_pitch.get()),
-            "gain_power":     float(self.var_gain_power.get()),
-            "max_speed_px":   int(self.var_max_speed.get()),
-            "ema_alpha":      float(self.var_ema_alpha.get()),
-            "vel_ema_alpha":  float(self.var_vel_ema_alpha.get()),
-            "edge_margin":    int(self.var_edge_margin.get()),
-            "edge_accel_max": float(self.var_edge_max.get()),
-            "edge_accel_rate":float(self.var_edge_rate.get()),
-            "edge_decay_rate":float(self.var_edge_decay.get()),
-            "yaw_strong_deg": float(self.var_yaw_strong_deg.get()),
-            "yaw_strong_rate":float(self.var_yaw_strong_rate.get()),
-            "INVERT_Y":       bool(self.var_invert_y.get()),
-            "EDGE_ACCEL_ENABLED": bool(self.var_edge_enabled.get()),
-        })
-        self._set_state(st)
+        if not self._dirty and not full:
+            return {}
+        keys = list(self._params) if full else list(self._dirty)
+        self._dirty.clear()
+        diff = {}
+        for key in keys:
+            var, conv = self._params[key]
+            try:
+                val = conv(var.get())
+            except (tk.TclError, ValueError):
+                continue  # Spinbox em edição (vazio/inválido): espera a próxima escrita
+            if full or self._pushed.get(key) != val:
+                diff[key] = val
+                self._pushed[key] = val
+        if diff:
+            self._set_state(diff)
+        return diff
+
+
+class UIThread:
+    """
+    Roda TkHeadMouseUI no próprio mainloop, numa thread dedicada, para que
+    redesenhos, tooltips e arrastar sliders não parem o rastreamento.
+
+    Mesmos parâmetros de TkHeadMouseUI. Os callbacks que alteram o core
+    (``apply_preset``, ``set_state``, toggles, recalibrar) viram comandos numa
+    deque (append/popleft são atômicos, sem lock) e só rodam quando a thread de
+    rastreamento chama ``poll()``, entre frames. ``get_state``/
+    ``current_preset_provider``/``get_diagnostics`` são só leitura e rodam na
+    thread da UI. No sentido contrário, ``sync()`` agenda um
+    ``sync_from_preset()`` na thread da UI.
+
+    ``threaded=False`` (padrão no macOS, onde o Tk precisa da thread
+    principal) mantém a UI na thread que chama ``poll()``, com ``pump()``.
+    """
+
+    _SYNC_AFTER = ("apply_preset", "toggle_edgeaccel")  # mudam o que a UI mostra
+
+    def __init__(self, threaded: Optional[bool] = None, poll_ms: int = 30, **ui_kwargs):
+        if threaded is None:
+            threaded = platform.system() != "Darwin"
+        self.threaded = threaded
+        self._poll_ms = poll_ms
+        self._kwargs = ui_kwargs
+        self._commands: deque = deque()  # UI → core: (fn, args, sincronizar depois)
+        self._inbox: deque = deque()     # core → UI: funções executadas na thread Tk
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.ui: Optional[TkHeadMouseUI] = None
+        self.error: Optional[BaseException] = None
+        self.commands = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.ui is not None and self.ui.alive
+
+    def _proxied_kwargs(self) -> Dict[str, Any]:
+        kw = dict(self._kwargs)
+        for name in ("apply_preset", "set_state", "toggle_control", "toggle_edgeaccel", "request_recalibrate"):
+            fn = kw.get(name)
+            if fn is not None:
+                kw[name] = (lambda *args, _fn=fn, _sync=name in self._SYNC_AFTER:
+                            self._commands.append((_fn, args, _sync)))
+        return kw
+
+    # ---------- ciclo de vida ----------
+    def start(self, timeout: float = 5.0) -> "UIThread":
+        """Cria a janela; propaga a exceção se o Tk não abrir (ex.: sem display)."""
+        if not self.threaded:
+            self.ui = TkHeadMouseUI(**self._proxied_kwargs())
+            self.ui.sync_from_preset()
+            return self
+        self._thread = threading.Thread(target=self._run, name="ui", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def close(self, timeout: float = 1.0):
+        if self.ui is None:
+            return
+        if not self.threaded:
+            self.ui._on_close()
+            return
+        # sem referência local à UI: a thread principal não pode ser a última a soltá-la
+        self._inbox.append(self._close_ui)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _close_ui(self):
+        if self.ui is not None:
+            self.ui._on_close()
+
+    def _tick(self):
+        while self._inbox:
+            self._inbox.popleft()()
+        if self.ui is None or not self.ui.alive:
+            return
+        self.ui.read_into_globals()  # diff dos sliders → set_state (enfileirado)
+        self.ui.root.after(self._poll_ms, self._tick)
+
+    def _run(self):
+        try:
+            self.ui = TkHeadMouseUI(**self._proxied_kwargs())
+            self.ui.sync_from_preset()
+        except Exception as e:
+            self.error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        self.ui.root.after(self._poll_ms, self._tick)
+        try:
+            self.ui.root.mainloop()
+        except tk.TclError:
+            pass
+        # o interpretador Tcl tem de ser liberado pela thread que o criou
+        # (senão: "Tcl_AsyncDelete: async handler deleted by the wrong thread")
+        self.ui.alive = False
+        self._inbox.clear()
+        self.ui = None
+        gc.collect()
+
+    # ---------- lado do rastreamento ----------
+    def poll(self) -> int:
+        """Executa os comandos pendentes da UI (thread de rastreamento). Sem nada pendente, custo ~zero."""
+        if not self.threaded and self.ui is not None:
+            self.ui.pump()
+            self.ui.read_into_globals()
+        n = 0
+        while self._commands:
+            fn, args, sync = self._commands.popleft()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[AVISO] Comando da UI falhou: {e}")
+            if sync:
+                self.sync()
+            n += 1
+        if not self.threaded:
+            while self._inbox:
+                self._inbox.popleft()()
+        self.commands += n
+        return n
+
+    def sync(self):
+        """Pede à UI que releia o estado do core (ex.: preset trocado por hotkey)."""
+        ui = self.ui
+        if ui is not None:
+            self._inbox.append(lambda: ui.alive and ui.sync_from_preset())
 
 
 # Dica de uso:
@@ -0,0 +1,150 @@
+"""
+Importação sob demanda e perfil de importação da partida.
+
+- ``lazy_import(nome, on_load=None)``: proxy de módulo; o import real só
+  acontece no primeiro acesso a um atributo (``on_load(mod)`` roda uma vez,
+  ex.: ``pyautogui.FAILSAFE = True``). ``preload`` força a carga numa thread
+  enquanto a janela Tk já está aberta.
+- ``ImportProfiler``: mede o tempo (cumulativo, 1ª carga) de cada pacote
+  importado depois de ``install()``; ``main.py --profile-imports`` liga antes
+  dos imports pesados e imprime a árvore na partida. ``importlib.import_module``
+  não passa por ``__import__``: as cargas de ``LazyModule``/``try_import``
+  são registradas explicitamente pelo profiler ativo.
+"""
+import builtins
+import importlib
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+_profiler: Optional["ImportProfiler"] = None  # instalado (ver ImportProfiler.install)
+
+
+def _import_module(name: str):
+    prof = _profiler
+    if prof is None:
+        return importlib.import_module(name)
+    return prof.import_module(name)
+
+
+class LazyModule:
+    __slots__ = ("_name", "_on_load", "_mod", "_lock")
+
+    def __init__(self, name: str, on_load: Optional[Callable] = None):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_on_load", on_load)
+        object.__setattr__(self, "_mod", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def load(self):
+        mod = self._mod
+        if mod is None:
+            with self._lock:
+                mod = self._mod
+                if mod is None:
+                    mod = _import_module(self._name)
+                    if self._on_load is not None:
+                        self._on_load(mod)
+                    object.__setattr__(self, "_mod", mod)
+        return mod
+
+    @property
+    def loaded(self) -> bool:
+        return self._mod is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self.load(), attr, value)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r} ({'carregado' if self._mod is not None else 'pendente'})>"
+
+
+def lazy_import(name: str, on_load: Optional[Callable] = None) -> LazyModule:
+    return LazyModule(name, on_load)
+
+
+def try_import(name: str):
+    """Importa ``name`` ou devolve None (dependência opcional)."""
+    try:
+        return _import_module(name)
+    except Exception:
+        return None
+
+
+def preload(*modules: LazyModule) -> threading.Thread:
+    """Carrega os módulos numa thread (erros ficam para o primeiro uso)."""
+    def run():
+        for m in modules:
+            try:
+                m.load()
+            except Exception:
+                pass
+    t = threading.Thread(target=run, name="preload", daemon=True)
+    t.start()
+    return t
+
+
+class ImportProfiler:
+    """
+    Envolve ``builtins.__import__`` e registra, para cada pacote de topo
+    carregado pela primeira vez, (profundidade, nome, segundos cumulativos).
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[int, str, float]] = []
+        self._orig = None
+        self._local = threading.local()
+        self.started = time.perf_counter()
+
+    def install(self):
+        global _profiler
+        if self._orig is None:
+            self._orig = builtins.__import__
+            builtins.__import__ = self._import
+            _profiler = self
+        return self
+
+    def uninstall(self):
+        global _profiler
+        if self._orig is not None:
+            builtins.__import__ = self._orig
+            self._orig = None
+            if _profiler is self:
+                _profiler = None
+
+    def _timed(self, top: str, load: Callable):
+        depth = getattr(self._local, "depth", 0)
+        idx = len(self.entries)
+        self.entries.append((depth, top, 0.0))
+        self._local.depth = depth + 1
+        t0 = time.perf_counter()
+        try:
+            return load()
+        finally:
+            self._local.depth = depth
+            self.entries[idx] = (depth, top, time.perf_counter() - t0)
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        top = name.partition(".")[0]
+        if level != 0 or not top or top in sys.modules:
+            return self._orig(name, globals, locals, fromlist, level)
+        return self._timed(top, lambda: self._orig(name, globals, locals, fromlist, level))
+
+    def import_module(self, name: str):
+        """``importlib.import_module`` registrado como o ``import`` comum."""
+        top = name.partition(".")[0]
+        if not top or top in sys.modules:
+            return importlib.import_module(name)
+        return self._timed(top, lambda: importlib.import_module(name))
+
+    def report(self, min_ms: float = 1.0, max_depth: int = 2) -> str:
+        total = time.perf_counter() - self.started
+        lines = [f"[Imports] {total * 1000:.0f} ms desde o início do perfil (cumulativo por pacote, 1ª carga):"]
+        for depth, name, s in self.entries:
+            if depth <= max_depth and s * 1000 >= min_ms:
+                lines.append(f"[Imports] {'  ' * depth}{name:<{24 - 2 * depth}} {s * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -1,15 +1,29 @@
-import cv2
-import mediapipe as mp
-import pyautogui
+import sys
 import time
-import math
+_T_START = time.monotonic()  # partida do processo (tempo até o 1º movimento)
+from lazyimport import ImportProfiler, lazy_import, try_import
+# --profile-imports: mede cada dependência a partir daqui (impresso em main())
+import_profiler = ImportProfiler().install() if "--profile-imports" in sys.argv[1:] else None
+import cv2
+import argparse
 import threading
-import platform
-import tkinter as tk
-from tkinter import ttk
 
 # >>> IMPORTA A UI DESACOPLADA <<<
-from interface import TkHeadMouseUI
+from interface import UIThread
+from hud import HudCompositor
+from camera import describe, open_camera, parse_mode
+from capture import FrameBuffers, FrameGrabber
+from pipeline import DropSlot, Stage
+from pose import landmarks_to_points, yaw_pitch_roll_from_points
+from calibration import DriftCorrector, NeutralCalibrator, camera_key, load_neutral, save_neutral
+from facemesh import FaceMeshLoader
+from filters import REF_FPS, AlphaBetaTracker, OneEuroFilter, ema_lag, ema_step
+from metrics import Metrics, SnapshotExporter
+from mouse_output import MouseOutputScheduler, VirtualCursor, virtual_desktop_bounds
+from replay import SessionRecorder
+from backends import CAP_CLICKS, NullBackend, select_backend
+from throttle import InferenceThrottle
+from tracking import FaceRoiTracker, FlowPoseTracker, RoiLandmarks
 
 # =========================
 # Arrow-keys -> Mouse (com supressão)
@@ -30,8 +44,8 @@ def setup_arrow_as_mouse():
         return
 
     # cada tecla dispara ação e é suprimida (não vai para outros programas)
-    keyboard.add_hotkey("left", lambda: pyautogui.click(button="left"), suppress=True)
-    keyboard.add_hotkey("right", lambda: pyautogui.click(button="right"), suppress=True)
+    keyboard.add_hotkey("left", lambda: mouse_click("left"), suppress=True)
+    keyboard.add_hotkey("right", lambda: mouse_click("right"), suppress=True)
     keyboard.add_hotkey("up", lambda: pyautogui.scroll(100), suppress=True)
     keyboard.add_hotkey("down", lambda: pyautogui.scroll(-100), suppress=True)
 
@@ -56,62 +70,31 @@ def block_arrow_keys():
 
 
 # ================== BACKENDS DE MOUSE ==================
-HAS_PDI = False
-try:
-    import pydirectinput as pdi
-    pdi.PAUSE = 0
-    pdi.FAILSAFE = True
-    HAS_PDI = True
-except Exception:
-    pass
-
-# --- RAW relativo no Windows (melhor para jogos/360) ---
-IS_WINDOWS = platform.system().lower().startswith("win")
-RAW_OK = False
-if IS_WINDOWS:
-    try:
-        import ctypes
-        from ctypes import wintypes
-
-        class MOUSEINPUT(ctypes.Structure):
-            _fields_ = [("dx", wintypes.LONG),
-                        ("dy", wintypes.LONG),
-                        ("mouseData", wintypes.DWORD),
-                        ("dwFlags", wintypes.DWORD),
-                        ("time", wintypes.DWORD),
-                        ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong))]
-
-        class INPUT(ctypes.Structure):
-            _fields_ = [("type", wintypes.DWORD),
-                        ("mi", MOUSEINPUT)]
-
-        SendInput = ctypes.windll.user32.SendInput
-        INPUT_MOUSE = 0
-        MOUSEEVENTF_MOVE = 0x0001
-
-        def raw_move_rel(dx, dy):
-            inp = INPUT()
-            inp.type = INPUT_MOUSE
-            inp.mi = MOUSEINPUT(int(dx), int(dy), 0, MOUSEEVENTF_MOVE, 0, None)
-            SendInput(1, ctypes.byref(inp), ctypes.sizeof(inp))
-
-        RAW_OK = True
-    except Exception:
-        RAW_OK = False
+# Registro em backends.py (RAW_WIN, XTest, uinput, PyDirectInput, PyAutoGUI).
+# Nada é sondado na importação: main() mede os disponíveis em segundo plano
+# (janela Tk já aberta) e fica com o mais rápido (--backend força um,
+# --no-backend-calibration pula a medição). Até lá, backend nulo.
+mouse_backend = NullBackend()
 
 # ---------------- HOTKEYS GLOBAIS ----------------
+# 'keyboard' (pip install keyboard) carrega com o backend, em load_input_deps()
 HAS_GLOBAL_KEYS = False
-try:
-    import keyboard  # pip install keyboard
-    HAS_GLOBAL_KEYS = True
-except Exception:
-    print("[AVISO] 'keyboard' indisponível. F1/F2/F3/F4 só funcionam na janela do app.")
+keyboard = None
+
+def load_global_keys():
+    global keyboard, HAS_GLOBAL_KEYS
+    keyboard = try_import("keyboard")
+    HAS_GLOBAL_KEYS = keyboard is not None
+    if not HAS_GLOBAL_KEYS:
+        print("[AVISO] 'keyboard' indisponível. F1/F2/F3/F4 só funcionam na janela do app.")
+    return HAS_GLOBAL_KEYS
 
 # ========== SEGURANÇA ==========
-pyautogui.FAILSAFE = True  # (0,0) aborta
+def _configure_pyautogui(mod):
+    mod.FAILSAFE = True  # (0,0) aborta
 
-# ========== TELA ==========
-SCREEN_W, SCREEN_H = pyautogui.size()
+# importado no primeiro uso (cliques/scroll de fallback, posição do ponteiro)
+pyautogui = lazy_import("pyautogui", _configure_pyautogui)
 
 # ========== PRESETS ==========
 PRESETS = [
@@ -127,15 +110,19 @@ PRESETS = [
      "edge_accel_rate":2.5, 
      "edge_decay_rate":5.0,
      "yaw_strong_deg":10.0, 
-     "yaw_strong_rate":2.0},
+     "yaw_strong_rate":2.0,
+     "predict_strength":0.25,
+     "drift_correction":True},
     {"name":"Equilibrio (geral)","deadzone_deg":3.0, "gain_yaw":9.0,  "gain_pitch":8.0, "gain_power":1.35,
      "max_speed_px":25, "ema_alpha":0.15, "vel_ema_alpha":0.25,
      "edge_margin":25, "edge_accel_max":6.0, "edge_accel_rate":3.0, "edge_decay_rate":4.0,
-     "yaw_strong_deg":8.0,  "yaw_strong_rate":2.5},
+     "yaw_strong_deg":8.0,  "yaw_strong_rate":2.5,
+     "predict_strength":0.5, "drift_correction":True},
     {"name":"Rapido (explorar)", "deadzone_deg":2.0, "gain_yaw":13.0, "gain_pitch":11.0,"gain_power":1.35,
      "max_speed_px":40, "ema_alpha":0.20, "vel_ema_alpha":0.20,
      "edge_margin":28, "edge_accel_max":8.0, "edge_accel_rate":5.0, "edge_decay_rate":3.0,
-     "yaw_strong_deg":6.0,  "yaw_strong_rate":4.0},
+     "yaw_strong_deg":6.0,  "yaw_strong_rate":4.0,
+     "predict_strength":0.5, "drift_correction":True},
     {"name":"Personalizado",    
     "deadzone_deg": 4.0,      # responsividade
     "gain_yaw": 7.0, 
@@ -149,7 +136,9 @@ PRESETS = [
     "edge_accel_rate": 0.0, 
     "edge_decay_rate": 0.0,
     "yaw_strong_deg": 10.0, 
-    "yaw_strong_rate": 2.0
+    "yaw_strong_rate": 2.0,
+    "predict_strength": 0.0,  # 0 = sem predição; 1 = compensa latência + atraso do filtro
+    "drift_correction": False # recentraliza devagar o neutro com a cabeça parada
 },
 ]
 current_preset = 1
@@ -159,12 +148,13 @@ def load_preset(i):
     return (p["deadzone_deg"], p["gain_yaw"], p["gain_pitch"], p["gain_power"], p["max_speed_px"],
             p["ema_alpha"], p["vel_ema_alpha"], p["edge_margin"],
             p["edge_accel_max"], p["edge_accel_rate"], p["edge_decay_rate"],
-            p["yaw_strong_deg"], p["yaw_strong_rate"])
+            p["yaw_strong_deg"], p["yaw_strong_rate"], p.get("predict_strength", 0.0),
+            p.get("drift_correction", False))
 
 (deadzone_deg, gain_yaw, gain_pitch, gain_power, max_speed_px,
  ema_alpha, vel_ema_alpha, edge_margin,
  edge_accel_max, edge_accel_rate, edge_decay_rate,
- yaw_strong_deg, yaw_strong_rate) = load_preset(current_preset)
+ yaw_strong_deg, yaw_strong_rate, predict_strength, drift_correction) = load_preset(current_preset)
 
 # ========== FLAGS ==========
 CALIBRATION_TIME = 1.5
@@ -173,9 +163,31 @@ MIRROR_ROLL = True
 MIRROR_PITCH = False
 INVERT_Y = True
 EDGE_ACCEL_ENABLED = True  # F2 alterna
-
-# ========== MEDIAPIPE ==========
-mp_face_mesh = mp.solutions.face_mesh
+ROI_TRACKING = True        # FaceMesh só na região do rosto (frame anterior)
+ROI_SIZE = 256             # lado máx. do recorte enviado ao FaceMesh (px)
+OUTPUT_HZ = 500            # saída do mouse em thread própria (250–1000 Hz); 0 = 1 movimento por frame
+ADAPTIVE_INFERENCE = True  # FaceMesh a IDLE_INFER_HZ com controle desligado ou cabeça parada
+IDLE_INFER_HZ = 5.0
+FLOW_TRACKING = True       # entre keyframes do FaceMesh, 5 pontos de pose por fluxo óptico
+FLOW_KEYFRAME_EVERY = 2    # máx. de frames por fluxo entre dois keyframes
+HUD_DYNAMIC_HZ = 10        # atualização das linhas dinâmicas do HUD (yaw/pitch/boost/métricas)
+ANGLE_FILTER = "ema"       # "ema" (ema_alpha do preset) ou "one_euro" (adaptativo)
+ONE_EURO_MIN_CUTOFF = 1.0  # Hz; menor = menos tremor parado
+ONE_EURO_BETA = 0.05       # maior = menos atraso em movimento rápido
+PREDICT_ALPHA = 0.5        # ganhos (por frame a REF_FPS) do estimador de velocidade da predição
+PREDICT_BETA = 0.05
+PREDICT_MAX_LEAD = 0.25    # s; teto do avanço da predição
+
+WARM_START = True          # reusa o neutro salvo para esta câmera/resolução (--no-warm-start)
+WARM_VALIDATE_TIME = 10.0  # s para conferir o neutro salvo em segundo plano
+WARM_MAX_DIFF_DEG = 5.0    # pose parada mais longe que isso do neutro salvo → aviso (F4 recalibra)
+
+# ========== MÉTRICAS ==========
+# histogramas por estágio (capture/inference/pose/mouse/latency/hud/ui); --metrics liga
+metrics = Metrics(enabled=False)
+
+def get_diagnostics():
+    return metrics.summary() if metrics.enabled else None
 
 # ========= ESTADO =========
 control_enabled = False
@@ -183,9 +195,27 @@ neutral_yaw = neutral_pitch = neutral_roll = 0.0
 ema_yaw = ema_pitch = ema_roll = 0.0
 vx_ema = vy_ema = 0.0
 
+# Saída do mouse em alta frequência (main() cria se OUTPUT_HZ > 0)
+mouse_output = None
+
+# Relógio dos filtros: timestamps monotônicos de captura. Alphas e ganhos
+# (px/frame) dos presets valem a REF_FPS; com outro intervalo, filters.py
+# mantém a mesma constante de tempo e a velocidade vira px/s.
+frame_dt = 1.0 / REF_FPS   # intervalo do frame atual (s)
+_last_frame_ts = None
+_rem_x = _rem_y = 0.0      # resto fracionário do movimento direto (sem thread de saída)
+euro_yaw = OneEuroFilter(ONE_EURO_MIN_CUTOFF, ONE_EURO_BETA)
+euro_pitch = OneEuroFilter(ONE_EURO_MIN_CUTOFF, ONE_EURO_BETA)
+
+# Predição (predict_strength do preset): velocidade angular estimada e
+# latência estimada captura → saída (pose + meio período da saída), suavizada (o replay mantém o valor fixo).
+pred_yaw = AlphaBetaTracker(PREDICT_ALPHA, PREDICT_BETA)
+pred_pitch = AlphaBetaTracker(PREDICT_ALPHA, PREDICT_BETA)
+pipeline_latency = 0.05    # s
+
 # Boost estilo “stick” (apenas X)
 edge_boost_x = 0.0
-_last_time = time.time()
+_last_time = None
 
 # Hotkeys debounce + recalib
 _last_f1 = _last_f2 = _last_f3 = _last_f4 = 0.0
@@ -194,13 +224,7 @@ recalib_request = False
 
 # ========== UTIL ==========
 def clamp(v, lo, hi): return max(lo, min(hi, v))
-def radians_to_degrees(rad): return rad * 180.0 / math.pi
 
-def vec_angle_deg(p1, p2):
-    dx = p2[0] - p1[0]; dy = p2[1] - p1[1]
-    return radians_to_degrees(math.atan2(dy, dx))
-
-def ema_func(prev, new, alpha): return alpha * new + (1 - alpha) * prev
 
 def apply_deadzone_and_gain(delta_deg, dz, g, p):
     sign = 1 if delta_deg >= 0 else -1
@@ -211,73 +235,76 @@ def apply_deadzone_and_gain(delta_deg, dz, g, p):
     return sign * speed
 
 def get_yaw_pitch_roll(landmarks, w, h):
-    idx_left_eye_outer = 33
-    idx_right_eye_outer = 263
-    idx_nose_tip = 1
-    idx_nose_bottom = 2
-    idx_forehead = 10
-
-    def denorm(i): return (landmarks[i].x * w, landmarks[i].y * h)
-
-    le = denorm(idx_left_eye_outer)
-    re = denorm(idx_right_eye_outer)
-    nose = denorm(idx_nose_tip)
-    nose_b = denorm(idx_nose_bottom)
-    forehead = denorm(idx_forehead)
-
-    eye_center = ((le[0] + re[0]) * 0.5, (le[1] + re[1]) * 0.5)
-
-    # roll (HUD)
-    roll = vec_angle_deg(le, re)
-    if roll > 90: roll -= 180
-    if roll < -90: roll += 180
-
-    # yaw
-    yaw = (nose[0] - eye_center[0]) / max(1, (re[0] - le[0]))
-    yaw_deg = yaw * 35.0
-
-    # pitch (positiva = cabeça para BAIXO)
-    ref = max(1, abs(eye_center[1] - nose_b[1]))
-    pitch = ((nose_b[1] - forehead[1]) / ref) - 0.6
-    pitch_deg = pitch * 40.0
-
-    return yaw_deg, pitch_deg, roll
+    # os 5 landmarks usados (33, 263, 1, 2, 10) vão para um array numa passada;
+    # a geometria fica em pose.py (também aceita lotes N x 478 x 3)
+    return yaw_pitch_roll_from_points(landmarks_to_points(landmarks, w, h))
 
 # --------- BACKEND UNIFICADO ---------
 def backend_name():
-    if RAW_OK: return "RAW_WIN"
-    if HAS_PDI: return "PyDirectInput"
-    return "PyAutoGUI"
+    return mouse_backend.name
 
 def mouse_move_rel(dx, dy):
-    if RAW_OK:
-        raw_move_rel(dx, dy)
-    elif HAS_PDI:
-        pdi.moveRel(int(dx), int(dy), duration=0)
+    mouse_backend.move_rel(dx, dy)
+    cursor.moved(dx, dy)
+    if startup_clock is not None:
+        mark_first_move()
+
+def mouse_click(button="left"):
+    if mouse_backend.supports(CAP_CLICKS):
+        mouse_backend.click(button)
     else:
-        pyautogui.moveRel(int(dx), int(dy), duration=0)
+        pyautogui.click(button=button)
+
+def backend_selftest(n=200):
+    """
+    Mede a latência por chamada do backend ativo e confere, pela posição real,
+    se o movimento relativo chegou (ex.: ``xvfb-run python main.py --selftest-backend``).
+    """
+    try:
+        x0, y0 = pyautogui.position()
+    except Exception:
+        x0 = y0 = None
+    t0 = time.perf_counter()
+    for i in range(n):
+        mouse_move_rel(1 if i % 2 == 0 else -1, 0)
+    per_call_us = (time.perf_counter() - t0) / n * 1e6
+    mouse_move_rel(10, 5)
+    time.sleep(0.05)
+    ok = None
+    try:
+        x1, y1 = pyautogui.position()
+        if x0 is not None:
+            ok = (x1 - x0, y1 - y0) == (10, 5)
+    except Exception:
+        pass
+    mouse_move_rel(-10, -5)
+    status = "OK" if ok else ("FALHOU" if ok is False else "não verificável")
+    print(f"[Backend] {backend_name()}: {per_call_us:.1f} us/chamada | movimento relativo: {status}")
+    return ok is not False
+
+# Posição do ponteiro modelada pelos deltas emitidos (sem round trip ao SO por frame);
+# ressincroniza com pyautogui.position() periodicamente ou quando diverge.
+# Limites reais (pyautogui.size fora do Windows) entram em load_input_deps().
+cursor = VirtualCursor(virtual_desktop_bounds(), query=lambda: pyautogui.position())
 
 # ---------- EDGE/STICK ACCEL X ----------
-def apply_stick_accel_x(vx, yaw_deg):
+def apply_stick_accel_x(vx, yaw_deg, now=None):
     """
     Aceleração “estilo controle”:
     - Se o ponteiro encosta na borda OU se yaw fica forte e sustentado,
       aumenta o boost; do contrário, decai.
     - Apenas eixo X.
+    - ``now``: timestamp de captura do frame (mesmo relógio dos filtros).
     """
     global edge_boost_x, _last_time
-    now = time.time()
-    dt = max(1e-3, now - _last_time)
+    if now is None: now = time.monotonic()
+    dt = max(1e-3, now - _last_time) if _last_time is not None else 1.0 / REF_FPS
     _last_time = now
 
-    # Sinal de “empurrando” pela borda (quando o ponteiro prende)
-    try:
-        x, _ = pyautogui.position()
-    except Exception:
-        x = SCREEN_W // 2
-
-    pushing_left  = (x <= edge_margin) and (vx < 0)
-    pushing_right = (x >= SCREEN_W - edge_margin) and (vx > 0)
+    # Sinal de “empurrando” pela borda (quando o ponteiro prende);
+    # posição esperada do modelo (o replay troca por um cursor simulado)
+    pushing_left  = cursor.at_left(edge_margin) and (vx < 0)
+    pushing_right = cursor.at_right(edge_margin) and (vx > 0)
 
     # Sinal de “analógico no talo” (yaw forte e sustentado)
     strong_push = abs(yaw_deg) >= yaw_strong_deg
@@ -292,8 +319,9 @@ def apply_stick_accel_x(vx, yaw_deg):
     return vx * (1.0 + edge_boost_x)
 
 # ------------- MOVIMENTO -------------
-def move_mouse_from_angles(yaw_deg, pitch_deg):
-    global vx_ema, vy_ema
+def move_mouse_from_angles(yaw_deg, pitch_deg, now=None):
+    """Ângulos filtrados → velocidade. ``vx``/``vy`` são px por frame a REF_FPS."""
+    global vx_ema, vy_ema, _rem_x, _rem_y
 
     vx = apply_deadzone_and_gain(yaw_deg, deadzone_deg, gain_yaw, gain_power)
     vy = apply_deadzone_and_gain(pitch_deg, deadzone_deg, gain_pitch, gain_power)
@@ -305,37 +333,90 @@ def move_mouse_from_angles(yaw_deg, pitch_deg):
     vy = clamp(vy, -max_speed_px, max_speed_px)
 
     # “stick accel” no X
-    vx = apply_stick_accel_x(vx, yaw_deg)
+    vx = apply_stick_accel_x(vx, yaw_deg, now)
 
-    # suavização na velocidade
-    vx_ema = ema_func(vx_ema, vx, vel_ema_alpha)
-    vy_ema = ema_func(vy_ema, vy, vel_ema_alpha)
+    # suavização na velocidade (mesma constante de tempo a qualquer fps)
+    vx_ema = ema_step(vx_ema, vx, vel_ema_alpha, frame_dt)
+    vy_ema = ema_step(vy_ema, vy, vel_ema_alpha, frame_dt)
 
-    if vx_ema != 0.0 or vy_ema != 0.0:
-        mouse_move_rel(vx_ema, vy_ema)
+    if mouse_output is not None:
+        # a thread de saída integra px/s entre os frames (e guarda o resto fracionário)
+        # (``now`` vai junto: a thread mede a latência captura → saída no 1º movimento)
+        mouse_output.set_velocity(vx_ema * REF_FPS, vy_ema * REF_FPS, capture_ts=now)
+        return
+
+    cursor.maybe_resync()  # sem thread de saída: ressincroniza daqui (raro)
+    # desloca o equivalente a frame_dt segundos; o resto fracionário vai para o próximo frame
+    _rem_x += vx_ema * frame_dt * REF_FPS
+    _rem_y += vy_ema * frame_dt * REF_FPS
+    ix, iy = int(_rem_x), int(_rem_y)
+    if ix != 0 or iy != 0:
+        _rem_x -= ix; _rem_y -= iy
+        if metrics.enabled: t0 = time.perf_counter()
+        mouse_move_rel(ix, iy)
+        if metrics.enabled:
+            metrics.add("mouse", time.perf_counter() - t0)
+            if now is not None:
+                metrics.add("latency", time.monotonic() - now)  # captura → saída do mouse
+
+def stop_mouse_output():
+    """Cursor parado (controle desligado, sem rosto, calibrando): zera resto, velocidade e boost."""
+    global _rem_x, _rem_y, vx_ema, vy_ema, edge_boost_x
+    _rem_x = _rem_y = 0.0
+    # a velocidade suavizada é também o sinal "ocupado" do throttle de inferência
+    vx_ema = vy_ema = 0.0
+    edge_boost_x = 0.0
+    if mouse_output is not None:
+        mouse_output.stop_motion()
+
+def reset_motion_state():
+    """Zera filtros, boost e relógios (replay/bench começam do mesmo estado)."""
+    global ema_yaw, ema_pitch, ema_roll, vx_ema, vy_ema, edge_boost_x
+    global frame_dt, _last_frame_ts, _last_time, _rem_x, _rem_y
+    ema_yaw = ema_pitch = ema_roll = 0.0
+    vx_ema = vy_ema = 0.0
+    edge_boost_x = 0.0
+    frame_dt = 1.0 / REF_FPS
+    _last_frame_ts = _last_time = None
+    _rem_x = _rem_y = 0.0
+    euro_yaw.reset(); euro_pitch.reset()
+    pred_yaw.reset(); pred_pitch.reset()
+    drift.reset()
 
 # ------------- HUD -------------
+hud = HudCompositor(dynamic_hz=HUD_DYNAMIC_HZ)
+
 def draw_hud(img, enabled, yaw, pitch, roll, show_cross=False):
     h, w = img.shape[:2]
     status = "ON" if enabled else "OFF"
     color = (0, 200, 0) if enabled else (0, 0, 200)
     try:
-        cv2.rectangle(img, (10, 10), (760, 230), (20, 20, 20), -1)
-        cv2.putText(img, f"Head Mouse: {status} | Backend: {backend_name()}",
-                    (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-        cv2.putText(img, "Hotkeys: F1=On/Off  F2=EdgeAccel  F3=Preset+  Shift+F3=Preset-  F4=Recalibrar  ESC=Sair(janela)",
-                    (20, 65), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200,220,255), 1)
-        cv2.putText(img, f"Preset: {PRESETS[current_preset]['name']}", (20, 90),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 1)
-        cv2.putText(img, f"Deadzone:{deadzone_deg:.1f}  Gain(Y/P):{gain_yaw:.1f}/{gain_pitch:.1f}  Power:{gain_power:.2f}  MaxSpd:{max_speed_px}",
-                    (20, 115), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200,255,200), 1)
-        cv2.putText(img, f"Smoothing: angleEMA:{ema_alpha:.2f}  velEMA:{vel_ema_alpha:.2f}",
-                    (20, 135), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200,255,200), 1)
-        cv2.putText(img, f"EdgeAccelX: {EDGE_ACCEL_ENABLED}  margin:{edge_margin}px  max:{edge_accel_max}x  "
-                         f"rate:{edge_accel_rate}/s  decay:{edge_decay_rate}/s  boost:{edge_boost_x:.2f}x",
-                    (20, 155), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200,220,255), 1)
-        cv2.putText(img, f"Yaw:{yaw:+.1f}  Pitch:{pitch:+.1f}  (InvertY:{INVERT_Y}, MirrorY/R:{MIRROR_YAW}/{MIRROR_ROLL})",
-                    (20, 180), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
+        # só as linhas cujos valores mudaram são redesenhadas no painel em cache;
+        # yaw/pitch/boost/métricas no máximo HUD_DYNAMIC_HZ vezes por segundo
+        now = time.perf_counter()
+        hud.line("status", 40, "Head Mouse: {} | Backend: {}", (status, backend_name()), color, 0.7, 2)
+        hud.line("hotkeys", 65, "Hotkeys: F1=On/Off  F2=EdgeAccel  F3=Preset+  Shift+F3=Preset-  F4=Recalibrar  ESC=Sair(janela)",
+                 color=(200,220,255), scale=0.45)
+        hud.line("preset", 90, "Preset: {}", (PRESETS[current_preset]['name'],), (255,255,255), 0.6)
+        hud.line("gains", 115, "Deadzone:{:.1f}  Gain(Y/P):{:.1f}/{:.1f}  Power:{:.2f}  MaxSpd:{}",
+                 (deadzone_deg, gain_yaw, gain_pitch, gain_power, max_speed_px), (200,255,200))
+        hud.line("smoothing", 135, "Smoothing: angleEMA:{:.2f}  velEMA:{:.2f}  Predict:{:.2f} ({:.0f} ms)",
+                 (ema_alpha, vel_ema_alpha, predict_strength, pipeline_latency * 1000), (200,255,200), dynamic=True, now=now)
+        hud.line("edge", 155, "EdgeAccelX: {}  margin:{}px  max:{}x  rate:{}/s  decay:{}/s  boost:{:.2f}x",
+                 (EDGE_ACCEL_ENABLED, edge_margin, edge_accel_max, edge_accel_rate, edge_decay_rate, edge_boost_x),
+                 (200,220,255), 0.45, dynamic=True, now=now)
+        hud.line("angles", 180, "Yaw:{:+.1f}  Pitch:{:+.1f}  (InvertY:{}, MirrorY/R:{}/{})",
+                 (yaw, pitch, INVERT_Y, MIRROR_YAW, MIRROR_ROLL), dynamic=True, now=now)
+        if metrics.enabled:
+            hud.line("metrics", 205, "{}", (metrics.hud_line(),), (255,220,150), 0.45, dynamic=True, now=now)
+        else:
+            hud.clear("metrics")
+        if warm_mismatch is not None:
+            hud.line("warm", 225, "Neutro salvo a {:.1f} graus da pose parada: F4 recalibra", (warm_mismatch,),
+                     (0,200,255), 0.5)
+        else:
+            hud.clear("warm")
+        hud.composite(img)
 
         if show_cross:
             cx, cy = w // 2, h // 2
@@ -343,6 +424,9 @@ def draw_hud(img, enabled, yaw, pitch, roll, show_cross=False):
             cv2.line(img, (cx, 0), (cx, h), (0, 255, 0), 2)
             cv2.putText(img, "Olhe para o CENTRO para recalibrar...", (20, h - 20),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
+            # barra até CALIBRATION_TIME (termina antes se a estimativa convergir)
+            bar = int((w - 40) * calibrator.progress(time.monotonic()))
+            cv2.rectangle(img, (20, h - 12), (20 + bar, h - 6), (0,255,0), -1)
     except Exception:
         pass  # não deixa a UI derrubar o app
 
@@ -352,14 +436,14 @@ def apply_preset(idx, silent=False):
     global deadzone_deg, gain_yaw, gain_pitch, gain_power, max_speed_px
     global ema_alpha, vel_ema_alpha
     global edge_margin, edge_accel_max, edge_accel_rate, edge_decay_rate
-    global yaw_strong_deg, yaw_strong_rate
+    global yaw_strong_deg, yaw_strong_rate, predict_strength, drift_correction
     global vx_ema, vy_ema, edge_boost_x
 
     current_preset = int(idx) % len(PRESETS)
     (deadzone_deg, gain_yaw, gain_pitch, gain_power, max_speed_px,
      ema_alpha, vel_ema_alpha, edge_margin,
      edge_accel_max, edge_accel_rate, edge_decay_rate,
-     yaw_strong_deg, yaw_strong_rate) = load_preset(current_preset)
+     yaw_strong_deg, yaw_strong_rate, predict_strength, drift_correction) = load_preset(current_preset)
 
     vx_ema = vy_ema = 0.0
     edge_boost_x = 0.0
@@ -440,54 +524,400 @@ def get_ui_state():
         "edge_decay_rate": edge_decay_rate,
         "yaw_strong_deg": yaw_strong_deg,
         "yaw_strong_rate": yaw_strong_rate,
+        "predict_strength": predict_strength,
+        "drift_correction": drift_correction,
         "INVERT_Y": INVERT_Y,
         "EDGE_ACCEL_ENABLED": EDGE_ACCEL_ENABLED,
     }
 
-def set_ui_state(st):
-    global deadzone_deg, gain_yaw, gain_pitch, gain_power, max_speed_px
-    global ema_alpha, vel_ema_alpha
-    global edge_margin, edge_accel_max, edge_accel_rate, edge_decay_rate
-    global yaw_strong_deg, yaw_strong_rate
-    global INVERT_Y, EDGE_ACCEL_ENABLED
-
-    deadzone_deg   = float(st["deadzone_deg"])
-    gain_yaw       = float(st["gain_yaw"])
-    gain_pitch     = float(st["gain_pitch"])
-    gain_power     = float(st["gain_power"])
-    max_speed_px   = int(st["max_speed_px"])
-
-    ema_alpha      = float(st["ema_alpha"])
-    vel_ema_alpha  = float(st["vel_ema_alpha"])
+# parâmetros que a UI pode alterar → conversão
+UI_PARAMS = {
+    "deadzone_deg": float, "gain_yaw": float, "gain_pitch": float, "gain_power": float,
+    "max_speed_px": int, "ema_alpha": float, "vel_ema_alpha": float,
+    "edge_margin": int, "edge_accel_max": float, "edge_accel_rate": float, "edge_decay_rate": float,
+    "yaw_strong_deg": float, "yaw_strong_rate": float, "predict_strength": float,
+    "drift_correction": bool,
+    "INVERT_Y": bool, "EDGE_ACCEL_ENABLED": bool,
+}
 
-    edge_margin    = int(st["edge_margin"])
-    edge_accel_max = float(st["edge_accel_max"])
-    edge_accel_rate= float(st["edge_accel_rate"])
-    edge_decay_rate= float(st["edge_decay_rate"])
-
-    yaw_strong_deg = float(st["yaw_strong_deg"])
-    yaw_strong_rate= float(st["yaw_strong_rate"])
-
-    INVERT_Y       = bool(st["INVERT_Y"])
-    EDGE_ACCEL_ENABLED = bool(st["EDGE_ACCEL_ENABLED"])
+def set_ui_state(st):
+    """Aplica um dict completo ou parcial (o diff enviado pela UI) aos globais."""
+    g = globals()
+    for key, value in st.items():
+        conv = UI_PARAMS.get(key)
+        if conv is not None:
+            g[key] = conv(value)
+
+# ------------- CALIBRAÇÃO -------------
+# Máquina de estados alimentada pelo estágio de pose: mediana/MAD em janela
+# circular, termina quando a estimativa converge (máx. CALIBRATION_TIME)
+calibrator = NeutralCalibrator(max_time=CALIBRATION_TIME)
+# correção contínua (drift_correction do preset): cabeça parada dentro da zona morta
+drift = DriftCorrector()
+
+# neutro salvo (main() define a chave da câmera): carregado na partida e
+# conferido por warm_validator com a primeira pose parada, sem travar nada
+calib_key = None
+neutral_known = False
+warm_validator = NeutralCalibrator(max_time=WARM_VALIDATE_TIME)
+warm_mismatch = None  # graus entre a 1ª pose parada e o neutro salvo (aviso no HUD até o F4)
+
+def persist_neutral():
+    if calib_key is not None and neutral_known:
+        save_neutral(calib_key, (neutral_yaw, neutral_pitch, neutral_roll))
+
+def warm_start(key, now):
+    """Carrega o neutro salvo para ``key``; False se não há (calibra do zero)."""
+    global calib_key, neutral_yaw, neutral_pitch, neutral_roll, neutral_known
+    calib_key = key
+    saved = load_neutral(key) if WARM_START else None
+    if saved is None:
+        return False
+    neutral_yaw, neutral_pitch, neutral_roll = saved
+    neutral_known = True
+    warm_validator.start(now)
+    print(f"[Calibracao] neutro salvo ({key}) yaw/pitch: {neutral_yaw:+.1f}/{neutral_pitch:+.1f} "
+          f"— conferindo em segundo plano (F4 recalibra)")
+    return True
+
+def check_warm_start():
+    """
+    Só avisa: a pose parada pode ser o usuário olhando para uma borda da tela,
+    então nunca vira neutro sem o F4 (que mostra a cruz e pede o centro).
+    """
+    global warm_mismatch
+    if not warm_validator.converged or warm_validator.estimate is None:
+        return  # sem pose parada a tempo: inconclusivo, fica o salvo
+    diff = max(abs(warm_validator.estimate[0] - neutral_yaw), abs(warm_validator.estimate[1] - neutral_pitch))
+    if diff > WARM_MAX_DIFF_DEG:
+        warm_mismatch = diff
+        print(f"[AVISO] Pose parada a {diff:.1f}° do neutro salvo. Se o cursor estiver descentrado, pressione F4 para recalibrar.")
+    else:
+        print(f"[Calibracao] neutro salvo confirmado (Δ {diff:.1f}°).")
+
+# tempo até pronto / 1º movimento desde _T_START (main() liga)
+startup_clock = None
+_t_ready = None
+
+def mark_ready(now):
+    global _t_ready
+    _t_ready = now - startup_clock
+    print(f"[Partida] pronto para mover em {_t_ready:.2f}s")
+
+def mark_first_move():
+    global startup_clock
+    t = time.monotonic() - startup_clock
+    startup_clock = None
+    print(f"[Partida] primeiro movimento do cursor em {t:.2f}s desde a partida")
+
+def start_calibration(now):
+    calibrator.start(now)
+
+def calibrating():
+    return calibrator.active
+
+def finish_calibration():
+    global neutral_yaw, neutral_pitch, neutral_roll, neutral_known, warm_mismatch
+    global ema_yaw, ema_pitch, ema_roll, vx_ema, vy_ema, edge_boost_x
+    if calibrator.estimate is not None:
+        neutral_yaw, neutral_pitch, neutral_roll = calibrator.estimate
+        neutral_known = True
+        warm_validator.cancel()
+        warm_mismatch = None
+        persist_neutral()
+    drift.reset()
+    ema_yaw = ema_pitch = ema_roll = 0.0
+    vx_ema = vy_ema = 0.0
+    edge_boost_x = 0.0
+    euro_yaw.reset(0.0); euro_pitch.reset(0.0)  # parte do neutro, como o EMA
+    pred_yaw.reset(); pred_pitch.reset()
+    print(f"[Calibracao] neutro yaw/pitch: {neutral_yaw:+.1f}/{neutral_pitch:+.1f} ({calibrator.report()})")
+
+# ------------- ESTÁGIOS DO PIPELINE -------------
+session_recorder = None  # SessionRecorder ativo (--record)
+
+# buffers reaproveitados por thread (dst= do OpenCV): inferência e apresentação
+infer_bufs = FrameBuffers("inference")
+view_bufs = FrameBuffers("view")
+
+# taxa de inferência adaptativa (main() desliga com --no-adaptive-inference)
+inference_throttle = InferenceThrottle(IDLE_INFER_HZ) if ADAPTIVE_INFERENCE else None
+flow_tracker = FlowPoseTracker(keyframe_every=FLOW_KEYFRAME_EVERY) if FLOW_TRACKING else None
+_last_view = (0.0, 0.0, False)  # yaw, pitch, cruz do último frame inferido (HUD dos pulados)
+
+def tracking_busy():
+    """Precisa de inferência a cada frame: calibrando ou cursor ainda em movimento."""
+    return calibrating() or recalib_request or abs(vx_ema) + abs(vy_ema) > 0.05
+
+class TrackPacket:
+    """Frame capturado + resultado dos estágios de inferência e pose."""
+    __slots__ = ("cap", "landmarks", "points", "w", "h", "yaw", "pitch", "roll", "enabled", "show_cross",
+                 "inferred")
+
+    def __init__(self, cap, landmarks, w, h, inferred=True, points=None):
+        self.cap = cap
+        self.landmarks = landmarks
+        self.points = points      # 5 pontos de pose (px); frames por fluxo só têm isto
+        self.w, self.h = w, h
+        self.inferred = inferred  # False: pulado pela taxa adaptativa (só preview)
+        self.yaw = self.pitch = self.roll = 0.0
+        self.enabled = False
+        self.show_cross = False
+
+    def release(self):
+        self.cap.release()
+
+def make_inference_stage(face_mesh):
+    """
+    Estágio 2: BGR→RGB + FaceMesh (keyframe) ou fluxo óptico dos 5 pontos de
+    pose. Recebe CapturedFrame, devolve TrackPacket.
+    """
+    roi_tracker = FaceRoiTracker(target_size=ROI_SIZE) if ROI_TRACKING else None
+
+    def stage(pkt):
+        frame = pkt.frame
+        h, w = frame.shape[:2]
+        thr = inference_throttle
+        if thr is not None and not thr.should_infer(frame, pkt.ts, control_enabled, tracking_busy()):
+            return TrackPacket(pkt, None, w, h, inferred=False)
+        flow = flow_tracker
+        if flow is not None and not flow.need_keyframe():
+            if metrics.enabled: t0 = time.perf_counter()
+            pts = flow.track(frame)
+            if metrics.enabled: metrics.add("flow", time.perf_counter() - t0)
+            if pts is not None:
+                return TrackPacket(pkt, None, w, h, points=pts)
+            # fluxo perdeu os pontos: este mesmo frame vai para o FaceMesh
+        roi = roi_tracker.roi_for(w, h) if roi_tracker else None
+        src = roi_tracker.crop(frame, roi, infer_bufs) if roi is not None else frame
+        frame_rgb = infer_bufs.bgr_to_rgb(src, key="rgb_roi" if roi is not None else "rgb")
+        infer_bufs.tick()
+        res = face_mesh.process(frame_rgb)
+        lm = res.multi_face_landmarks[0].landmark if res.multi_face_landmarks else None
+        if roi_tracker:
+            if lm is None:
+                roi_tracker.lost(w, h)
+            else:
+                if roi is not None:
+                    lm = RoiLandmarks(lm, roi, w, h)  # volta ao referencial do frame inteiro
+                roi_tracker.update(lm, w, h)
+        tp = TrackPacket(pkt, lm, w, h)
+        if flow is not None:
+            if lm is None:
+                flow.reset()
+            else:
+                tp.points = landmarks_to_points(lm, w, h)
+                flow.keyframe(frame, tp.points)
+        return tp
+    return stage
+
+def process_angles(angles, now, clock=None):
+    """
+    Núcleo do movimento, sem câmera: calibração, espelhamento, neutro, EMA e
+    saída do mouse. ``angles`` = (yaw, pitch, roll) crus ou None (sem rosto).
+    ``now``: timestamp monotônico de captura, que dirige filtros e boost
+    (``clock`` só se o boost tiver de usar outro relógio).
+    Devolve (yaw, pitch, show_cross) para o HUD. Usado ao vivo e pelo replay.
+    """
+    global ema_yaw, ema_pitch, recalib_request, frame_dt, _last_frame_ts
+    global neutral_yaw, neutral_pitch
+
+    if clock is None: clock = now
+    if _last_frame_ts is not None:
+        frame_dt = clamp(now - _last_frame_ts, 1 / 240, 0.25)
+    _last_frame_ts = now
+
+    if recalib_request:
+        recalib_request = False
+        start_calibration(now)
+
+    if calibrating():
+        stop_mouse_output()
+        if calibrator.add(angles, now):
+            finish_calibration()
+        return 0.0, 0.0, True
+
+    if angles is None:
+        stop_mouse_output()
+        return 0.0, 0.0, False
+
+    if warm_validator.active and warm_validator.add(angles, now):
+        check_warm_start()
+    if startup_clock is not None and _t_ready is None:
+        mark_ready(now)
+
+    yaw_deg, pitch_deg, roll_deg = angles
+
+    if MIRROR_YAW:   yaw_deg  = -yaw_deg
+    if MIRROR_ROLL:  roll_deg = -roll_deg
+    if MIRROR_PITCH: pitch_deg = -pitch_deg
+
+    yaw_deg   -= neutral_yaw
+    pitch_deg -= neutral_pitch
+
+    if drift_correction:
+        dyaw, dpitch = drift.update(yaw_deg, pitch_deg, frame_dt, deadzone_deg)
+        neutral_yaw   += dyaw
+        neutral_pitch += dpitch
+
+    if ANGLE_FILTER == "one_euro":
+        ema_yaw   = euro_yaw(yaw_deg, frame_dt)
+        ema_pitch = euro_pitch(pitch_deg, frame_dt)
+        filter_lag = euro_yaw.lag()
+    else:
+        ema_yaw   = ema_step(ema_yaw, yaw_deg, ema_alpha, frame_dt)
+        ema_pitch = ema_step(ema_pitch, pitch_deg, ema_alpha, frame_dt)
+        filter_lag = ema_lag(ema_alpha)
+
+    # predição de velocidade constante: adianta o ângulo filtrado pela
+    # latência captura → saída mais o atraso do filtro (escala predict_strength)
+    out_yaw, out_pitch = ema_yaw, ema_pitch
+    v_yaw = pred_yaw(yaw_deg, frame_dt)
+    v_pitch = pred_pitch(pitch_deg, frame_dt)
+    if predict_strength > 0.0:
+        lead = predict_strength * min(pipeline_latency + filter_lag, PREDICT_MAX_LEAD)
+        out_yaw   += v_yaw * lead
+        out_pitch += v_pitch * lead
+
+    if control_enabled:
+        move_mouse_from_angles(out_yaw, out_pitch, clock)
+    else:
+        stop_mouse_output()
+
+    return out_yaw, out_pitch, False
+
+def pose_stage(tp):
+    """Estágio 3: ângulos, calibração, filtros e saída do mouse."""
+    global _last_view, pipeline_latency
+    if not tp.inferred:
+        # frame pulado em repouso: nada muda no movimento; HUD repete o último
+        tp.yaw, tp.pitch, tp.show_cross = _last_view
+        tp.enabled = control_enabled and not tp.show_cross
+        return tp
+
+    angles = None
+    pts = tp.points
+    if pts is None and tp.landmarks is not None:
+        pts = landmarks_to_points(tp.landmarks, tp.w, tp.h)
+    if pts is not None:
+        angles = yaw_pitch_roll_from_points(pts)
+        if session_recorder is not None:
+            session_recorder.write(tp.cap.ts, tp.cap.seq, angles, pts)
+    elif session_recorder is not None:
+        session_recorder.write(tp.cap.ts, tp.cap.seq, None, None)
+    if inference_throttle is not None:
+        inference_throttle.observe(pts, tp.cap.ts)
+    # latência até aqui (captura → inferência → pose) + meio período da saída
+    lat = time.monotonic() - tp.cap.ts + (0.5 / OUTPUT_HZ if OUTPUT_HZ > 0 else 0.0)
+    pipeline_latency += 0.05 * (clamp(lat, 0.0, PREDICT_MAX_LEAD) - pipeline_latency)
+
+    tp.yaw, tp.pitch, tp.show_cross = _last_view = process_angles(angles, tp.cap.ts)
+    tp.enabled = control_enabled and not tp.show_cross
+    if metrics.enabled:
+        metrics.frame(time.monotonic())  # "latency" é medida na emissão (move_mouse_from_angles/MouseOutputScheduler)
+    return tp
 
 # ------------- MAIN -------------
-def main():
-    global neutral_yaw, neutral_pitch, neutral_roll
-    global ema_yaw, ema_pitch, ema_roll
-    global vx_ema, vy_ema, edge_boost_x, recalib_request
-
-    apply_preset(current_preset, silent=True)
-
-    if HAS_GLOBAL_KEYS:
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="FacePilot - head mouse pela webcam")
+    ap.add_argument("--record", metavar="ARQ",
+                    help="grava a sessão (landmarks/ângulos + timestamps) para replay.py")
+    ap.add_argument("--metrics", action="store_true",
+                    help="liga os histogramas de latência por estágio (HUD + aba Diagnóstico)")
+    ap.add_argument("--metrics-out", metavar="ARQ|udp://host:porta",
+                    help="exporta snapshots JSON das métricas (implica --metrics)")
+    ap.add_argument("--metrics-period", type=float, default=1.0, help="intervalo da exportação (s)")
+    ap.add_argument("--output-hz", type=float, default=OUTPUT_HZ,
+                    help="frequência da thread de saída do mouse (250–1000; 0 = por frame)")
+    ap.add_argument("--no-adaptive-inference", action="store_true",
+                    help="FaceMesh em todo frame, mesmo com controle desligado ou cabeça parada")
+    ap.add_argument("--no-flow", action="store_true",
+                    help="FaceMesh em todo frame inferido (sem fluxo óptico entre keyframes)")
+    ap.add_argument("--profile-imports", action="store_true",
+                    help="imprime o tempo de importação de cada dependência na partida")
+    ap.add_argument("--no-warm-start", action="store_true",
+                    help="ignora o neutro salvo para a câmera e calibra na partida")
+    ap.add_argument("--camera", metavar="FONTE", default="0",
+                    help="índice da webcam, dispositivo (/dev/videoN, v4l2loopback) ou arquivo de vídeo")
+    ap.add_argument("--capture-mode", metavar="LxA@FPS:FOURCC", type=parse_mode,
+                    help="força o modo de captura (ex.: 640x480@60:MJPG) em vez de sondar")
+    ap.add_argument("--capture-target", metavar="LxA", default="640x480",
+                    help="resolução mínima para a inferência na escolha do modo (padrão 640x480)")
+    ap.add_argument("--reprobe-camera", action="store_true",
+                    help="ignora o modo salvo para a câmera e sonda de novo")
+    ap.add_argument("--filter", choices=("ema", "one_euro"), default=ANGLE_FILTER,
+                    help="filtro dos ângulos: EMA do preset ou One Euro (adaptativo)")
+    ap.add_argument("--headless", action="store_true",
+                    help="sem janela de preview (nada de flip/HUD/imshow/waitKey); teclas via hotkeys globais e Tk")
+    ap.add_argument("--preview-fps", type=float, default=0,
+                    help="limita o preview a N quadros/s (0 = todo frame)")
+    ap.add_argument("--preview-scale", type=float, default=1.0,
+                    help="escala do preview (ex.: 0.5 = metade da resolução)")
+    ap.add_argument("--hud-hz", type=float, default=HUD_DYNAMIC_HZ,
+                    help="atualização das linhas dinâmicas do HUD (0 = todo frame)")
+    ap.add_argument("--selftest-backend", action="store_true",
+                    help="mede/valida o backend de mouse e sai (ex.: sob Xvfb)")
+    ap.add_argument("--backend", metavar="NOME",
+                    help="força o backend de mouse (RAW_WIN, XTest, uinput, PyDirectInput, PyAutoGUI)")
+    ap.add_argument("--no-backend-calibration", action="store_true",
+                    help="não mede os backends na partida; usa a ordem de prioridade")
+    return ap.parse_args(argv)
+
+def choose_backend(prefer=None, calibrate=True):
+    """Troca o backend ativo pelo mais rápido que funcionou (ou pelo pedido)."""
+    global mouse_backend
+    mouse_backend.close()
+    mouse_backend = select_backend(do_calibrate=calibrate, prefer=prefer)
+    return mouse_backend
+
+input_deps_error = None  # falha em load_input_deps(); main() aborta a partida
+
+def load_input_deps(args):
+    """
+    Partida em segundo plano (com a janela Tk já aberta): pyautogui (limites
+    da tela), backend de mouse e hotkeys globais. pyautogui é obrigatório:
+    sem ele o erro fica em ``input_deps_error`` e main() sai com a mensagem.
+    """
+    global input_deps_error
+    try:
+        pyautogui.load()
+        cursor.set_bounds(virtual_desktop_bounds(pyautogui.size))
+        choose_backend(args.backend, calibrate=not args.no_backend_calibration)
+    except Exception as e:
+        input_deps_error = e
+        return
+    if load_global_keys():
         threading.Thread(target=setup_global_hotkeys, daemon=True).start()
         threading.Thread(target=setup_arrow_as_mouse, daemon=True).start()
         threading.Thread(target=block_arrow_keys, daemon=True).start()
 
+def main(argv=None):
+    global session_recorder, mouse_output, hud, inference_throttle, flow_tracker, ANGLE_FILTER
+    global WARM_START, startup_clock
+    args = parse_args(argv)
+    startup_clock = _T_START
+    # mediapipe + grafo do FaceMesh + 1 inferência de aquecimento em paralelo
+    # com backend, janela Tk e câmera; get() abaixo só espera o que faltar
+    loader = FaceMeshLoader().start()
+    WARM_START = not args.no_warm_start
+    ANGLE_FILTER = args.filter
+    if args.no_adaptive_inference:
+        inference_throttle = None
+    if args.no_flow:
+        flow_tracker = None
+    hud = HudCompositor(dynamic_hz=args.hud_hz)
+    if args.selftest_backend:
+        choose_backend(args.backend, calibrate=not args.no_backend_calibration)
+        return 0 if backend_selftest() else 1
+    metrics.enabled = bool(args.metrics or args.metrics_out)
+    apply_preset(current_preset, silent=True)
 
+    # pyautogui/keyboard/backend carregam enquanto a janela Tk e a câmera abrem
+    deps = threading.Thread(target=load_input_deps, args=(args,), name="input-deps", daemon=True)
+    deps.start()
 
-    # >>> CRIA A UI (antes da câmera) <<<
-    ui = TkHeadMouseUI(
+    # >>> CRIA A UI (antes da câmera), com mainloop na própria thread <<<
+    ui = UIThread(
         presets=PRESETS,
         current_preset_provider=lambda: current_preset,
         apply_preset=lambda idx: apply_preset(idx, silent=False),
@@ -496,150 +926,193 @@ def main():
         toggle_control=toggle_control,
         toggle_edgeaccel=toggle_edgeaccel,
         request_recalibrate=request_recalibrate,
+        get_diagnostics=get_diagnostics if metrics.enabled else None,
     )
-    ui.sync_from_preset()
-
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
+    try:
+        ui.start()
+    except Exception as e:
+        if not args.headless:
+            raise
+        # headless sem display: segue só com as hotkeys globais
+        print(f"[AVISO] Janela de ajustes indisponível ({e}).")
+        ui = None
+    if ui is not None:
+        print(f"[Partida] janela de ajustes em {time.monotonic() - _T_START:.2f}s")
+
+    # modo de menor latência que atende a inferência (salvo por dispositivo), buffer do driver = 1
+    source = int(args.camera) if args.camera.isdigit() else args.camera
+    target = tuple(int(v) for v in args.capture_target.lower().split("x"))
+    cap, cam_info = open_camera(source, target, force=args.capture_mode, reprobe=args.reprobe_camera)
+    if cam_info is None:
         print("Erro: Não foi possível abrir a webcam.")
+        if ui is not None:
+            ui.close()
         return
-
-    with mp_face_mesh.FaceMesh(
-        static_image_mode=False,
-        max_num_faces=1,
-        refine_landmarks=True,
-        min_detection_confidence=0.6,
-        min_tracking_confidence=0.6
-    ) as face_mesh:
-
-        # Calibração inicial com cruz
-        print("Calibrando... Olhe para o centro.")
-        calib_samples = []
-        start = time.time()
-        while time.time() - start < CALIBRATION_TIME:
-            ui.pump()  # mantém UI responsiva durante calibração
-
-            ok, frame = cap.read()
-            if not ok: continue
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            res = face_mesh.process(frame_rgb)
-            if res.multi_face_landmarks:
-                lm = res.multi_face_landmarks[0].landmark
-                h, w = frame.shape[:2]
-                yaw, pitch, roll = get_yaw_pitch_roll(lm, w, h)
-                calib_samples.append((yaw, pitch, roll))
-            view = cv2.flip(frame, 1)
-            draw_hud(view, False, 0, 0, 0, show_cross=True)
-            try:
-                cv2.imshow("Head Mouse", view)
-            except Exception:
-                pass
-            if cv2.waitKey(1) & 0xFF == 27:
-                cap.release(); cv2.destroyAllWindows(); return
-
-        if calib_samples:
-            neutral_yaw   = sum(s[0] for s in calib_samples) / len(calib_samples)
-            neutral_pitch = sum(s[1] for s in calib_samples) / len(calib_samples)
-            neutral_roll  = sum(s[2] for s in calib_samples) / len(calib_samples)
-        ema_yaw = ema_pitch = ema_roll = 0.0
-        vx_ema = vy_ema = 0.0
-        edge_boost_x = 0.0
-
-        print(f"Pronto. Backend: {backend_name()} | F1: On/Off | F2: EdgeAccel | F3/Shift+F3: Presets | F4: Recalibrar | ESC sai.")
-
+    print(describe(cam_info))
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)); h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    deps.join()
+    if input_deps_error is not None:
+        if isinstance(input_deps_error, ImportError):
+            print(f"Erro: dependência ausente ({input_deps_error}). Instale com: pip install -r requirements.txt")
+        else:
+            print(f"Erro: não foi possível preparar o controle do mouse ({input_deps_error!r}).")
+        cap.release()
+        if ui is not None:
+            ui.close()
+        return 1
+    if args.headless and ui is None and not HAS_GLOBAL_KEYS:
+        print("[AVISO] Headless sem Tk nem hotkeys globais: o controle fica desligado (Ctrl+C sai).")
+
+    with loader.get() as face_mesh:
+        print(loader.report())
+        if import_profiler is not None:
+            import_profiler.uninstall()
+            print(import_profiler.report())
+
+        # captura → inferência → pose → apresentação (esta thread: HUD/Tk)
+        # slots de 1 posição: estágio lento descarta frames, não segura os outros
+        grabber = FrameGrabber(cap, metrics=metrics)
+        pose_in = DropSlot("pose")
+        view_in = DropSlot("view")
+        stages = [
+            Stage("inference", make_inference_stage(face_mesh), grabber.slot, pose_in, metrics),
+            # headless: nada de preview; o estágio de pose libera o frame na hora
+            Stage("pose", pose_stage, pose_in, None if args.headless else view_in, metrics),
+        ]
+        for slot in (grabber.slot, pose_in, view_in):
+            metrics.watch(f"dropped.{slot.name}", lambda s=slot: s.dropped)
+        if inference_throttle is not None:
+            metrics.watch("inference.skipped", lambda: inference_throttle.skipped)
+        if args.output_hz > 0:
+            # lookup tardio: replay/bench trocam main.mouse_move_rel
+            mouse_output = MouseOutputScheduler(lambda dx, dy: mouse_move_rel(dx, dy),
+                                                args.output_hz, metrics=metrics,
+                                                housekeeping=cursor.maybe_resync).start()
+            print(f"[OK] Saída do mouse a {mouse_output.rate_hz:.0f} Hz.")
+        exporter = None
+        if args.metrics_out:
+            exporter = SnapshotExporter(metrics, args.metrics_out, args.metrics_period).start()
+
+        if args.record:
+            session_recorder = SessionRecorder(args.record, w, h)
+            print(f"[Replay] Gravando sessão em {args.record}")
+
+        # neutro salvo para esta câmera/resolução; senão, calibração inicial com cruz
+        if not warm_start(camera_key(source, w, h, cap.getBackendName()), time.monotonic()):
+            print("Calibrando... Olhe para o centro.")
+            start_calibration(time.monotonic())
+        for st in stages: st.start()
+        grabber.start()
+
+        if args.headless:
+            print(f"Pronto (headless). Backend: {backend_name()} | F1: On/Off | F2: EdgeAccel | "
+                  f"F3/Shift+F3: Presets | F4: Recalibrar | Ctrl+C ou fechar os ajustes sai.")
+        else:
+            print(f"Pronto. Backend: {backend_name()} | F1: On/Off | F2: EdgeAccel | F3/Shift+F3: Presets | F4: Recalibrar | ESC sai.")
+
+        # preview limitado: só 1 frame a cada preview_period vira imagem (flip/HUD/imshow)
+        preview_period = 1.0 / args.preview_fps if args.preview_fps > 0 else 0.0
+        preview_scale = min(1.0, max(0.1, args.preview_scale))
+        next_preview = 0.0
         last_key_inwin = 0.0
-        while True:
-            # mantém UI viva e aplica sliders → globais
-            ui.pump()
-            ui.read_into_globals()
-
-            ok, frame = cap.read()
-            if not ok: continue
-
-            # Recalibrar sob demanda
-            if recalib_request:
-                recalib_request = False
-                samples = []
-                t0 = time.time()
-                while time.time() - t0 < CALIBRATION_TIME:
-                    ui.pump()  # UI durante recalibração também
-                    ok2, f2 = cap.read()
-                    if not ok2: continue
-                    rgb2 = cv2.cvtColor(f2, cv2.COLOR_BGR2RGB)
-                    res2 = face_mesh.process(rgb2)
-                    if res2.multi_face_landmarks:
-                        lm2 = res2.multi_face_landmarks[0].landmark
-                        hh, ww = f2.shape[:2]
-                        y2, p2, r2 = get_yaw_pitch_roll(lm2, ww, hh)
-                        samples.append((y2, p2, r2))
-                    view2 = cv2.flip(f2, 1)
-                    draw_hud(view2, False, 0, 0, 0, show_cross=True)
+        ui_preset = current_preset
+        try:
+            while True:
+                # aplica os comandos da UI (sliders/presets/toggles) entre frames
+                if ui is not None:
+                    if metrics.enabled: t0 = time.perf_counter()
+                    ui.poll()
+                    if current_preset != ui_preset:  # trocado por hotkey (F3)
+                        ui_preset = current_preset
+                        ui.sync()
+                    if metrics.enabled: metrics.add("ui", time.perf_counter() - t0)
+
+                if args.headless:
+                    if ui is not None and not ui.alive:
+                        break  # janela de ajustes fechada
+                    time.sleep(0.03)
+                    continue
+
+                tp = view_in.get(timeout=0.03)
+                if tp is not None:
+                    now = time.perf_counter()
+                    if now < next_preview:
+                        tp.release()  # frame já serviu ao rastreamento; preview pula
+                        continue
+                    next_preview = now + preview_period
+                    if metrics.enabled: t0 = now
+                    frame = tp.cap.frame
+                    if preview_scale < 1.0:
+                        fh, fw = frame.shape[:2]
+                        frame = view_bufs.resize(frame, (int(fw * preview_scale), int(fh * preview_scale)),
+                                                 "preview", cv2.INTER_AREA)
+                    view = view_bufs.flip(frame)
+                    view_bufs.tick()
+                    tp.release()
+                    draw_hud(view, tp.enabled, tp.yaw, tp.pitch, tp.roll, show_cross=tp.show_cross)
+                    if metrics.enabled: metrics.add("hud", time.perf_counter() - t0)
                     try:
-                        cv2.imshow("Head Mouse", view2)
+                        cv2.imshow("Head Mouse", view)
                     except Exception:
                         pass
-                    if cv2.waitKey(1) & 0xFF == 27:
-                        cap.release(); cv2.destroyAllWindows(); return
-                if samples:
-                    neutral_yaw   = sum(s[0] for s in samples) / len(samples)
-                    neutral_pitch = sum(s[1] for s in samples) / len(samples)
-                    neutral_roll  = sum(s[2] for s in samples) / len(samples)
-                ema_yaw = ema_pitch = ema_roll = 0.0
-                vx_ema = vy_ema = 0.0
-                edge_boost_x = 0.0
-                continue
-
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = face_mesh.process(frame_rgb)
-
-            yaw = pitch = roll = 0.0
-            if results.multi_face_landmarks:
-                lm = results.multi_face_landmarks[0].landmark
-                h, w = frame.shape[:2]
-                yaw_deg, pitch_deg, roll_deg = get_yaw_pitch_roll(lm, w, h)
-
-                if MIRROR_YAW:   yaw_deg  = -yaw_deg
-                if MIRROR_ROLL:  roll_deg = -roll_deg
-                if MIRROR_PITCH: pitch_deg = -pitch_deg
-
-                yaw_deg   -= neutral_yaw
-                pitch_deg -= neutral_pitch
-
-                ema_yaw   = ema_func(ema_yaw, yaw_deg, ema_alpha)
-                ema_pitch = ema_func(ema_pitch, pitch_deg, ema_alpha)
-
-                yaw, pitch = ema_yaw, ema_pitch
-
-                if control_enabled:
-                    move_mouse_from_angles(yaw, pitch)
-
-            view = cv2.flip(frame, 1)
-            draw_hud(view, control_enabled, yaw, pitch, roll, show_cross=False)
-            try:
-                cv2.imshow("Head Mouse", view)
-            except Exception:
-                pass
-
-            k = cv2.waitKey(1) & 0xFF
-            if k == 27:
-                break
-            if not HAS_GLOBAL_KEYS:
-                # fallback local
-                if k == ord('q') and time.time() - last_key_inwin > _DEBOUNCE:
-                    toggle_control(); last_key_inwin = time.time()
-                if k == ord('e') and time.time() - last_key_inwin > _DEBOUNCE:
-                    toggle_edgeaccel(); last_key_inwin = time.time()
-                if k == ord('r') and time.time() - last_key_inwin > _DEBOUNCE:
-                    next_preset(); last_key_inwin = time.time()
-                if k == ord('c') and time.time() - last_key_inwin > _DEBOUNCE:
-                    request_recalibrate(); last_key_inwin = time.time()
+
+                k = cv2.waitKey(1) & 0xFF
+                if k == 27:
+                    break
+                if not HAS_GLOBAL_KEYS:
+                    # fallback local
+                    if k == ord('q') and time.time() - last_key_inwin > _DEBOUNCE:
+                        toggle_control(); last_key_inwin = time.time()
+                    if k == ord('e') and time.time() - last_key_inwin > _DEBOUNCE:
+                        toggle_edgeaccel(); last_key_inwin = time.time()
+                    if k == ord('r') and time.time() - last_key_inwin > _DEBOUNCE:
+                        next_preset(); last_key_inwin = time.time()
+                    if k == ord('c') and time.time() - last_key_inwin > _DEBOUNCE:
+                        request_recalibrate(); last_key_inwin = time.time()
+        except KeyboardInterrupt:
+            print("\nEncerrando...")
 
         if HAS_GLOBAL_KEYS:
             try: keyboard.unhook_all_hotkeys()
             except Exception: pass
 
+        if ui is not None:
+            ui.close()
+        if exporter is not None:
+            exporter.stop()
+        grabber.stop()
+        for st in stages: st.stop()
+        if mouse_output is not None:
+            mouse_output.stop()
+            print(f"[Mouse] {mouse_output.emitted} movimentos | coalescidos: {mouse_output.coalesced}")
+            mouse_output = None
+        pose_in.close(); view_in.close()
+        print(f"[Captura] frames: {grabber.captured} | descartados: {grabber.dropped} | "
+              f"alocados fora do pool: {grabber.allocated_bytes / 1e6:.1f} MB")
+        print(infer_bufs.report())
+        if inference_throttle is not None:
+            print(inference_throttle.report())
+        if flow_tracker is not None:
+            print(flow_tracker.report())
+        if drift_correction:
+            print(f"[Calibracao] {drift.report()}")
+        persist_neutral()  # inclui a correção de deriva da sessão
+        if _t_ready is not None:
+            print(f"[Partida] pronto para mover em {_t_ready:.2f}s")
+        if not args.headless:
+            print(view_bufs.report())
+        for slot in (pose_in, view_in):
+            print(f"[Pipeline] {slot.name}: {slot.puts} itens | descartados (backpressure): {slot.dropped}")
+
+        if session_recorder is not None:
+            session_recorder.close()
+            print(f"[Replay] {session_recorder.count} frames gravados.")
+            session_recorder = None
+
         cap.release()
-        cv2.destroyAllWindows()
+        if not args.headless:
+            cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""
+Instrumentação do loop quente: histogramas móveis de latência por estágio.
+
+Uso nos estágios (custo zero quando desligado, além do ``if``):
+
+    if metrics.enabled: t0 = time.perf_counter()
+    ...
+    if metrics.enabled: metrics.add("inference", time.perf_counter() - t0)
+
+Cada estágio guarda as últimas ``size`` amostras num anel de tamanho fixo;
+percentis só são calculados quando alguém lê (HUD/Tk/exportação), e o
+resumo fica em cache por ``summary_ttl`` segundos.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class RollingHistogram:
+    """Anel fixo com as últimas ``size`` amostras (em segundos)."""
+
+    __slots__ = ("_buf", "_i", "count", "size")
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self._buf: List[float] = [0.0] * size
+        self._i = 0
+        self.count = 0
+
+    def add(self, v: float):
+        self._buf[self._i] = v
+        self._i = (self._i + 1) % self.size
+        self.count += 1
+
+    def values(self):
+        n = min(self.count, self.size)
+        return np.asarray(self._buf[:n] if n < self.size else self._buf, np.float64)
+
+    def percentiles(self, qs=(50, 99)):
+        v = self.values()
+        if v.size == 0:
+            return [0.0 for _ in qs]
+        return [float(x) for x in np.percentile(v, qs)]
+
+
+class Metrics:
+    """Conjunto de histogramas por estágio + taxa de frames."""
+
+    def __init__(self, enabled: bool = False, size: int = 256, summary_ttl: float = 0.25):
+        self.enabled = enabled
+        self._size = size
+        self._ttl = summary_ttl
+        self._hists: Dict[str, RollingHistogram] = {}
+        self._frames = RollingHistogram(size)  # timestamps dos frames
+        self._summary: Optional[dict] = None
+        self._summary_at = 0.0
+        self._counters: Dict[str, Callable[[], int]] = {}
+
+    def watch(self, name: str, fn: Callable[[], int]):
+        """Registra um contador lido só no resumo (ex.: descartes de um slot)."""
+        self._counters[name] = fn
+
+    def add(self, name: str, dt: float):
+        h = self._hists.get(name)
+        if h is None:
+            h = self._hists[name] = RollingHistogram(self._size)
+        h.add(dt)
+
+    def frame(self, ts: float):
+        """Marca um frame completo (para o FPS)."""
+        self._frames.add(ts)
+
+    def fps(self) -> float:
+        ts = self._frames.values()
+        if ts.size < 2:
+            return 0.0
+        span = ts.max() - ts.min()
+        return float((ts.size - 1) / span) if span > 0 else 0.0
+
+    def summary(self) -> dict:
+        """{"fps": ..., "stages": {nome: {"p50": ms, "p99": ms, "n": ...}}, "counters": ...}"""
+        now = time.monotonic()
+        if self._summary is not None and now - self._summary_at < self._ttl:
+            return self._summary
+        stages = {}
+        for name, h in list(self._hists.items()):
+            p50, p99 = h.percentiles((50, 99))
+            stages[name] = {"p50": p50 * 1000.0, "p99": p99 * 1000.0, "n": h.count}
+        counters = {name: int(fn()) for name, fn in list(self._counters.items())}
+        self._summary = {"fps": self.fps(), "stages": stages, "counters": counters}
+        self._summary_at = now
+        return self._summary
+
+    def hud_line(self, names=("inference", "latency")) -> str:
+        s = self.summary()
+        parts = [f"FPS:{s['fps']:.0f}"]
+        for n in names:
+            st = s["stages"].get(n)
+            if st:
+                parts.append(f"{n} p50/p99:{st['p50']:.1f}/{st['p99']:.1f}ms")
+        return "  ".join(parts)
+
+
+class SnapshotExporter:
+    """
+    Exporta ``metrics.summary()`` em JSON a cada ``period`` segundos.
+
+    ``target``: caminho de arquivo (reescrito a cada snapshot) ou
+    ``udp://host:porta`` (um datagrama por snapshot).
+    """
+
+    def __init__(self, metrics: Metrics, target: str, period: float = 1.0):
+        self._metrics = metrics
+        self._target = target
+        self._period = period
+        self._stop = threading.Event()
+        self._sock = None
+        self._addr = None
+        if target.startswith("udp://"):
+            host, port = target[len("udp://"):].rsplit(":", 1)
+            self._addr = (host, int(port))
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+
+    def start(self) -> "SnapshotExporter":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(1.0)
+        if self._sock is not None:
+            self._sock.close()
+
+    def _run(self):
+        while not self._stop.wait(self._period):
+            snap = dict(self._metrics.summary(), time=time.time())
+            data = json.dumps(snap)
+            try:
+                if self._sock is not None:
+                    self._sock.sendto(data.encode("utf-8"), self._addr)
+                else:
+                    tmp = self._target + ".tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        f.write(data)
+                    os.replace(tmp, self._target)
+            except OSError as e:
+                print(f"[AVISO] Exportação de métricas falhou: {e}")
@@ -0,0 +1,249 @@
+"""
+Saída do mouse em alta frequência, desacoplada da taxa da câmera.
+
+O estágio de pose só publica a velocidade suavizada (px/s) com
+``set_velocity``; uma thread própria integra essa velocidade a 250–1000 Hz
+e emite deltas inteiros pelo backend de sempre (RAW/PyDirectInput/
+PyAutoGUI). A parte fracionária fica acumulada para o próximo tick (nada
+se perde no ``int()``), e se o backend atrasar, o movimento pendente sai
+num único delta (coalescido) em vez de formar fila.
+
+``VirtualCursor`` modela a posição do ponteiro a partir dos deltas emitidos
+(presa aos limites da área de trabalho virtual, com vários monitores), de
+modo que a detecção de borda do EdgeAccelX vira uma conta em memória. A
+posição real só é consultada de tempos em tempos, ou com mais frequência
+enquanto modelo e realidade divergem (ex.: jogo que trava o cursor).
+"""
+import platform
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+MIN_HZ, MAX_HZ = 250, 1000
+
+
+class MouseOutputScheduler:
+    """
+    - ``move_rel(dx, dy)``: backend (recebe inteiros, nunca (0, 0)).
+    - ``rate_hz``: frequência de emissão (limitada a 250–1000 Hz).
+    - ``stale_after``: sem ``set_velocity`` por esse tempo → para (rosto perdido,
+      estágio travado).
+    - ``max_gap``: teto do intervalo integrado num tick (evita salto após pausa longa).
+    - ``housekeeping()``: chamado a cada tick, fora do caminho do frame
+      (ex.: ``VirtualCursor.maybe_resync``).
+
+    Com ``metrics`` ligado, o primeiro movimento emitido depois de cada
+    ``set_velocity(..., capture_ts)`` entra no histograma ``latency``
+    (captura → saída do mouse, relógio ``time.monotonic``).
+    """
+
+    def __init__(self, move_rel: Callable[[int, int], None], rate_hz: float = 500,
+                 stale_after: float = 0.25, max_gap: float = 0.1, metrics=None,
+                 housekeeping: Optional[Callable[[], None]] = None):
+        self._move_rel = move_rel
+        self._housekeeping = housekeeping
+        self.rate_hz = min(MAX_HZ, max(MIN_HZ, float(rate_hz)))
+        self._period = 1.0 / self.rate_hz
+        self._stale_after = stale_after
+        self._max_gap = max_gap
+        self._metrics = metrics
+
+        self._vel = (0.0, 0.0, 0.0)   # (vx px/s, vy px/s, instante da publicação)
+        self._capture_ts: Optional[float] = None  # frame ainda sem movimento emitido
+        self._rem_x = self._rem_y = 0.0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.emitted = 0     # chamadas ao backend
+        self.coalesced = 0   # ticks que cobriram mais de um período (backend atrasado)
+        self.errors = 0
+
+    # ---------- entrada (thread de pose) ----------
+    def set_velocity(self, vx: float, vy: float, capture_ts: Optional[float] = None):
+        """Velocidade alvo em px/s (tupla trocada de uma vez; sem lock)."""
+        self._vel = (vx, vy, time.perf_counter())
+        self._capture_ts = capture_ts
+
+    def stop_motion(self):
+        self._vel = (0.0, 0.0, time.perf_counter())
+        self._rem_x = self._rem_y = 0.0
+
+    # ---------- ciclo de vida ----------
+    def start(self) -> "MouseOutputScheduler":
+        if self._thread is None:
+            _high_res_timer(True)
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="mouse-output", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 1.0):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            _high_res_timer(False)
+
+    # ---------- núcleo ----------
+    def tick(self, now: float, dt: float):
+        """Integra ``dt`` segundos da velocidade atual e emite o delta inteiro."""
+        vx, vy, t_pub = self._vel
+        if now - t_pub > self._stale_after:
+            self._rem_x = self._rem_y = 0.0
+            return
+        if dt > self._period * 1.5:
+            self.coalesced += 1
+        dt = min(dt, self._max_gap)
+
+        self._rem_x += vx * dt
+        self._rem_y += vy * dt
+        ix, iy = int(self._rem_x), int(self._rem_y)  # trunca p/ zero; resto fica
+        if ix == 0 and iy == 0:
+            return
+        self._rem_x -= ix
+        self._rem_y -= iy
+
+        m = self._metrics
+        timed = m is not None and m.enabled
+        if timed: t0 = time.perf_counter()
+        self._move_rel(ix, iy)
+        if timed:
+            m.add("mouse", time.perf_counter() - t0)
+            ts, self._capture_ts = self._capture_ts, None
+            if ts is not None:
+                m.add("latency", time.monotonic() - ts)
+        self.emitted += 1
+
+    def _run(self):
+        perf = time.perf_counter
+        last = perf()
+        next_t = last + self._period
+        while self._running:
+            delay = next_t - perf()
+            if delay > 0:
+                time.sleep(delay)
+            now = perf()
+            try:
+                self.tick(now, now - last)
+                if self._housekeeping is not None:
+                    self._housekeeping()
+            except Exception as e:
+                # ex.: FailSafe do PyAutoGUI → para até a próxima velocidade publicada
+                self.errors += 1
+                self.stop_motion()
+                if self.errors == 1:
+                    print(f"[AVISO] Saída do mouse falhou: {e}")
+            last = now
+            next_t += self._period
+            if next_t < now:            # atrasou mais de um período: não tenta "alcançar"
+                next_t = now + self._period
+
+
+Bounds = Tuple[int, int, int, int]  # esquerda, topo, direita, base (direita/base exclusivas)
+
+
+def virtual_desktop_bounds(fallback_size: Optional[Callable[[], Tuple[int, int]]] = None) -> Bounds:
+    """
+    Limites da área de trabalho virtual (todos os monitores).
+
+    Windows: SM_XVIRTUALSCREEN/SM_CXVIRTUALSCREEN (a origem pode ser negativa).
+    Demais: ``fallback_size()`` (ex.: ``pyautogui.size``; no X11 a janela raiz
+    já cobre todos os monitores).
+    """
+    if platform.system().lower().startswith("win"):
+        try:
+            import ctypes
+            gsm = ctypes.windll.user32.GetSystemMetrics
+            left, top, w, h = gsm(76), gsm(77), gsm(78), gsm(79)
+            if w > 0 and h > 0:
+                return left, top, left + w, top + h
+        except Exception:
+            pass
+    if fallback_size is not None:
+        try:
+            w, h = fallback_size()
+            return 0, 0, int(w), int(h)
+        except Exception:
+            pass
+    return 0, 0, 1920, 1080
+
+
+class VirtualCursor:
+    """
+    Posição esperada do ponteiro, atualizada pelos deltas emitidos.
+
+    - ``query()``: lê a posição real (None = modelo puro, ex.: replay).
+    - ``resync_every``: intervalo normal de ressincronização (s).
+    - ``min_resync``: intervalo enquanto houver divergência (> ``tolerance`` px).
+    """
+
+    def __init__(self, bounds: Bounds, query: Optional[Callable[[], Tuple[int, int]]] = None,
+                 resync_every: float = 1.0, min_resync: float = 0.1, tolerance: float = 8.0):
+        self.bounds = bounds
+        self._query = query
+        self._resync_every = resync_every
+        self._min_resync = min_resync
+        self._tolerance = tolerance
+        self._interval = resync_every
+        self._next_resync = 0.0
+
+        left, top, right, bottom = bounds
+        self.x = (left + right) // 2
+        self.y = (top + bottom) // 2
+        self.resyncs = 0
+        self.mismatches = 0
+
+    def set_bounds(self, bounds: Bounds):
+        """Troca os limites (ex.: tela real conhecida depois da partida) e recentra."""
+        self.bounds = bounds
+        left, top, right, bottom = bounds
+        self.x = (left + right) // 2
+        self.y = (top + bottom) // 2
+        self._next_resync = 0.0
+
+    def moved(self, dx: float, dy: float):
+        left, top, right, bottom = self.bounds
+        self.x = min(max(left, self.x + int(dx)), right - 1)
+        self.y = min(max(top, self.y + int(dy)), bottom - 1)
+
+    def at_left(self, margin: int) -> bool:
+        return self.x <= self.bounds[0] + margin
+
+    def at_right(self, margin: int) -> bool:
+        return self.x >= self.bounds[2] - margin
+
+    def resync(self) -> bool:
+        """Lê a posição real; devolve True se o modelo estava divergente."""
+        if self._query is None:
+            return False
+        try:
+            rx, ry = self._query()
+        except Exception:
+            return False
+        self.resyncs += 1
+        mismatch = abs(rx - self.x) > self._tolerance or abs(ry - self.y) > self._tolerance
+        self.x, self.y = int(rx), int(ry)
+        if mismatch:
+            self.mismatches += 1
+            self._interval = self._min_resync
+        else:
+            self._interval = min(self._resync_every, self._interval * 2)
+        return mismatch
+
+    def maybe_resync(self):
+        now = time.monotonic()
+        if now >= self._next_resync:
+            self.resync()
+            self._next_resync = now + self._interval
+
+
+def _high_res_timer(on: bool):
+    """No Windows, ``time.sleep`` tem granularidade de ~15 ms sem timeBeginPeriod(1)."""
+    if not platform.system().lower().startswith("win"):
+        return
+    try:
+        import ctypes
+        winmm = ctypes.windll.winmm
+        (winmm.timeBeginPeriod if on else winmm.timeEndPeriod)(1)
+    except Exception:
+        pass
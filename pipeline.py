@@ -0,0 +1,133 @@
+"""
+Peças do pipeline em estágios (captura → inferência → pose → apresentação).
+
+Os estágios são ligados por ``DropSlot``: uma fila de uma posição só, com
+política "descarta o mais antigo". Um estágio lento nunca segura o anterior;
+ele apenas perde frames, e cada slot conta quantos itens descartou
+(backpressure). A vazão fica limitada pelo estágio mais lento, e não pela
+soma de todos.
+"""
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+def release_item(item: Any):
+    """Libera recursos de um item do pipeline (buffers de frame), se houver."""
+    rel = getattr(item, "release", None)
+    if rel is not None:
+        try:
+            rel()
+        except Exception:
+            pass
+
+
+class DropSlot:
+    """Fila limitada a 1 item; ``put`` sobrescreve e descarta o item pendente."""
+
+    def __init__(self, name: str, on_drop: Optional[Callable[[Any], None]] = release_item):
+        self.name = name
+        self._on_drop = on_drop
+        self._cond = threading.Condition()
+        self._item: Any = None
+        self._closed = False
+
+        self.puts = 0
+        self.dropped = 0
+
+    def put(self, item: Any) -> bool:
+        """Publica ``item``. Retorna True se um item antigo foi descartado."""
+        with self._cond:
+            old, self._item = self._item, item
+            self.puts += 1
+            if old is not None:
+                self.dropped += 1
+            self._cond.notify()
+        if old is not None and self._on_drop is not None:
+            self._on_drop(old)
+        return old is not None
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Retira o item pendente; espera até ``timeout`` (None = sem limite)."""
+        with self._cond:
+            if self._item is None and not self._closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+        return item
+
+    def close(self):
+        """Acorda quem espera e descarta o item pendente."""
+        with self._cond:
+            self._closed = True
+            item, self._item = self._item, None
+            self._cond.notify_all()
+        if item is not None and self._on_drop is not None:
+            self._on_drop(item)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class Stage:
+    """
+    Thread de um estágio: ``inbox.get()`` → ``fn(item)`` → ``outbox.put()``.
+
+    ``fn`` recebe a posse do item. Se retornar None, o item foi consumido
+    (e liberado por ``fn``); exceções liberam o item e o estágio segue.
+    Com ``metrics`` (metrics.Metrics) ligado, cada chamada de ``fn`` é
+    cronometrada sob o nome do estágio.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], inbox: DropSlot,
+                 outbox: Optional[DropSlot] = None, metrics=None):
+        self.name = name
+        self._fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self._metrics = metrics
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.processed = 0
+        self.errors = 0
+
+    def start(self) -> "Stage":
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 1.0):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            item = self.inbox.get(timeout=0.1)
+            if item is None:
+                if self.inbox.closed:
+                    break
+                continue
+            m = self._metrics
+            timed = m is not None and m.enabled
+            if timed: t0 = time.perf_counter()
+            try:
+                out = self._fn(item)
+            except Exception as e:
+                self.errors += 1
+                if self.errors == 1:
+                    print(f"[AVISO] Estágio '{self.name}' falhou: {e}")
+                release_item(item)
+                continue
+            if timed: m.add(self.name, time.perf_counter() - t0)
+            self.processed += 1
+            if out is None:
+                continue
+            if self.outbox is not None:
+                self.outbox.put(out)
+            else:
+                release_item(out)
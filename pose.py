@@ -0,0 +1,97 @@
+"""
+Kernel vetorizado de pose (yaw/pitch/roll) a partir dos landmarks do FaceMesh.
+
+Só 5 landmarks entram na conta (olhos externos, ponta/base do nariz, testa).
+Eles são extraídos numa passada para um array (..., 5, 2) em pixels, e a
+geometria é feita com operações NumPy — o mesmo código serve para um frame
+ao vivo ou para um lote (N, 478, 3) vindo de replay/testes.
+"""
+import math
+
+import numpy as np
+
+IDX_LEFT_EYE_OUTER = 33
+IDX_RIGHT_EYE_OUTER = 263
+IDX_NOSE_TIP = 1
+IDX_NOSE_BOTTOM = 2
+IDX_FOREHEAD = 10
+
+# ordem das linhas em ``points``
+POSE_IDX = (IDX_LEFT_EYE_OUTER, IDX_RIGHT_EYE_OUTER, IDX_NOSE_TIP, IDX_NOSE_BOTTOM, IDX_FOREHEAD)
+
+YAW_SCALE = 35.0
+PITCH_SCALE = 40.0
+PITCH_OFFSET = 0.6
+
+
+def landmarks_to_points(landmarks, w, h, out=None):
+    """Landmarks do MediaPipe (normalizados) → array (5, 2) em pixels."""
+    if out is None:
+        out = np.empty((len(POSE_IDX), 2), np.float64)
+    for row, i in enumerate(POSE_IDX):
+        p = landmarks[i]
+        out[row, 0] = p.x
+        out[row, 1] = p.y
+    out[:, 0] *= w
+    out[:, 1] *= h
+    return out
+
+
+def mesh_to_points(mesh, w, h):
+    """Lote de malhas normalizadas (N, 478, 2|3) → pontos (N, 5, 2) em pixels."""
+    mesh = np.asarray(mesh, np.float64)
+    return mesh[..., POSE_IDX, :2] * np.array([w, h], np.float64)
+
+
+def yaw_pitch_roll_from_points(points):
+    """
+    Pontos (..., 5, 2) em pixels → (yaw, pitch, roll) em graus, cada um com
+    shape (...). Pitch positivo = cabeça para BAIXO.
+
+    Um único frame (5, 2) devolve floats: com só 5 pontos, o overhead por
+    chamada de ufunc custa mais que a conta, então usa-se a mesma fórmula
+    em escalares.
+    """
+    p = np.asarray(points, np.float64)
+    if p.ndim == 2:
+        return _yaw_pitch_roll_single(p)
+    le, re = p[..., 0, :], p[..., 1, :]
+    nose, nose_b, forehead = p[..., 2, :], p[..., 3, :], p[..., 4, :]
+    eye_center = (le + re) * 0.5
+
+    # roll (HUD), dobrado para (-90, 90]
+    d = re - le
+    roll = np.degrees(np.arctan2(d[..., 1], d[..., 0]))
+    roll = np.where(roll > 90, roll - 180, roll)
+    roll = np.where(roll < -90, roll + 180, roll)
+
+    # yaw
+    yaw = (nose[..., 0] - eye_center[..., 0]) / np.maximum(1, d[..., 0])
+    yaw_deg = yaw * YAW_SCALE
+
+    # pitch
+    ref = np.maximum(1, np.abs(eye_center[..., 1] - nose_b[..., 1]))
+    pitch = ((nose_b[..., 1] - forehead[..., 1]) / ref) - PITCH_OFFSET
+    pitch_deg = pitch * PITCH_SCALE
+
+    return yaw_deg, pitch_deg, roll
+
+
+def _yaw_pitch_roll_single(p):
+    (lx, ly), (rx, ry), (nx, _), (_, by), (_, fy) = p.tolist()
+    ecx, ecy = (lx + rx) * 0.5, (ly + ry) * 0.5
+
+    roll = math.degrees(math.atan2(ry - ly, rx - lx))
+    if roll > 90: roll -= 180
+    if roll < -90: roll += 180
+
+    yaw_deg = (nx - ecx) / max(1, rx - lx) * YAW_SCALE
+    ref = max(1, abs(ecy - by))
+    pitch_deg = (((by - fy) / ref) - PITCH_OFFSET) * PITCH_SCALE
+    return yaw_deg, pitch_deg, roll
+
+
+def yaw_pitch_roll_batch(mesh, w, h):
+    """Lote (N, 478, 3) normalizado → array (N, 3) com yaw/pitch/roll."""
+    yaw, pitch, roll = yaw_pitch_roll_from_points(mesh_to_points(mesh, w, h))
+    return np.stack([yaw, pitch, roll], axis=-1)
@@ -0,0 +1,331 @@
+"""
+Gravação de sessões e replay determinístico do pipeline de movimento.
+
+Formato ``.fprec`` (little-endian, mapeável com ``numpy.memmap``):
+
+- cabeçalho de 32 bytes: magic ``FPREC001``, versão, largura, altura,
+  tamanho do registro;
+- N registros ``RECORD_DTYPE``: timestamp monotônico de captura, sequência,
+  flag de rosto, yaw/pitch/roll crus e os 5 landmarks de pose (px).
+
+O replay alimenta ``main.process_angles`` (calibração, EMA, deadzone/ganho,
+EdgeAccelX) com os timestamps gravados, sem câmera, sem MediaPipe e sem
+mouse real: o backend ativo vira um ``RecordingBackend`` e os deltas
+emitidos formam o fluxo de saída.
+
+``score_angles`` compara os ângulos que dirigem o mouse com uma referência
+sem filtro nem predição (atraso, tremor parado e overshoot nas paradas);
+``replay.py --score`` mede isso para várias forças de predição.
+
+Uso:
+    python main.py --record sessao.fprec
+    python replay.py sessao.fprec --preset 0 --out deltas.csv
+    python replay.py sessao.fprec --preset 0 --score 0,0.5,1
+"""
+import argparse
+import copy
+import struct
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from backends import RecordingBackend
+from calibration import DriftCorrector, NeutralCalibrator
+from mouse_output import VirtualCursor
+from pose import POSE_IDX, yaw_pitch_roll_from_points
+
+MAGIC = b"FPREC001"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIII8x")  # magic, versão, w, h, tamanho do registro
+HEADER_SIZE = _HEADER.size
+
+RECORD_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("seq", "<u4"),
+    ("face", "u1"),
+    ("_pad", "u1", (3,)),
+    ("ypr", "<f4", (3,)),
+    ("points", "<f4", (len(POSE_IDX), 2)),
+])
+
+DELTA_DTYPE = np.dtype([("ts", "<f8"), ("dx", "<f8"), ("dy", "<f8"),
+                        ("yaw", "<f8"), ("pitch", "<f8"), ("track", "u1")])
+
+DEFAULT_SCREEN = (1920, 1080)
+
+# globais de ``main`` que o replay altera; voltam ao valor anterior no fim
+_REPLAY_GLOBALS = (
+    "mouse_backend", "cursor", "mouse_output", "control_enabled", "recalib_request", "current_preset",
+    # preset (o usuário pode ter mexido nos sliders depois de aplicá-lo)
+    "deadzone_deg", "gain_yaw", "gain_pitch", "gain_power", "max_speed_px", "ema_alpha", "vel_ema_alpha",
+    "edge_margin", "edge_accel_max", "edge_accel_rate", "edge_decay_rate", "yaw_strong_deg",
+    "yaw_strong_rate", "predict_strength", "drift_correction",
+    # neutro e calibração
+    "neutral_yaw", "neutral_pitch", "neutral_roll", "neutral_known", "calibrator", "drift",
+    "warm_validator", "warm_mismatch",
+    # estado do movimento (filtros trocados por cópias zeradas durante o replay)
+    "ema_yaw", "ema_pitch", "ema_roll", "vx_ema", "vy_ema", "edge_boost_x", "frame_dt",
+    "_last_frame_ts", "_last_time", "_rem_x", "_rem_y", "euro_yaw", "euro_pitch", "pred_yaw", "pred_pitch",
+    "ANGLE_FILTER", "pipeline_latency",
+)
+
+
+class SessionRecorder:
+    """Grava um registro por frame; ``write`` é chamado pelo estágio de pose."""
+
+    def __init__(self, path: str, w: int, h: int):
+        self.path = path
+        self._f = open(path, "wb")
+        self._f.write(_HEADER.pack(MAGIC, VERSION, int(w), int(h), RECORD_DTYPE.itemsize))
+        self._rec = np.zeros(1, RECORD_DTYPE)
+        self.count = 0
+
+    def write(self, ts: float, seq: int, ypr=None, points=None):
+        rec = self._rec[0]
+        rec["ts"] = ts
+        rec["seq"] = seq
+        rec["face"] = 1 if ypr is not None else 0
+        rec["ypr"] = ypr if ypr is not None else 0.0
+        rec["points"] = points if points is not None else 0.0
+        self._f.write(self._rec.tobytes())
+        self.count += 1
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def load_session(path: str):
+    """Devolve (cabeçalho, registros) com os registros em ``np.memmap``."""
+    with open(path, "rb") as f:
+        magic, version, w, h, rec_size = _HEADER.unpack(f.read(HEADER_SIZE))
+    if magic != MAGIC:
+        raise ValueError(f"{path}: não é uma sessão FacePilot")
+    if rec_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: versão {version} com registro de {rec_size} bytes não suportada")
+    header = {"version": version, "w": w, "h": h}
+    recs = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE)
+    return header, recs
+
+
+def replay_session(path: str, preset: Optional[int] = None,
+                   neutral: Optional[tuple] = None, use_points: bool = True,
+                   screen: Tuple[int, int] = DEFAULT_SCREEN, angle_filter: Optional[str] = None,
+                   overrides: Optional[dict] = None, latency: float = 0.05,
+                   drift: Optional[DriftCorrector] = None):
+    """
+    Reproduz uma sessão pelo pipeline de movimento de ``main``.
+
+    - ``preset``: índice do preset (None = preset atual).
+    - ``neutral``: (yaw, pitch, roll) fixo; None = calibra no início da
+      sessão, como ao vivo.
+    - ``use_points``: recalcula os ângulos pelos landmarks gravados (passa
+      pelo kernel de pose); False usa os ângulos gravados.
+    - ``screen``: tela simulada para a detecção de borda (fixa, para o
+      resultado não depender do monitor de quem roda o replay).
+    - ``angle_filter``: "ema" ou "one_euro" (None = o configurado em ``main``).
+    - ``overrides``: globais de ``main`` sobrescritos depois do preset
+      (ex.: ``{"predict_strength": 0.5}``).
+    - ``latency``: latência captura → saída (s) usada pela predição; a
+      sessão não a grava, então fica fixa.
+    - ``drift``: corretor de deriva usado no replay (para ler o ``report()``
+      depois); None = um novo.
+
+    Os globais de ``main`` tocados (inclusive os de ``overrides``) voltam ao
+    valor anterior no fim: replays seguidos não dependem da ordem.
+
+    Devolve um array ``DELTA_DTYPE`` (um item por frame) com o movimento
+    emitido naquele frame e os ângulos (yaw/pitch) que o dirigiram;
+    ``track`` = rosto presente e fora da calibração.
+    """
+    import main as core
+
+    _, recs = load_session(path)
+    out = np.zeros(len(recs), DELTA_DTYPE)
+    if len(recs) == 0:
+        return out
+
+    if use_points:
+        yaw, pitch, roll = yaw_pitch_roll_from_points(recs["points"])
+        ypr = np.stack([yaw, pitch, roll], axis=-1)
+    else:
+        ypr = recs["ypr"].astype(np.float64)
+    ts = recs["ts"]
+    face = recs["face"]
+
+    cursor = VirtualCursor((0, 0, screen[0], screen[1]))  # modelo puro, sem consultar o SO
+    sink = RecordingBackend()
+
+    saved = {k: getattr(core, k) for k in (*_REPLAY_GLOBALS, *(overrides or {}))}
+    try:
+        for k in ("euro_yaw", "euro_pitch", "pred_yaw", "pred_pitch"):
+            setattr(core, k, copy.copy(saved[k]))
+        core.calibrator = NeutralCalibrator(max_time=core.CALIBRATION_TIME)
+        core.drift = drift if drift is not None else DriftCorrector()
+        core.warm_validator = NeutralCalibrator(max_time=core.WARM_VALIDATE_TIME)
+        core.mouse_backend = sink
+        core.cursor = cursor
+        core.mouse_output = None  # um delta por frame
+        core.apply_preset(saved["current_preset"] if preset is None else preset, silent=True)
+        for k, v in (overrides or {}).items():
+            setattr(core, k, v)
+        core.pipeline_latency = latency
+        core.control_enabled = True
+        core.recalib_request = False
+        core.reset_motion_state()
+        if angle_filter is not None:
+            core.ANGLE_FILTER = angle_filter
+        if neutral is None:
+            core.start_calibration(float(ts[0]))
+        else:
+            core.neutral_yaw, core.neutral_pitch, core.neutral_roll = neutral
+
+        for i in range(len(recs)):
+            n0 = len(sink.deltas)
+            t = float(ts[i])
+            angles = tuple(ypr[i].tolist()) if face[i] else None
+            yaw, pitch, cross = core.process_angles(angles, t, t)
+            new = sink.deltas[n0:]
+            out[i] = (t, sum(d[0] for d in new), sum(d[1] for d in new), yaw, pitch,
+                      angles is not None and not cross)
+    finally:
+        for k, v in saved.items():
+            setattr(core, k, v)
+    return out
+
+
+def score_angles(ts, ref, out, still_speed: float = 5.0, max_lag: float = 0.3) -> dict:
+    """
+    Compara um eixo de ``out`` (ângulos que dirigem o mouse) com ``ref`` (o
+    mesmo eixo sem filtro nem predição), em graus:
+
+    - ``lag_ms``: deslocamento que maximiza a correlação das variações
+      (negativo = adiantado);
+    - ``jitter``: RMS da 2ª diferença de ``out`` com a referência parada;
+    - ``overshoot``: média, por parada, de quanto ``out`` passa do ponto
+      final na direção do movimento.
+    """
+    ts, ref, out = (np.asarray(a, np.float64) for a in (ts, ref, out))
+    res = {"lag_ms": 0.0, "jitter": 0.0, "overshoot": 0.0, "stops": 0}
+    if len(ts) < 8:
+        return res
+    dt = float(np.median(np.diff(ts)))
+    ref_s = np.convolve(np.pad(ref, 2, mode="edge"), np.ones(5) / 5.0, mode="valid")
+    still = np.abs(np.gradient(ref_s, ts)) < still_speed
+
+    out_s = np.convolve(np.pad(out, 2, mode="edge"), np.ones(5) / 5.0, mode="valid")
+    dr, do = np.diff(ref_s), np.diff(out_s)
+    n = len(dr)
+    k_max = min(int(round(max_lag / dt)), n // 2)
+    ks = np.arange(-(k_max // 3), k_max + 1)
+    corr = np.array([np.dot(dr[:n - k], do[k:]) if k >= 0 else np.dot(dr[-k:], do[:n + k]) for k in ks])
+    i = int(np.argmax(corr))
+    lag = float(ks[i])
+    if 0 < i < len(ks) - 1:  # vértice da parábola: resolução abaixo de um frame
+        c0, c1, c2 = corr[i - 1], corr[i], corr[i + 1]
+        den = c0 - 2.0 * c1 + c2
+        if den < 0:
+            lag += 0.5 * (c0 - c2) / den
+    res["lag_ms"] = lag * dt * 1000.0
+
+    d2 = out[2:] - 2.0 * out[1:-1] + out[:-2]
+    mask = still[1:-1]
+    if mask.any():
+        res["jitter"] = float(np.sqrt(np.mean(d2[mask] ** 2)))
+
+    window = max(1, int(round(0.5 / dt)))
+    starts = np.flatnonzero(still[:-1] & ~still[1:]) + 1   # parado → movendo
+    stops = np.flatnonzero(~still[:-1] & still[1:]) + 1    # movendo → parado
+    overs = []
+    for e in stops:
+        before = starts[starts < e]
+        if len(before) == 0:
+            continue
+        direction = np.sign(ref_s[e] - ref_s[before[-1]])
+        nxt = starts[starts > e]
+        end = min(e + window, nxt[0] if len(nxt) else len(out))
+        overs.append(max(0.0, float(np.max(direction * (out[e:end] - ref_s[e])))))
+    if overs:
+        res["overshoot"] = float(np.mean(overs))
+        res["stops"] = len(overs)
+    return res
+
+
+def score_session(path: str, strengths=(0.0, 0.5, 1.0), **kw):
+    """
+    Replay da sessão com cada força de predição em ``strengths`` contra uma
+    referência sem filtro (ema_alpha = 1) nem predição. ``kw`` vai para
+    ``replay_session``. Devolve [(força, métricas yaw, métricas pitch)].
+    """
+    over = dict(kw.pop("overrides", None) or {})
+    ref = replay_session(path, overrides={**over, "ema_alpha": 1.0, "predict_strength": 0.0},
+                         **{**kw, "angle_filter": "ema"})
+    rows = []
+    for s in strengths:
+        out = replay_session(path, overrides={**over, "predict_strength": float(s)}, **kw)
+        m = (ref["track"] != 0) & (out["track"] != 0)
+        rows.append((float(s),
+                     score_angles(out["ts"][m], ref["yaw"][m], out["yaw"][m]),
+                     score_angles(out["ts"][m], ref["pitch"][m], out["pitch"][m])))
+    return rows
+
+
+def _main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay determinístico de uma sessão gravada")
+    ap.add_argument("session", help="arquivo .fprec gravado com main.py --record")
+    ap.add_argument("--preset", type=int, default=None, help="índice do preset")
+    ap.add_argument("--recorded-angles", action="store_true",
+                    help="usa yaw/pitch/roll gravados em vez de recalcular pelos landmarks")
+    ap.add_argument("--filter", choices=("ema", "one_euro"), default=None, help="filtro dos ângulos")
+    ap.add_argument("--predict", type=float, default=None, help="força da predição (None = a do preset)")
+    ap.add_argument("--drift", choices=("on", "off"), default=None,
+                    help="correção contínua da deriva do neutro (None = a do preset)")
+    ap.add_argument("--latency", type=float, default=0.05, help="latência captura → saída para a predição (s)")
+    ap.add_argument("--score", metavar="FORÇAS",
+                    help="compara forças de predição (ex.: 0,0.5,1): atraso, tremor e overshoot")
+    ap.add_argument("--screen", default="%dx%d" % DEFAULT_SCREEN, help="tela simulada LxA")
+    ap.add_argument("--out", metavar="CSV", help="salva o fluxo de deltas (ts,dx,dy)")
+    args = ap.parse_args(argv)
+    screen = tuple(int(v) for v in args.screen.lower().split("x"))
+    overrides = {}
+    if args.predict is not None:
+        overrides["predict_strength"] = args.predict
+    if args.drift is not None:
+        overrides["drift_correction"] = args.drift == "on"
+
+    if args.score:
+        rows = score_session(args.session, [float(v) for v in args.score.split(",")], preset=args.preset,
+                             use_points=not args.recorded_angles, screen=screen,
+                             angle_filter=args.filter, latency=args.latency, overrides=overrides)
+        print("[Score] força | atraso yaw/pitch (ms) | tremor yaw/pitch (°) | overshoot yaw/pitch (°)")
+        for s, my, mp in rows:
+            print(f"[Score] {s:5.2f} | {my['lag_ms']:+6.0f} / {mp['lag_ms']:+6.0f} | "
+                  f"{my['jitter']:.3f} / {mp['jitter']:.3f} | "
+                  f"{my['overshoot']:.2f} / {mp['overshoot']:.2f} ({my['stops']}/{mp['stops']} paradas)")
+        return
+
+    t0 = time.perf_counter()
+    drift = DriftCorrector()
+    deltas = replay_session(args.session, args.preset, use_points=not args.recorded_angles,
+                            screen=screen, angle_filter=args.filter, overrides=overrides,
+                            latency=args.latency, drift=drift)
+    elapsed = time.perf_counter() - t0
+
+    n = len(deltas)
+    span = float(deltas["ts"][-1] - deltas["ts"][0]) if n > 1 else 0.0
+    speed = span / elapsed if elapsed > 0 else float("inf")
+    print(f"[Replay] {n} frames ({span:.1f}s de sessão) em {elapsed * 1000:.1f} ms  → {speed:.0f}x tempo real")
+    print(f"[Replay] deslocamento total dx/dy: {deltas['dx'].sum():+.1f}/{deltas['dy'].sum():+.1f} px | "
+          f"frames com movimento: {int(np.count_nonzero((deltas['dx'] != 0) | (deltas['dy'] != 0)))}")
+    print(f"[Replay] {drift.report()}")
+
+    if args.out:
+        np.savetxt(args.out, np.column_stack([deltas["ts"], deltas["dx"], deltas["dy"]]),
+                   delimiter=",", header="ts,dx,dy", comments="", fmt="%.6f")
+        print(f"[Replay] deltas salvos em {args.out}")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# módulos do app ficam na raiz do repositório (sem pacote)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_session(tmp_path):
+    """
+    Grava uma sessão ``.fprec`` sintética. ``frame(t)`` devolve
+    (yaw, pitch, roll) ou os pontos (5, 2) do kernel de pose; None = sem rosto.
+    """
+    import numpy as np
+
+    from pose import yaw_pitch_roll_from_points
+    from replay import SessionRecorder
+
+    def make(name, frame, fps=30.0, duration=10.0, t0=100.0):
+        path = str(tmp_path / name)
+        rec = SessionRecorder(path, 640, 480)
+        for i in range(int(round(duration * fps))):
+            t = i / fps
+            x = frame(t)
+            if x is None:
+                rec.write(t0 + t, i + 1)
+                continue
+            x = np.asarray(x, np.float64)
+            if x.ndim == 2:
+                rec.write(t0 + t, i + 1, yaw_pitch_roll_from_points(x), x)
+            else:
+                rec.write(t0 + t, i + 1, x)
+        rec.close()
+        return path
+
+    return make
@@ -0,0 +1,194 @@
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+import camera
+from camera import CaptureMode
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("FACEPILOT_HOME", str(tmp_path))
+    return tmp_path
+
+
+def fourcc(s):
+    return cv2.VideoWriter_fourcc(*s)
+
+
+# ---------- parse_mode / rank_modes ----------
+def test_parse_mode():
+    assert camera.parse_mode("640x480@60:mjpg") == CaptureMode("MJPG", 640, 480, 60.0)
+    assert camera.parse_mode("1280X720") == CaptureMode("", 1280, 720, 30.0)
+    assert camera.parse_mode("320x240@120") == CaptureMode("", 320, 240, 120.0)
+    with pytest.raises(ValueError):
+        camera.parse_mode("640@30")
+
+
+def test_rank_modes_prefers_fps_then_area_then_uncompressed():
+    modes = [CaptureMode("MJPG", 1280, 720, 60), CaptureMode("YUYV", 640, 480, 30),
+             CaptureMode("MJPG", 640, 480, 60), CaptureMode("YUYV", 640, 480, 60),
+             CaptureMode("YUYV", 320, 240, 120)]
+    ranked = camera.rank_modes(modes, (640, 480))
+    assert ranked[:4] == [CaptureMode("YUYV", 640, 480, 60), CaptureMode("MJPG", 640, 480, 60),
+                          CaptureMode("MJPG", 1280, 720, 60), CaptureMode("YUYV", 640, 480, 30)]
+    assert ranked[-1] == CaptureMode("YUYV", 320, 240, 120)  # abaixo do alvo: só em último caso
+
+
+def test_rank_modes_below_target_prefers_largest():
+    modes = [CaptureMode("YUYV", 320, 240, 30), CaptureMode("YUYV", 424, 240, 30)]
+    assert camera.rank_modes(modes, (640, 480))[0].width == 424
+
+
+# ---------- V4L2 ----------
+class FakeV4L2:
+    """Driver falso: YUYV discreto e MJPG stepwise (tamanho e intervalo)."""
+
+    def __init__(self):
+        self.formats = [fourcc("YUYV"), fourcc("MJPG")]
+        self.yuyv = {(640, 480): [(1, 30), (1, 15)], (1280, 720): [(1, 10)]}
+
+    def __call__(self, req, buf):
+        if req == camera._VIDIOC_ENUM_FMT:
+            i = struct.unpack_from("<I", buf, 0)[0]
+            if i >= len(self.formats):
+                return False
+            struct.pack_into("<I", buf, 44, self.formats[i])
+            return True
+        if req == camera._VIDIOC_ENUM_FRAMESIZES:
+            i, pix = struct.unpack_from("<II", buf, 0)
+            if pix == fourcc("YUYV"):
+                sizes = list(self.yuyv)
+                if i >= len(sizes):
+                    return False
+                struct.pack_into("<III", buf, 8, 1, *sizes[i])
+                return True
+            if i > 0:
+                return False
+            struct.pack_into("<7I", buf, 8, 3, 320, 1280, 16, 240, 720, 16)  # stepwise
+            return True
+        if req == camera._VIDIOC_ENUM_FRAMEINTERVALS:
+            i, pix, w, h = struct.unpack_from("<IIII", buf, 0)
+            if pix == fourcc("YUYV"):
+                ivals = self.yuyv[(w, h)]
+                if i >= len(ivals):
+                    return False
+                struct.pack_into("<III", buf, 16, 1, *ivals[i])
+                return True
+            if i > 0:
+                return False
+            struct.pack_into("<III", buf, 16, 3, 1, 60)  # stepwise: intervalo mínimo 1/60
+            return True
+        return False
+
+
+def test_v4l2_struct_sizes_match_ioctl_numbers():
+    assert struct.calcsize("<III32sII12x") == (camera._VIDIOC_ENUM_FMT >> 16) & 0x3FFF == 64
+    assert struct.calcsize("<III32x") == (camera._VIDIOC_ENUM_FRAMESIZES >> 16) & 0x3FFF == 44
+    assert struct.calcsize("<IIIII32x") == (camera._VIDIOC_ENUM_FRAMEINTERVALS >> 16) & 0x3FFF == 52
+
+
+def test_enum_v4l2_modes_decodes_discrete_and_stepwise():
+    modes = camera.enum_v4l2_modes(FakeV4L2())
+    assert modes[:3] == [CaptureMode("YUYV", 640, 480, 30.0), CaptureMode("YUYV", 640, 480, 15.0),
+                         CaptureMode("YUYV", 1280, 720, 10.0)]
+    mjpg = {(m.width, m.height) for m in modes if m.fourcc == "MJPG"}
+    assert mjpg == {(320, 240), (640, 480), (800, 600), (960, 540), (1280, 720)}
+    assert all(m.fps == 60.0 for m in modes if m.fourcc == "MJPG")
+    assert camera.rank_modes(modes)[0] == CaptureMode("MJPG", 640, 480, 60.0)
+
+
+# ---------- negociação ----------
+class FakeCapture:
+    """Captura falsa: aceita só os modos de ``supported`` (fourcc, w, h) e FPS até ``max_fps``."""
+
+    def __init__(self, supported, max_fps=30.0):
+        self.supported = supported
+        self.max_fps = max_fps
+        self.props = {cv2.CAP_PROP_FOURCC: fourcc("YUYV"), cv2.CAP_PROP_FRAME_WIDTH: 640,
+                      cv2.CAP_PROP_FRAME_HEIGHT: 480, cv2.CAP_PROP_FPS: 30.0, cv2.CAP_PROP_BUFFERSIZE: 4}
+        self.pending = {}
+
+    def set(self, prop, value):
+        self.pending[prop] = value
+        if prop in (cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FPS, cv2.CAP_PROP_BUFFERSIZE):
+            want = {**self.props, **self.pending}
+            mode = (camera.fourcc_str(want[cv2.CAP_PROP_FOURCC]), int(want[cv2.CAP_PROP_FRAME_WIDTH]),
+                    int(want[cv2.CAP_PROP_FRAME_HEIGHT]))
+            if mode in self.supported:
+                self.props.update(want)
+                self.props[cv2.CAP_PROP_FPS] = min(self.max_fps, want[cv2.CAP_PROP_FPS])
+            self.pending = {}
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0)
+
+    def read(self):
+        return True, None
+
+
+def test_negotiate_probes_ranks_and_saves():
+    cap = FakeCapture({("MJPG", 640, 480), ("YUYV", 640, 480), ("MJPG", 1280, 720)}, max_fps=60)
+    info = camera.negotiate(cap, "k", list_modes=lambda: camera.enum_v4l2_modes(FakeV4L2()))
+    assert info["origin"] == "sondado"
+    assert info["mode"] == CaptureMode("MJPG", 640, 480, 60.0)
+    assert info["buffersize"] == 1
+    assert camera.load_saved_mode("k") == CaptureMode("MJPG", 640, 480, 60.0)
+
+
+def test_negotiate_trial_probing_without_mode_list():
+    cap = FakeCapture({("YUY2", 640, 480)})
+    info = camera.negotiate(cap, "k")
+    assert info["origin"] == "sondado"
+    assert info["mode"] == CaptureMode("YUY2", 640, 480, 30.0)
+
+
+def test_negotiate_uses_saved_mode_without_probing():
+    camera.save_mode("k", CaptureMode("MJPG", 1280, 720, 30.0), 30.0)
+    cap = FakeCapture({("MJPG", 1280, 720)})
+    info = camera.negotiate(cap, "k", list_modes=lambda: pytest.fail("não deveria sondar"))
+    assert info["origin"] == "salvo"
+    assert info["mode"] == CaptureMode("MJPG", 1280, 720, 30.0)
+
+
+def test_negotiate_reprobes_when_saved_mode_is_rejected():
+    camera.save_mode("k", CaptureMode("MJPG", 1920, 1080, 30.0), 30.0)
+    cap = FakeCapture({("YUYV", 640, 480)})
+    info = camera.negotiate(cap, "k", list_modes=lambda: [CaptureMode("YUYV", 640, 480, 30.0)])
+    assert info["origin"] == "sondado"
+    assert info["mode"] == CaptureMode("YUYV", 640, 480, 30.0)
+    assert camera.load_saved_mode("k") == CaptureMode("YUYV", 640, 480, 30.0)
+
+
+def test_negotiate_forced_mode_is_not_saved():
+    cap = FakeCapture({("MJPG", 1280, 720)})
+    info = camera.negotiate(cap, "k", force=CaptureMode("MJPG", 1280, 720, 30.0))
+    assert info["origin"] == "forçado"
+    assert camera.load_saved_mode("k") is None
+
+
+def test_negotiate_falls_back_to_driver_mode(capsys):
+    cap = FakeCapture(set())
+    info = camera.negotiate(cap, "k", force=CaptureMode("MJPG", 1280, 720, 30.0))
+    assert info["origin"] == "padrão"
+    assert info["mode"] == CaptureMode("YUYV", 640, 480, 30.0)
+    assert "[AVISO]" in capsys.readouterr().out
+
+
+def test_open_camera_file_source(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, fourcc("MJPG"), 30, (320, 240))
+    if not writer.isOpened():
+        pytest.skip("OpenCV sem codificador MJPG")
+    for _ in range(5):
+        writer.write(np.zeros((240, 320, 3), np.uint8))
+    writer.release()
+    cap, info = camera.open_camera(path)
+    try:
+        assert info["origin"] == "arquivo"
+        assert (info["mode"].width, info["mode"].height) == (320, 240)
+    finally:
+        cap.release()
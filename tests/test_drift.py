@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from calibration import DriftCorrector
+from pose import yaw_pitch_roll_from_points
+from replay import replay_session, score_session
+
+FPS = 30.0
+DT = 1.0 / FPS
+
+# rosto frontal (olhos, ponta/base do nariz, testa) em px; o nariz desloca o yaw
+BASE = np.array([[280, 200], [360, 200], [320, 260], [320, 270], [320, 140]], np.float64)
+
+
+def yaw_per_px():
+    a, b = BASE.copy(), BASE.copy()
+    a[2, 0] -= 5
+    b[2, 0] += 5
+    return (yaw_pitch_roll_from_points(b)[0] - yaw_pitch_roll_from_points(a)[0]) / 10.0
+
+
+def test_drift_corrector_converges_on_resting_offset():
+    d = DriftCorrector()
+    neutral = 0.0
+    for _ in range(int(20 * FPS)):
+        dy, _ = d.update(1.5 - neutral, 0.0, DT, bound=2.0)
+        neutral += dy
+    assert neutral == pytest.approx(1.5, abs=0.05)
+    assert d.applied > 0
+
+
+def test_drift_corrector_rate_and_bounds():
+    d = DriftCorrector(max_rate=0.3)
+    total = 0.0
+    for _ in range(int(3 * FPS)):
+        total += d.update(1.8, 0.0, DT, bound=2.0)[0]
+    assert 0 < total <= 0.3 * (3 - d.hold) + 1e-9  # só depois de hold, no máx. max_rate °/s
+
+    held = DriftCorrector()
+    for _ in range(int(10 * FPS)):
+        assert held.update(8.0, 0.0, DT, bound=2.0) == (0.0, 0.0)  # cabeça virada de propósito
+
+    capped = DriftCorrector(max_total=0.5, max_rate=5.0)
+    neutral = 0.0
+    for _ in range(int(20 * FPS)):
+        neutral += capped.update(1.5 - neutral, 0.0, DT, bound=2.0)[0]
+    assert neutral == pytest.approx(0.5)
+
+
+@pytest.fixture
+def drift_session(make_session):
+    """
+    90 s: a postura de descanso deriva 5° de yaw em 60 s; viradas de ±10°
+    entre descansos de 3–6 s, com ruído nos landmarks. Devolve (arquivo, máscara de descanso).
+    """
+    rng = np.random.default_rng(3)
+    duration = 90.0
+    k = yaw_per_px()
+    script, t = [], 0.0
+    while t < duration:
+        r = rng.uniform(3, 6)
+        script.append((t, t + r, 0.0))
+        t += r
+        h = rng.uniform(1.5, 3)
+        script.append((t, t + h, float(rng.choice([-10.0, 10.0]))))
+        t += h
+    n = int(duration * FPS)
+    rest = np.zeros(n, bool)
+    noise = rng.normal(0, 0.3, (n, 5, 2))
+
+    def target(t):
+        return next(s[2] for s in script if s[0] <= t < s[1])
+
+    for i in range(n):
+        rest[i] = target(i / FPS) == 0.0 and i / FPS > 3.0
+
+    def frame(t):
+        p = BASE.copy()
+        p[2, 0] += (target(t) + 5.0 * min(1.0, t / 60.0)) / k
+        return p + noise[int(round(t * FPS))]
+
+    return make_session("drift.fprec", frame, fps=FPS, duration=duration), rest
+
+
+def rest_motion(path, rest, drift_on):
+    d = replay_session(path, preset=1, overrides={"drift_correction": drift_on, "EDGE_ACCEL_ENABLED": False})
+    return float(np.abs(d["dx"][rest]).sum()), float(np.abs(d["dx"][~rest]).sum())
+
+
+def test_drift_correction_removes_creep_at_rest(drift_session):
+    path, rest = drift_session
+    creep_off, turns_off = rest_motion(path, rest, False)
+    creep_on, turns_on = rest_motion(path, rest, True)
+    assert creep_off > 5000           # sem correção o cursor anda sozinho no descanso
+    assert creep_on < 0.15 * creep_off
+    assert turns_on == pytest.approx(turns_off, rel=0.1)  # viradas intencionais preservadas
+
+
+def test_score_session_on_drift_session(drift_session):
+    path, _ = drift_session
+    rows = score_session(path, (0.0, 0.5), preset=1, overrides={"drift_correction": True})
+    (s0, yaw0, _), (s1, yaw1, _) = rows
+    assert (s0, s1) == (0.0, 0.5)
+    assert yaw0["stops"] > 5
+    assert yaw1["lag_ms"] < yaw0["lag_ms"]  # predição adianta a resposta
+
+
+def main_state():
+    import main
+    state = {}
+    for k, v in vars(main).items():
+        if k.startswith("__") or callable(v) and not hasattr(v, "__slots__"):
+            continue
+        if isinstance(v, (bool, int, float, str, tuple, type(None))):
+            state[k] = v
+        elif hasattr(type(v), "__slots__"):  # filtros: compara o estado interno
+            state[k] = (id(v), tuple(getattr(v, s, None) for s in type(v).__slots__))
+        else:
+            state[k] = id(v)
+    return state
+
+
+def test_replay_leaves_main_globals_unchanged(drift_session):
+    path, _ = drift_session
+    before = main_state()
+    replay_session(path, preset=1, overrides={"EDGE_ACCEL_ENABLED": False, "INVERT_Y": True,
+                                              "drift_correction": True, "gain_yaw": 99.0})
+    replay_session(path, preset=2, angle_filter="one_euro",
+                   overrides={"MIRROR_YAW": True, "predict_strength": 0.5, "drift_correction": False})
+    after = main_state()
+    changed = {k: (before.get(k), after.get(k)) for k in before.keys() | after.keys() if before.get(k) != after.get(k)}
+    assert changed == {}
@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+import pytest
+
+from filters import AlphaBetaTracker, OneEuroFilter, ema_alpha_for, ema_step
+from replay import replay_session
+
+RATES = (15.0, 30.0, 60.0)
+
+
+def run(filt, signal, fps, duration):
+    """Filtra ``signal(t)`` amostrado a ``fps``; devolve {tempo em ms: saída}."""
+    out = {}
+    for i in range(int(round(duration * fps)) + 1):
+        t = i / fps
+        out[round(t * 1000)] = filt(signal(t), 1.0 / fps if i else 0.0)
+    return out
+
+
+def common(series):
+    keys = set.intersection(*(set(s) for s in series))
+    return sorted(keys)
+
+
+def test_ema_alpha_for_matches_reference_rate():
+    assert ema_alpha_for(0.25, 1 / 30) == pytest.approx(0.25)
+    # dois passos a 60 fps = um passo a 30 fps
+    a60 = ema_alpha_for(0.25, 1 / 60)
+    assert 1 - (1 - a60) ** 2 == pytest.approx(0.25)
+    assert ema_alpha_for(1.0, 0.5) == 1.0 and ema_alpha_for(0.0, 0.5) == 0.0
+
+
+def test_ema_step_response_is_rate_invariant():
+    series = []
+    for fps in RATES:
+        y, s = 0.0, {}
+        for i in range(int(fps) + 1):  # degrau 0 → 10 em t = 0, por 1 s
+            s[round(i / fps * 1000)] = y
+            y = ema_step(y, 10.0, 0.25, 1.0 / fps)
+        series.append(s)
+    for k in common(series):
+        vals = [s[k] for s in series]
+        assert max(vals) - min(vals) < 1e-9, k
+
+
+def test_one_euro_tracks_a_sine_alike_at_any_rate():
+    """Discretização de 1ª ordem: não é exata, mas o atraso difere bem menos que um frame a 30 fps."""
+    signal = lambda t: 10.0 * math.sin(math.pi * t)
+    series = [run(OneEuroFilter(1.0, 0.05), signal, fps, 4.0) for fps in RATES]
+    keys = [k for k in common(series) if k >= 1000]
+    ref = series[1]
+    for s in (series[0], series[2]):
+        err = max(abs(s[k] - ref[k]) for k in keys)
+        assert err < 10.0 * math.pi / 30.0, err  # < variação do sinal em 1 frame a 30 fps
+
+
+def test_alpha_beta_velocity_converges_at_any_rate():
+    for fps in RATES:
+        v = run(AlphaBetaTracker(), lambda t: 15.0 * t, fps, 3.0)
+        assert v[3000] == pytest.approx(15.0, rel=0.01), fps
+
+
+@pytest.mark.parametrize("angle_filter", ["ema", "one_euro"])
+def test_cursor_path_is_rate_invariant(make_session, angle_filter):
+    """Mesma virada de cabeça gravada a 15/30/60 fps → mesmo deslocamento do cursor."""
+    yaw = lambda t: 15.0 if 0.5 <= t < 2.0 else 0.0
+    totals = []
+    for fps in RATES:
+        path = make_session(f"turn{int(fps)}.fprec", lambda t: (yaw(t), 0.0, 0.0), fps=fps, duration=3.0)
+        d = replay_session(path, preset=1, neutral=(0.0, 0.0, 0.0), use_points=False,
+                           angle_filter=angle_filter,
+                           overrides={"EDGE_ACCEL_ENABLED": False, "predict_strength": 0.0,
+                                      "drift_correction": False})
+        cx = np.cumsum(d["dx"])
+        totals.append([cx[int(round(q * fps)) - 1] for q in (1.0, 2.0, 3.0)])
+    totals = np.array(totals)
+    assert np.all(np.abs(totals[:, -1]) > 500)  # a virada move o cursor de fato
+    np.testing.assert_allclose(totals, np.broadcast_to(totals[1], totals.shape), rtol=0.05)
@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+
+from hud import FONT, HudCompositor
+
+RECT = (10, 10, 400, 120)
+BG = (20, 20, 20)
+
+
+def direct(lines):
+    """Desenho direto de referência: retângulo opaco + putText na ordem."""
+    img = np.zeros((200, 500, 3), np.uint8)
+    cv2.rectangle(img, RECT[:2], RECT[2:], BG, -1)
+    for text, y, color, scale in lines:
+        cv2.putText(img, text, (20, y), FONT, scale, color, 1)
+    return img
+
+
+def composed(hud):
+    img = np.zeros((200, 500, 3), np.uint8)
+    hud.composite(img)
+    return img
+
+
+def test_panel_matches_direct_drawing():
+    hud = HudCompositor(rect=RECT, bg=BG, dynamic_hz=10)
+    hud.line("a", 40, "Yaw:{:+.1f}", (1.0,), (255, 255, 255), 0.6, dynamic=True, now=0.0)
+    hud.line("b", 60, "Preset: {}", ("Jogo",), (200, 255, 200), 0.6)
+    assert np.array_equal(composed(hud), direct([("Yaw:+1.0", 40, (255, 255, 255), 0.6),
+                                                 ("Preset: Jogo", 60, (200, 255, 200), 0.6)]))
+
+
+def test_overlapping_dynamic_neighbour_is_redrawn_when_not_due():
+    hud = HudCompositor(rect=RECT, bg=BG, dynamic_hz=10)
+    # faixas sobrepostas: redesenhar "b" apaga parte de "a"
+    hud.line("a", 40, "Yaw:{:+.1f}", (1.0,), (255, 255, 255), 0.6, dynamic=True, now=0.0)
+    hud.line("b", 52, "Preset: {}", ("Jogo",), (200, 255, 200), 0.6)
+    assert hud._bands["a"][1] > hud._bands["b"][0]
+
+    # 10 ms depois: "a" não está no período (fica com o valor antigo), "b" muda
+    hud.line("a", 40, "Yaw:{:+.1f}", (2.0,), (255, 255, 255), 0.6, dynamic=True, now=0.01)
+    hud.line("b", 52, "Preset: {}", ("Desktop",), (200, 255, 200), 0.6)
+    assert np.array_equal(composed(hud), direct([("Yaw:+1.0", 40, (255, 255, 255), 0.6),
+                                                 ("Preset: Desktop", 52, (200, 255, 200), 0.6)]))
+
+    hud.clear("b")
+    assert np.array_equal(composed(hud), direct([("Yaw:+1.0", 40, (255, 255, 255), 0.6)]))
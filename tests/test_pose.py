@@ -0,0 +1,70 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pose import landmarks_to_points, mesh_to_points, yaw_pitch_roll_batch, yaw_pitch_roll_from_points
+
+W, H = 640, 480
+
+
+def baseline_yaw_pitch_roll(landmarks, w, h):
+    """Fórmula original (get_yaw_pitch_roll do main.py antes do kernel vetorizado)."""
+    def denorm(i): return (landmarks[i].x * w, landmarks[i].y * h)
+
+    le, re = denorm(33), denorm(263)
+    nose, nose_b, forehead = denorm(1), denorm(2), denorm(10)
+    eye_center = ((le[0] + re[0]) * 0.5, (le[1] + re[1]) * 0.5)
+
+    roll = math.degrees(math.atan2(re[1] - le[1], re[0] - le[0]))
+    if roll > 90: roll -= 180
+    if roll < -90: roll += 180
+
+    yaw = (nose[0] - eye_center[0]) / max(1, (re[0] - le[0]))
+    ref = max(1, abs(eye_center[1] - nose_b[1]))
+    pitch = ((nose_b[1] - forehead[1]) / ref) - 0.6
+    return yaw * 35.0, pitch * 40.0, roll
+
+
+def synthetic_meshes(n, seed=0):
+    """Malhas normalizadas (n, 478, 3) com rosto plausível + casos degenerados."""
+    rng = np.random.default_rng(seed)
+    mesh = rng.uniform(0.0, 1.0, (n, 478, 3))
+    cx, cy = rng.uniform(0.3, 0.7, n), rng.uniform(0.3, 0.7, n)
+    half = rng.uniform(0.05, 0.2, n)
+    tilt = rng.uniform(-0.05, 0.05, n)
+    mesh[:, 33, 0], mesh[:, 33, 1] = cx - half, cy - tilt
+    mesh[:, 263, 0], mesh[:, 263, 1] = cx + half, cy + tilt
+    mesh[:, 1, 0] = cx + rng.uniform(-0.1, 0.1, n)
+    mesh[:, 2, 1] = cy + rng.uniform(0.05, 0.15, n)
+    mesh[:, 10, 1] = cy - rng.uniform(0.05, 0.2, n)
+    # olhos trocados (roll dobrado), olhos quase sobrepostos (max(1, ...)) e nariz na linha dos olhos
+    mesh[0, 33, :2], mesh[0, 263, :2] = (0.6, 0.5), (0.4, 0.52)
+    mesh[1, 263, :2] = mesh[1, 33, :2] + (0.0005, 0.0)
+    mesh[2, 2, 1] = (mesh[2, 33, 1] + mesh[2, 263, 1]) / 2
+    return mesh
+
+
+def as_landmarks(mesh_row):
+    return [SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in mesh_row]
+
+
+def test_single_frame_matches_baseline():
+    for row in synthetic_meshes(200):
+        lms = as_landmarks(row)
+        got = yaw_pitch_roll_from_points(landmarks_to_points(lms, W, H))
+        assert all(isinstance(v, float) for v in got)
+        assert got == pytest.approx(baseline_yaw_pitch_roll(lms, W, H), abs=1e-9)
+
+
+def test_batch_matches_baseline_and_single():
+    mesh = synthetic_meshes(200, seed=1)
+    batch = yaw_pitch_roll_batch(mesh, W, H)
+    assert batch.shape == (200, 3)
+    expected = np.array([baseline_yaw_pitch_roll(as_landmarks(row), W, H) for row in mesh])
+    np.testing.assert_allclose(batch, expected, rtol=0, atol=1e-9)
+
+    points = mesh_to_points(mesh, W, H)
+    single = np.array([yaw_pitch_roll_from_points(p) for p in points])
+    np.testing.assert_allclose(batch, single, rtol=0, atol=1e-9)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import main
+from backends import RecordingBackend
+from mouse_output import VirtualCursor
+from throttle import InferenceThrottle
+
+FPS = 30.0
+
+
+@pytest.fixture
+def core(monkeypatch):
+    monkeypatch.setattr(main, "mouse_backend", RecordingBackend())
+    monkeypatch.setattr(main, "cursor", VirtualCursor((0, 0, 1920, 1080)))
+    monkeypatch.setattr(main, "mouse_output", None)
+    monkeypatch.setattr(main, "recalib_request", False)
+    monkeypatch.setattr(main, "control_enabled", True)
+    for k in ("neutral_yaw", "neutral_pitch", "neutral_roll"):
+        monkeypatch.setattr(main, k, 0.0)
+    main.calibrator.cancel()
+    main.reset_motion_state()
+    yield main
+    main.reset_motion_state()
+
+
+def test_throttle_goes_idle_after_control_off_mid_motion(core):
+    t = 100.0
+    for _ in range(int(FPS)):  # cabeça virada: cursor andando
+        core.process_angles((20.0, 0.0, 0.0), t)
+        t += 1 / FPS
+    assert core.tracking_busy()
+
+    core.control_enabled = False  # F1 com a cabeça em movimento
+    core.process_angles((20.0, 0.0, 0.0), t)
+    assert not core.tracking_busy()
+
+    thr = InferenceThrottle(idle_hz=5.0)
+    frame = np.zeros((480, 640, 3), np.uint8)
+    inferred = 0
+    for _ in range(int(10 * FPS)):
+        t += 1 / FPS
+        if thr.should_infer(frame, t, core.control_enabled, core.tracking_busy()):
+            inferred += 1
+            core.process_angles((20.0, 0.0, 0.0), t)
+    assert thr.idle
+    assert inferred <= 10 * 5 + 1
+
+
+def test_face_lost_clears_busy(core):
+    t = 100.0
+    for _ in range(int(FPS)):
+        core.process_angles((20.0, 0.0, 0.0), t)
+        t += 1 / FPS
+    assert core.tracking_busy()
+    core.process_angles(None, t)
+    assert not core.tracking_busy()
+    assert core.edge_boost_x == 0.0
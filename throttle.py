@@ -0,0 +1,108 @@
+"""
+Taxa de inferência adaptativa.
+
+O FaceMesh é a parte cara do loop. Enquanto o controle está desligado ou a
+cabeça está parada, não há motivo para rodá-lo a cada frame da câmera:
+``InferenceThrottle`` baixa a taxa para ``idle_hz``.
+
+Dois sinais baratos detectam movimento:
+
+- diferença de frame: miniatura cinza 32x24 (amostragem + média), comparada
+  com a miniatura do último frame inferido (~40 us/frame);
+- velocidade dos landmarks de pose entre inferências (``observe``).
+
+A miniatura é calculada em todo frame, inclusive nos que seriam pulados; se
+ela acusar movimento, aquele mesmo frame já vai para a inferência (volta à
+taxa cheia em um frame).
+"""
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class InferenceThrottle:
+    """
+    - ``idle_hz``: taxa de inferência em repouso.
+    - ``still_after``: segundos sem movimento até considerar a cabeça parada.
+    - ``diff_thresh``: diferença média (0–255) da miniatura que conta como movimento.
+    - ``vel_thresh``: velocidade dos landmarks (px/s) que conta como movimento.
+    """
+
+    def __init__(self, idle_hz: float = 5.0, still_after: float = 1.0,
+                 diff_thresh: float = 3.0, vel_thresh: float = 40.0):
+        self._idle_period = 1.0 / idle_hz
+        self._still_after = still_after
+        self._diff_thresh = diff_thresh
+        self._vel_thresh = vel_thresh
+
+        self._sample = np.empty((96, 128, 3), np.uint8)
+        self._small = np.empty((24, 32, 3), np.uint8)
+        self._thumb = np.empty((24, 32), np.uint8)
+        self._ref: Optional[np.ndarray] = None  # miniatura do último frame inferido
+
+        self._last_motion = float("-inf")
+        self._last_infer = float("-inf")
+        self._last_pts: Optional[np.ndarray] = None
+        self._last_pts_ts = 0.0
+
+        self.idle = False
+        self.inferred = 0
+        self.skipped = 0
+        self.wakeups = 0   # repouso → taxa cheia por movimento detectado
+
+    def _thumbnail(self, frame) -> np.ndarray:
+        cv2.resize(frame, (128, 96), dst=self._sample, interpolation=cv2.INTER_NEAREST)
+        cv2.resize(self._sample, (32, 24), dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._thumb)
+        return self._thumb
+
+    def should_infer(self, frame, now: float, active: bool = True, busy: bool = False) -> bool:
+        """
+        Chamado pela thread de inferência em todo frame capturado.
+
+        - ``active``: controle ligado (desligado → repouso mesmo com movimento).
+        - ``busy``: precisa de taxa cheia (calibrando, cursor em movimento).
+        """
+        thumb = self._thumbnail(frame)
+        if self._ref is not None:
+            diff = cv2.norm(thumb, self._ref, cv2.NORM_L1) / thumb.size
+            if diff > self._diff_thresh:
+                self._last_motion = now
+
+        still = now - self._last_motion >= self._still_after
+        idle = not busy and (not active or still)
+        if idle and now - self._last_infer < self._idle_period:
+            self.skipped += 1
+            self.idle = True
+            return False
+
+        if self.idle and not idle:
+            self.wakeups += 1
+        self.idle = idle
+        self._last_infer = now
+        self.inferred += 1
+        if self._ref is None:
+            self._ref = np.empty_like(thumb)
+        np.copyto(self._ref, thumb)
+        return True
+
+    def observe(self, points: Optional[np.ndarray], now: float):
+        """Landmarks de pose (5x2 px) do frame inferido; movimento rápido acorda."""
+        if points is None:
+            self._last_pts = None
+            return
+        if self._last_pts is not None:
+            dt = now - self._last_pts_ts
+            if dt > 0 and float(np.abs(points - self._last_pts).max()) / dt > self._vel_thresh:
+                self._last_motion = now
+            np.copyto(self._last_pts, points)
+        else:
+            self._last_pts = np.array(points, np.float64)
+        self._last_pts_ts = now
+
+    def report(self) -> str:
+        total = self.inferred + self.skipped
+        pct = 100.0 * self.skipped / total if total else 0.0
+        return (f"[Inferência] {self.inferred} inferidos | {self.skipped} pulados em repouso ({pct:.0f}%) | "
+                f"retomadas por movimento: {self.wakeups}")
@@ -0,0 +1,223 @@
+"""
+Rastreamento auxiliar para reduzir o custo da inferência do FaceMesh.
+
+``FaceRoiTracker``: usa os landmarks do frame anterior para recortar (e
+reduzir) só a região do rosto antes do ``face_mesh.process``. Os landmarks
+voltam mapeados para coordenadas do frame inteiro, então ``get_yaw_pitch_roll``
+continua recebendo exatamente o mesmo referencial. Se o rosto some, a janela
+de busca cresce a cada frame até voltar ao frame inteiro.
+
+``FlowPoseTracker``: entre keyframes do FaceMesh, propaga só os 5 pontos de
+pose (``pose.POSE_IDX``) com Lucas-Kanade piramidal num frame cinza reduzido.
+Um frame rastreado custa uma fração da inferência; erro de fluxo ou
+distorção da geometria do rosto forçam um novo keyframe.
+"""
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Landmarks que delimitam o rosto (testa, queixo, laterais) + olhos/nariz
+FACE_BOX_IDX = (10, 152, 234, 454, 33, 263, 1)
+
+Roi = Tuple[int, int, int, int]  # x0, y0, largura, altura (px do frame inteiro)
+
+
+class _Point:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x: float, y: float, z: float):
+        self.x, self.y, self.z = x, y, z
+
+
+class RoiLandmarks:
+    """Landmarks do recorte vistos como normalizados no frame inteiro."""
+
+    __slots__ = ("_lm", "_sx", "_ox", "_sy", "_oy")
+
+    def __init__(self, landmarks, roi: Roi, w: int, h: int):
+        x0, y0, cw, ch = roi
+        self._lm = landmarks
+        self._sx, self._ox = cw / w, x0 / w
+        self._sy, self._oy = ch / h, y0 / h
+
+    def __len__(self):
+        return len(self._lm)
+
+    def __getitem__(self, i):
+        p = self._lm[i]
+        return _Point(p.x * self._sx + self._ox, p.y * self._sy + self._oy, p.z * self._sx)
+
+
+class FaceRoiTracker:
+    """
+    ROI do rosto entre frames.
+
+    - ``pad``: margem em torno da caixa do rosto (fração do lado).
+    - ``target_size``: lado do recorte (quadrado) enviado ao FaceMesh (0 = sem resize).
+    - ``grow``: fator de expansão da janela a cada frame sem rosto.
+    - ``full_frame_ratio``: acima desta fração da área, usa o frame inteiro.
+    """
+
+    def __init__(self, pad: float = 0.45, target_size: int = 256, grow: float = 1.6,
+                 full_frame_ratio: float = 0.7):
+        self.pad = pad
+        self.target_size = target_size
+        self.grow = grow
+        self.full_frame_ratio = full_frame_ratio
+        self._box: Optional[Tuple[float, float, float]] = None  # cx, cy, lado (px)
+        self.misses = 0
+
+    def reset(self):
+        self._box = None
+        self.misses = 0
+
+    def roi_for(self, w: int, h: int) -> Optional[Roi]:
+        """ROI do próximo frame, ou None para usar o frame inteiro."""
+        if self._box is None:
+            return None
+        cx, cy, side = self._box
+        # sempre quadrado: desliza para dentro do frame em vez de cortar
+        side = int(min(side * self.grow ** self.misses, w, h))
+        if side <= 16 or side * side >= self.full_frame_ratio * w * h:
+            return None
+        x0 = int(min(max(0, cx - side * 0.5), w - side))
+        y0 = int(min(max(0, cy - side * 0.5), h - side))
+        return x0, y0, side, side
+
+    def crop(self, frame, roi: Optional[Roi], bufs=None):
+        """
+        Recorte (view, sem cópia) redimensionado para ``target_size`` x ``target_size``.
+        Com ``bufs`` (FrameBuffers), o resize escreve num buffer reaproveitado.
+        """
+        if roi is None:
+            return frame
+        x0, y0, cw, ch = roi
+        img = frame[y0:y0 + ch, x0:x0 + cw]
+        if self.target_size:
+            size = (self.target_size, self.target_size)
+            if bufs is not None:
+                img = bufs.resize(img, size, key="roi")
+            else:
+                img = cv2.resize(img, size, interpolation=cv2.INTER_LINEAR)
+        return img
+
+    def update(self, landmarks, w: int, h: int):
+        """Atualiza a caixa a partir de landmarks já no referencial do frame inteiro."""
+        xs = [landmarks[i].x * w for i in FACE_BOX_IDX]
+        ys = [landmarks[i].y * h for i in FACE_BOX_IDX]
+        bw, bh = max(xs) - min(xs), max(ys) - min(ys)
+        side = max(bw, bh) * (1.0 + 2.0 * self.pad)
+        self._box = ((max(xs) + min(xs)) * 0.5, (max(ys) + min(ys)) * 0.5, side)
+        self.misses = 0
+
+    def lost(self, w: int, h: int):
+        """Rosto não encontrado: expande a janela (e desiste ao cobrir o frame)."""
+        if self._box is None:
+            return
+        self.misses += 1
+        if self.roi_for(w, h) is None:
+            self.reset()
+
+
+class FlowPoseTracker:
+    """
+    Pontos de pose (5x2 px, frame inteiro) propagados por fluxo óptico.
+
+    - ``scale``: redução do frame cinza usado no fluxo.
+    - ``keyframe_every``: máx. de frames rastreados entre dois keyframes.
+    - ``max_fb_error``: erro ida-e-volta (px, frame reduzido) acima → keyframe.
+    - ``max_drift``: variação relativa da distância entre os olhos e do
+      comprimento testa–nariz em relação ao keyframe acima → keyframe.
+    """
+
+    def __init__(self, scale: float = 0.5, keyframe_every: int = 2, max_fb_error: float = 1.0,
+                 max_drift: float = 0.12, win: int = 15, levels: int = 2):
+        self.scale = scale
+        self.keyframe_every = keyframe_every
+        self.max_fb_error = max_fb_error
+        self.max_drift = max_drift
+        self._lk = dict(winSize=(win, win), maxLevel=levels,
+                        criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        self._small: Optional[np.ndarray] = None
+        self._prev: Optional[np.ndarray] = None   # cinza reduzido do último frame
+        self._cur: Optional[np.ndarray] = None
+        self._pts: Optional[np.ndarray] = None    # (5, 1, 2) float32, frame reduzido
+        self._ref_geom: Optional[Tuple[float, float]] = None
+        self._since_key = 0
+
+        self.keyframes = 0
+        self.tracked = 0
+        self.failures = 0
+
+    def reset(self):
+        self._pts = None
+        self._since_key = 0
+
+    def need_keyframe(self) -> bool:
+        return self._pts is None or self._since_key >= self.keyframe_every
+
+    def _gray(self, frame) -> np.ndarray:
+        h, w = frame.shape[:2]
+        size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        if self._cur is None or self._cur.shape != (size[1], size[0]):
+            self._small = np.empty((size[1], size[0], 3), np.uint8)
+            self._cur = np.empty((size[1], size[0]), np.uint8)
+            self._prev = np.empty_like(self._cur)
+            self._pts = None  # resolução mudou
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._cur)
+        return self._cur
+
+    @staticmethod
+    def _geometry(pts) -> Tuple[float, float]:
+        p = pts.reshape(-1, 2)
+        # POSE_IDX = (33, 263, 1, 2, 10): olho E, olho D, nariz, sob o nariz, testa
+        return float(np.hypot(*(p[1] - p[0]))), float(np.hypot(*(p[4] - p[2])))
+
+    def _swap(self):
+        self._prev, self._cur = self._cur, self._prev
+
+    def keyframe(self, frame, points: np.ndarray):
+        """Pontos do FaceMesh (5x2 px) para ``frame``; vira a nova referência."""
+        self._gray(frame)
+        self._pts = (np.asarray(points, np.float32) * self.scale).reshape(-1, 1, 2)
+        self._ref_geom = self._geometry(self._pts)
+        self._since_key = 0
+        self.keyframes += 1
+        self._swap()
+
+    def track(self, frame) -> Optional[np.ndarray]:
+        """Propaga os pontos até ``frame``. None = falhou (próximo frame precisa de keyframe)."""
+        if self._pts is None:
+            return None
+        prev_pts = self._pts
+        cur = self._gray(frame)
+        if self._pts is None:  # resolução mudou
+            return None
+        p1, st, _ = cv2.calcOpticalFlowPyrLK(self._prev, cur, prev_pts, None, **self._lk)
+        ok = p1 is not None and bool(st.all())
+        if ok:
+            # ida e volta: o ponto rastreado tem de voltar à origem
+            p0r, st_r, _ = cv2.calcOpticalFlowPyrLK(cur, self._prev, p1, None, **self._lk)
+            ok = bool(st_r.all()) and float(np.abs(p0r - prev_pts).max()) <= self.max_fb_error
+        if ok:
+            eyes, face = self._geometry(p1)
+            ref_eyes, ref_face = self._ref_geom
+            ok = (abs(eyes / ref_eyes - 1.0) <= self.max_drift
+                  and abs(face / ref_face - 1.0) <= self.max_drift) if ref_eyes > 0 and ref_face > 0 else False
+        self._swap()
+        if not ok:
+            self.failures += 1
+            self._pts = None
+            return None
+        self._pts = p1
+        self._since_key += 1
+        self.tracked += 1
+        return p1.reshape(-1, 2).astype(np.float64) / self.scale
+
+    def report(self) -> str:
+        total = self.keyframes + self.tracked
+        pct = 100.0 * self.tracked / total if total else 0.0
+        return (f"[Fluxo] {self.keyframes} keyframes FaceMesh | {self.tracked} frames por fluxo ({pct:.0f}%) | "
+                f"falhas: {self.failures}")
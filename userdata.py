@@ -0,0 +1,45 @@
+"""
+Dados persistidos entre execuções (JSON em ``~/.facepilot``).
+
+``FACEPILOT_HOME`` troca o diretório. Gravação atômica (arquivo temporário +
+``os.replace``); arquivo ausente ou corrompido vira ``{}`` — nada aqui pode
+impedir o app de abrir.
+"""
+import json
+import os
+import tempfile
+
+
+def data_dir() -> str:
+    return os.environ.get("FACEPILOT_HOME") or os.path.join(os.path.expanduser("~"), ".facepilot")
+
+
+def load(name: str) -> dict:
+    try:
+        with open(os.path.join(data_dir(), name), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save(name: str, data: dict) -> bool:
+    d = data_dir()
+    tmp = None
+    try:
+        os.makedirs(d, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=name, suffix=".tmp", dir=d)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp, os.path.join(d, name))
+        tmp = None
+        return True
+    except (OSError, TypeError, ValueError) as e:  # ValueError/TypeError: dado não serializável
+        print(f"[AVISO] Não foi possível salvar {name} em {d} ({e}).")
+        return False
+    finally:
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass